@@ -0,0 +1,162 @@
+"""
+Autoplay for the GUI: a built-in policy plays BlackjackGUI rounds back to back.
+
+Autoplay drives the window through the same handlers its controls use (the bet
+box and Bet & Deal, Hit, Stand and the Ace buttons' choose_ace), so a long run
+exercises the real GUI code paths. Decisions come from a simulate-style policy:
+bet(chips), hit(player_hand, upcard) and optionally ace(player_hand) -> 1 or 11
+(by default an Ace is 11 unless that would bust, as in Hand.deal_cards).
+
+Speed:
+- delay_ms > 0: one decision every delay_ms milliseconds
+- delay_ms == 0: as fast as possible, in slices of one display frame; the event
+  loop runs between slices, so the window repaints at most once per frame
+
+For soak tests it reports every report_every seconds: rounds/sec, frames/sec,
+frame-to-frame intervals (p50/p99/max), resident memory and the number of live
+child objects of the window, so leaks and slowdowns show up as trends.
+With rebuy, a broke player is topped back up to the starting chips instead of
+ending the game.
+
+Usage:
+    python game_gui.py --autoplay
+    python game_gui.py --autoplay --autoplay-delay 250 --decks 6
+    python game_gui.py --autoplay --autoplay-rounds 100000 --report-every 30
+"""
+import os
+import resource
+import sys
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+import round_machine
+import simulate
+import stats
+
+
+def resident_mb():
+    """Current resident set size in MB (peak size where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+class Autoplay(QObject):
+    """
+    Plays a BlackjackGUI window with a policy until stopped, out of chips (without
+    rebuy) or after rounds rounds (0: no limit); finished is emitted then.
+    - start() / stop()
+    - rounds_played, rebuys: totals so far
+    """
+    finished = Signal()
+
+    def __init__(self, window, policy=None, delay_ms=0, rounds=0, report_every=10.0, rebuy=True):
+        super().__init__(window)
+        self.window = window
+        self.policy = policy or simulate.StandOnPolicy(17, 10)
+        self.delay_ms = delay_ms
+        self.rounds = rounds
+        self.report_every = report_every
+        self.rebuy = rebuy
+        self.starting_chips = window.player_chips.total
+        self.rounds_played = 0
+        self.rebuys = 0
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        window.round.round_settled.connect(self.on_round_settled)
+        window.frame_started.connect(self.on_frame)
+        self._last_frame = None
+        self._frame_intervals = []
+        self._started = None
+        self._report_start = None
+        self._report_rounds = 0
+
+    def start(self):
+        self._started = self._report_start = time.perf_counter()
+        self._report_rounds = self.rounds_played
+        self.timer.start(self.delay_ms)
+
+    def stop(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.report(final=True)
+            self.finished.emit()
+
+    # --- Decisions ---
+
+    def step(self):
+        """Makes the window's next decision. Returns False if there is nothing left to play."""
+        window = self.window
+        machine = window.round
+        if machine.pending_ace is not None:
+            ace = getattr(self.policy, 'ace', None)
+            hand = machine.player_hand
+            window.choose_ace(ace(hand) if ace else (11 if hand.value + 11 <= 21 else 1))
+        elif machine.state == round_machine.BETTING:
+            chips = window.player_chips
+            window.bet_input.setValue(max(1, min(self.policy.bet(chips), chips.total)))
+            window.start_new_round()
+        elif machine.state == round_machine.PLAYER_TURN:
+            if self.policy.hit(machine.player_hand, machine.dealer_hand.hand[0]):
+                window.hit()
+            else:
+                window.stand()
+        else:
+            return False
+        return True
+
+    def tick(self):
+        if self.delay_ms:
+            playing = self.step()
+        else:
+            # One frame's worth of decisions, then back to the event loop to paint
+            deadline = time.perf_counter() + self.window.frame_interval_ms / 1000
+            playing = True
+            while playing and self.timer.isActive() and time.perf_counter() < deadline:
+                playing = self.step()
+        if not playing:
+            self.stop()
+        elif time.perf_counter() - self._report_start >= self.report_every:
+            self.report()
+
+    def on_round_settled(self, outcome, net):
+        self.rounds_played += 1
+        chips = self.window.player_chips
+        if self.rebuy and chips.total <= 0:
+            # Topped up before the round machine decides between betting and game over
+            chips.total = self.starting_chips
+            self.rebuys += 1
+            self.window.update_chips_display()
+        if self.rounds and self.rounds_played >= self.rounds:
+            self.stop()
+
+    # --- Reporting ---
+
+    def on_frame(self):
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            self._frame_intervals.append(now - self._last_frame)
+        self._last_frame = now
+
+    def report(self, final=False):
+        """Prints the stats for the period since the last report (and, when final, the whole run's totals)."""
+        now = time.perf_counter()
+        period = max(now - self._report_start, 1e-9)
+        intervals = sorted(self._frame_intervals)
+        print(f"[{now - self._started:8.1f}s] rounds {self.rounds_played:,} "
+              f"({(self.rounds_played - self._report_rounds) / period:,.1f}/s)  frames {len(intervals) / period:.1f}/s  "
+              f"interval p50 {stats.percentile(intervals, 0.5) * 1000:.1f} p99 {stats.percentile(intervals, 0.99) * 1000:.1f} "
+              f"max {stats.percentile(intervals, 1.0) * 1000:.1f} ms  "
+              f"rss {resident_mb():.1f} MB  objects {len(self.window.findChildren(QObject))}  rebuys {self.rebuys}",
+              flush=True)
+        if final:
+            elapsed = now - self._started
+            print(f"Autoplay: {self.rounds_played:,} rounds in {elapsed:.1f}s "
+                  f"({self.rounds_played / elapsed if elapsed else 0.0:,.1f} rounds/sec)", flush=True)
+        self._frame_intervals = []
+        self._report_start = now
+        self._report_rounds = self.rounds_played
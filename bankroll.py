@@ -0,0 +1,219 @@
+"""
+Bankroll and risk-of-ruin analyzer.
+
+Simulates many Chips trajectories side by side as NumPy arrays: every
+trajectory starts with the same bankroll, bets according to a betting system
+and keeps playing until it has played every round or cannot cover a bet of
+1 (ruin). A bet larger than the bankroll is cut to the bankroll, as take_bet
+would reject it. Each round step is a handful of array operations over the
+trajectories still alive. Ruined ones are dropped from the working arrays
+on the step they go broke, so later steps get cheaper.
+
+Round outcomes are drawn from a calibrated distribution rather than dealt:
+simulate.play_round is run from a Shoe, recording each round's outcome and the
+Hi-Lo true count before it was dealt. Flat, percentage and Martingale
+betting draw from the overall outcome distribution; count-based betting first
+draws a true count (from its observed frequencies) and then an outcome from
+that count's distribution, so larger bets land on the counts where they were
+placed. True counts are drawn independently per round, so streaks of good or
+bad shoes are not modelled.
+
+Betting systems:
+- flat: unit every round
+- percent: fraction of the current bankroll (at least 1)
+- martingale: double after each loss, back to unit after a win (a push keeps the bet)
+- count: unit * spread for the true count (1 at +1 or less, then 2, 4, 6, 8)
+
+Usage:
+    python bankroll.py --trajectories 100000 --rounds 10000 --system flat
+    python bankroll.py --system all --unit 5 --bankroll 1000
+"""
+import argparse
+import random
+import time
+from functools import lru_cache
+
+import numpy as np
+
+import counting
+import game_logic
+import simulate
+
+
+OUTCOMES = game_logic.OUTCOMES
+# Net payout per outcome in half-bets, so (bet * PAYOUT_HALVES) // 2 matches pay_out (blackjack pays int(1.5 * bet));
+# the sign also tells wins from losses
+PAYOUT_HALVES = np.array([3, 2, 2, 0, -2, -2], dtype=np.int64)
+
+MIN_COUNT, MAX_COUNT = -6, 6
+COUNT_SPREAD = {1: 1, 2: 2, 3: 4, 4: 6}  # true count -> bet units; counts above 4 bet 8
+SYSTEMS = ('flat', 'percent', 'martingale', 'count')
+TABLE_BITS = 16  # outcome lookup tables have 2**16 entries, so probabilities are exact to 1/65536
+
+
+@lru_cache(maxsize=8)
+def calibrate(rounds=200_000, decks=6, stand_on=17, seed=0):
+    """
+    Plays rounds with simulate.play_round from a Shoe.
+    Returns (count_frequencies, outcome_probabilities): the share of rounds at
+    each true count MIN_COUNT..MAX_COUNT (truncated and clipped), and a
+    (counts, outcomes) array of outcome probabilities at each count.
+    """
+    shoe = game_logic.Shoe(decks, 0.75, random.Random(seed))
+    counter = counting.attach(shoe)
+    chips = game_logic.Chips()
+    policy = simulate.StandOnPolicy(stand_on, 1)
+    outcome_index = {outcome: i for i, outcome in enumerate(OUTCOMES)}
+    tally = np.zeros((MAX_COUNT - MIN_COUNT + 1, len(OUTCOMES)), dtype=np.int64)
+    for _ in range(rounds):
+        shoe.new_round()
+        count = min(max(int(counter.true_count()), MIN_COUNT), MAX_COUNT)
+        outcome, _ = simulate.play_round(shoe, chips, policy)
+        tally[count - MIN_COUNT, outcome_index[outcome]] += 1
+    per_count = tally.sum(axis=1)
+    probabilities = tally / np.maximum(per_count, 1)[:, None]
+    # Counts never seen in calibration fall back to the overall distribution
+    probabilities[per_count == 0] = tally.sum(axis=0) / rounds
+    return per_count / rounds, probabilities
+
+
+def lookup_table(probabilities, values=None):
+    """
+    2**TABLE_BITS entries laid out in proportion to probabilities, so
+    table[random uint16] samples from them. Entries are the indices of
+    probabilities, or values[index] if given.
+    """
+    size = 1 << TABLE_BITS
+    edges = np.round(np.cumsum(probabilities) * size).astype(np.int64)
+    edges[-1] = size
+    values = np.arange(len(probabilities)) if values is None else np.asarray(values)
+    return np.repeat(values.astype(np.int8), np.diff(edges, prepend=0))
+
+
+def count_bets(unit):
+    """Bet for each true count MIN_COUNT..MAX_COUNT under the count system."""
+    return np.array([unit * COUNT_SPREAD.get(count, 1 if count < 1 else 8)
+                     for count in range(MIN_COUNT, MAX_COUNT + 1)], dtype=np.int64)
+
+
+def simulate_bankrolls(trajectories, rounds, system='flat', bankroll=100, unit=10, fraction=0.05,
+                       calibration=None, seed=0):
+    """
+    Runs trajectories bankrolls for up to rounds rounds each.
+    Returns a dict of per-trajectory arrays:
+    - final: bankroll at the end (below 1 if ruined)
+    - ruin_round: round on which the bankroll could no longer cover a bet, or -1
+    - peak: highest bankroll reached
+    - max_drawdown: largest fall from a previous peak
+    """
+    if system not in SYSTEMS:
+        raise ValueError(f"Unknown betting system {system!r}; choose from {', '.join(SYSTEMS)}.")
+    count_frequencies, outcome_probabilities = calibration or calibrate()
+    rng = np.random.default_rng(seed)
+
+    # Outcome tables hold the payout in half-bets directly, saving a gather per step
+    if system == 'count':
+        count_table = lookup_table(count_frequencies)
+        payout_tables = np.stack([lookup_table(p, PAYOUT_HALVES) for p in outcome_probabilities])
+        bets_by_count = count_bets(unit)
+    else:
+        payout_table = lookup_table(count_frequencies @ outcome_probabilities, PAYOUT_HALVES)
+
+    final = np.empty(trajectories, dtype=np.int64)
+    ruin_round = np.full(trajectories, -1, dtype=np.int64)
+    peak_out = np.empty(trajectories, dtype=np.int64)
+    drawdown_out = np.empty(trajectories, dtype=np.int64)
+
+    # Working arrays cover the live trajectories only; ids maps them back
+    ids = np.arange(trajectories)
+    chips = np.full(trajectories, bankroll, dtype=np.int64)
+    peak = chips.copy()
+    drawdown = np.zeros(trajectories, dtype=np.int64)
+    bet = np.full(trajectories, unit, dtype=np.int64) if system == 'martingale' else unit
+
+    def retire(mask):
+        done = ids[mask]
+        final[done] = chips[mask]
+        peak_out[done] = peak[mask]
+        drawdown_out[done] = drawdown[mask]
+
+    for step in range(rounds):
+        if not len(ids):
+            break
+        draws = rng.integers(0, 1 << TABLE_BITS, size=len(ids), dtype=np.uint16)
+        if system == 'count':
+            counts = count_table[rng.integers(0, 1 << TABLE_BITS, size=len(ids), dtype=np.uint16)]
+            halves = payout_tables[counts, draws]
+            bet = bets_by_count[counts]
+        else:
+            halves = payout_table[draws]
+            if system == 'percent':
+                bet = np.maximum((chips * fraction).astype(np.int64), 1)
+        wager = np.minimum(bet, chips)
+        # An arithmetic shift floors like // 2 (losses included) and is cheaper
+        chips += (wager * halves) >> 1
+        np.maximum(peak, chips, out=peak)
+        np.maximum(drawdown, peak - chips, out=drawdown)
+        if system == 'martingale':
+            bet = np.where(halves < 0, wager * 2, np.where(halves > 0, unit, wager))
+
+        broke = chips < 1
+        if broke.any():
+            ruin_round[ids[broke]] = step + 1
+            retire(broke)
+            alive = ~broke
+            ids, chips, peak, drawdown = ids[alive], chips[alive], peak[alive], drawdown[alive]
+            if system == 'martingale':
+                bet = bet[alive]
+
+    retire(np.ones(len(ids), dtype=bool))
+    return {'final': final, 'ruin_round': ruin_round, 'peak': peak_out, 'max_drawdown': drawdown_out}
+
+
+def describe(values, percentiles=(1, 5, 25, 50, 75, 95, 99)):
+    return "  ".join(f"p{p} {v:,.0f}" for p, v in zip(percentiles, np.percentile(values, percentiles)))
+
+
+def print_report(system, results, rounds, seconds):
+    ruin_round = results['ruin_round']
+    ruined = ruin_round >= 0
+    trajectories = len(ruin_round)
+    print(f"\n{system}: {trajectories:,} trajectories x {rounds:,} rounds in {seconds:.2f}s")
+    print(f"  risk of ruin:     {ruined.mean():.2%}")
+    if ruined.any():
+        print(f"  rounds to ruin:   {describe(ruin_round[ruined])}")
+    print(f"  max drawdown:     {describe(results['max_drawdown'])}")
+    print(f"  peak bankroll:    {describe(results['peak'])}")
+    print(f"  final bankroll:   {describe(np.maximum(results['final'], 0))}  mean {np.maximum(results['final'], 0).mean():,.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bankroll trajectories and risk of ruin")
+    parser.add_argument('--trajectories', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=10_000, help="maximum rounds per trajectory")
+    parser.add_argument('--system', choices=SYSTEMS + ('all',), default='flat')
+    parser.add_argument('--bankroll', type=int, default=100, help="starting chips (Chips starts at 100)")
+    parser.add_argument('--unit', type=int, default=10, help="base bet")
+    parser.add_argument('--fraction', type=float, default=0.05, help="bet fraction for the percent system")
+    parser.add_argument('--stand-on', type=int, default=17, help="player policy for calibration (simulate.StandOnPolicy)")
+    parser.add_argument('--decks', type=int, default=6, help="shoe size for calibration")
+    parser.add_argument('--calibration-rounds', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    calibration = calibrate(args.calibration_rounds, args.decks, args.stand_on, args.seed)
+    count_frequencies, outcome_probabilities = calibration
+    edge = count_frequencies @ outcome_probabilities @ (PAYOUT_HALVES / 2)
+    print(f"Calibrated on {args.calibration_rounds:,} rounds in {time.perf_counter() - start:.2f}s: "
+          f"expected net {edge:+.4f} per unit bet")
+
+    for system in (SYSTEMS if args.system == 'all' else (args.system,)):
+        start = time.perf_counter()
+        results = simulate_bankrolls(args.trajectories, args.rounds, system, args.bankroll, args.unit,
+                                     args.fraction, calibration, args.seed)
+        print_report(system, results, args.rounds, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
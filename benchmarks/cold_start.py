@@ -0,0 +1,129 @@
+"""
+Cold start of the GUI: time to first frame and import time, with a budget.
+
+Each run starts a fresh interpreter (offscreen) that does what
+`python game_gui.py` does - import game_gui, create the QApplication and the
+window, show it and enter the event loop - and reports when the window's first
+paint event arrives. Times are measured from just before the process is
+spawned, so interpreter startup is included. A separate
+`python -X importtime -c "import game_gui"` run gives the import total and
+its largest direct imports.
+
+The best of --runs is compared with the budgets; the exit status is 1 if either
+is exceeded, so this can gate a change the way benchmarks.suite does.
+
+Usage:
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --runs 10 --first-frame-budget 800 --import-budget 400
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets in milliseconds for this repository's reference machine; loosen with the flags on slower ones
+FIRST_FRAME_BUDGET_MS = 1000
+IMPORT_BUDGET_MS = 500
+
+# Mirrors game_gui's __main__ block, plus a filter that reports the first paint and quits
+CHILD = r"""
+import time
+import game_gui
+imported = time.monotonic()
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication
+
+
+class FirstFrame(QObject):
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint:
+            print(imported, time.monotonic(), flush=True)
+            watched.removeEventFilter(self)
+            QTimer.singleShot(0, app.quit)
+        return False
+
+
+app = QApplication([])
+window = game_gui.BlackjackGUI()
+first_frame = FirstFrame()
+window.installEventFilter(first_frame)
+window.show()
+app.exec()
+"""
+
+
+def child_env():
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    env.pop("BLACKJACK_TRACE", None)
+    return env
+
+
+def time_first_frame():
+    """Returns (ms until game_gui was imported, ms until the first frame) for one fresh process."""
+    start = time.monotonic()
+    output = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=child_env(), check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=60).stdout
+    imported, first_frame = map(float, output.split())
+    return (imported - start) * 1000, (first_frame - start) * 1000
+
+
+def import_times():
+    """
+    Runs `-X importtime` on game_gui.
+    Returns (total ms for game_gui and everything it imports, [(ms, module)] for its direct imports).
+    """
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import game_gui"], cwd=ROOT,
+                            env=child_env(), check=True, stderr=subprocess.PIPE, text=True, timeout=60).stderr
+    total = 0.0
+    direct = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        # Lines are written as each import finishes, so game_gui's children come before it
+        if depth == 1:
+            direct.append((int(cumulative) / 1000, name.strip()))
+        elif depth == 0:
+            if name.strip() == "game_gui":
+                total = int(cumulative) / 1000
+                break
+            direct = []
+    return total, sorted(direct, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUI cold start: time to first frame and import time")
+    parser.add_argument('--runs', type=int, default=5, help="fresh processes to time; the best is compared with the budget")
+    parser.add_argument('--first-frame-budget', type=float, default=FIRST_FRAME_BUDGET_MS, help="milliseconds")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_MS, help="milliseconds")
+    args = parser.parse_args()
+
+    runs = [time_first_frame() for _ in range(args.runs)]
+    imported = min(run[0] for run in runs)
+    first_frame = min(run[1] for run in runs)
+    import_total, direct = import_times()
+
+    print(f"time to first frame:  best {first_frame:7.1f} ms  median {sorted(run[1] for run in runs)[len(runs) // 2]:7.1f} ms"
+          f"  (game_gui imported at {imported:.1f} ms)  budget {args.first_frame_budget:.0f} ms")
+    print(f"import game_gui:           {import_total:7.1f} ms (-X importtime)  budget {args.import_budget:.0f} ms")
+    for ms, module in direct[:8]:
+        print(f"  {module:<24} {ms:7.1f} ms")
+
+    failures = []
+    if first_frame > args.first_frame_budget:
+        failures.append(f"time to first frame {first_frame:.0f} ms > {args.first_frame_budget:.0f} ms")
+    if import_total > args.import_budget:
+        failures.append(f"import time {import_total:.0f} ms > {args.import_budget:.0f} ms")
+    if failures:
+        print("OVER BUDGET: " + "; ".join(failures))
+        sys.exit(1)
+    print("within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Per-round deck cost: building a new deck of fresh Card objects every round
+(how start_new_round worked before cards were interned) versus resetting one
+Deck of shared cards in place.
+
+Usage:
+    python -m benchmarks.deck
+"""
+import random
+import time
+import tracemalloc
+
+import game_logic
+
+
+class LegacyCard:
+    """The original mutable, per-deck Card, kept here only for comparison."""
+
+    def __init__(self, suit, rank):
+        self.suit = suit
+        self.rank = rank
+        self.value = game_logic.values[rank]
+
+
+def legacy_round(rng):
+    deck = [LegacyCard(suit, rank) for suit in game_logic.suits for rank in game_logic.ranks]
+    rng.shuffle(deck)
+    return deck
+
+
+def measure(round_fn, rounds):
+    """Returns (seconds per round, allocations per round, bytes allocated per round)."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        round_fn()
+    seconds = (time.perf_counter() - start) / rounds
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [round_fn() for _ in range(100)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    size = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    del kept
+    return seconds, blocks / 100, size / 100
+
+
+def main(rounds=20_000):
+    rng = random.Random(0)
+    deck = game_logic.Deck(rng)
+
+    results = {
+        'new deck per round (legacy cards)': measure(lambda: legacy_round(rng), rounds),
+        'Deck.reset() on shared cards': measure(lambda: deck.reset(), rounds),
+    }
+    for name, (seconds, blocks, size) in results.items():
+        print(f"{name:<36} {seconds * 1e6:8.2f} us/round  {blocks:8.1f} allocs/round  {size:10.0f} bytes/round")
+
+
+if __name__ == "__main__":
+    main()
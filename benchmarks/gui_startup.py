@@ -0,0 +1,85 @@
+"""
+Card image startup cost, before and after background/atlas loading:
+- sync: the original approach, decoding and scaling every PNG on the GUI thread
+- cold: CardImages with an empty cache (time the GUI thread is blocked, and time until all images are ready)
+- warm: CardImages reading the atlas written by the cold run
+
+Uses PNG-cards/ if present, otherwise generates stand-in card PNGs of the same
+size in a temporary directory.
+
+Usage:
+    python -m benchmarks.gui_startup
+"""
+import os
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QImage, QPainter, QPixmap
+from PySide6.QtWidgets import QApplication
+
+import card_images
+
+
+def make_stand_in_cards(directory, width=500, height=726):
+    """Writes one noisy PNG per card so decoding costs something close to the real artwork."""
+    for i, file_name in enumerate(card_images.SOURCE_FILES.values()):
+        image = QImage(width, height, QImage.Format_RGB32)
+        image.fill(QColor("white"))
+        painter = QPainter(image)
+        for y in range(0, height, 7):
+            painter.fillRect(0, y, width, 3, QColor.fromHsv((i * 37 + y) % 360, 120, 200))
+        painter.end()
+        image.save(os.path.join(directory, file_name))
+
+
+def load_sync(directory):
+    """The original GUI-thread loop from BlackjackGUI.__init__."""
+    pixmaps = {}
+    for name, file_name in card_images.SOURCE_FILES.items():
+        path = os.path.join(directory, file_name)
+        pixmaps[name] = QPixmap(path).scaled(100, 145, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return pixmaps
+
+
+def load_async(app, directory, cache_dir):
+    """Returns (seconds the GUI thread was blocked in load(), seconds until every image was ready)."""
+    images = card_images.CardImages(directory, cache_dir)
+    start = time.perf_counter()
+    images.load()
+    blocked = time.perf_counter() - start
+    while not images.is_ready():
+        app.processEvents()
+    ready = time.perf_counter() - start
+    images.pool.waitForDone()
+    return blocked, ready
+
+
+def main():
+    app = QApplication([])
+    work_dir = tempfile.mkdtemp()
+    try:
+        directory = card_images.CARD_DIR
+        if not os.path.isdir(directory):
+            directory = os.path.join(work_dir, "cards")
+            os.makedirs(directory)
+            make_stand_in_cards(directory)
+            print(f"{card_images.CARD_DIR}/ not found; using generated stand-in images")
+        cache_dir = os.path.join(work_dir, "cache")
+
+        start = time.perf_counter()
+        load_sync(directory)
+        print(f"sync (before):  GUI thread blocked {(time.perf_counter() - start) * 1000:8.1f} ms")
+        blocked, ready = load_async(app, directory, cache_dir)
+        print(f"cold cache:     GUI thread blocked {blocked * 1000:8.1f} ms, all images ready after {ready * 1000:8.1f} ms")
+        blocked, ready = load_async(app, directory, cache_dir)
+        print(f"warm cache:     GUI thread blocked {blocked * 1000:8.1f} ms, all images ready after {ready * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
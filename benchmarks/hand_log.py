@@ -0,0 +1,96 @@
+"""
+Hand log overhead and query speed:
+- object simulator (simulate.run_shard) with and without --log
+- vectorized simulator (vector_engine.run_vectorized) with and without --log
+- the reader's aggregate queries over the vectorized run's log
+
+Runs with and without logging go back to back in --repeats pairs, and the
+overhead is the median of the pairs' time ratios, so background load that
+comes and goes hits both sides of a pair alike. Each overhead is shown next
+to OVERHEAD_TARGET. On a busy machine single pairs still swing by several
+percent, so raise --repeats before reading much into one run.
+
+Usage:
+    python -m benchmarks.hand_log --rounds 200000 --vector-rounds 5000000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import hand_log
+import simulate
+import vector_engine
+
+
+OVERHEAD_TARGET = 5.0  # percent of the run time without a log
+
+
+def best_of(repeats, run):
+    """Fastest of several runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(title, rounds, repeats, run_plain, run_logged):
+    plain = logged = float('inf')
+    ratios = []
+    for repeat in range(repeats):
+        # Back to back, alternating which goes first, so each pair sees the same machine load
+        if repeat % 2:
+            logged_time = best_of(1, run_logged)
+            plain_time = best_of(1, run_plain)
+        else:
+            plain_time = best_of(1, run_plain)
+            logged_time = best_of(1, run_logged)
+        plain = min(plain, plain_time)
+        logged = min(logged, logged_time)
+        ratios.append(logged_time / plain_time)
+    overhead = (statistics.median(ratios) - 1) * 100
+    print(f"{title:<8} {rounds / plain:12,.0f} rounds/sec without log  {rounds / logged:12,.0f} with log  "
+          f"overhead {overhead:5.1f}%  target {OVERHEAD_TARGET:.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hand log benchmark")
+    parser.add_argument('--rounds', type=int, default=50_000, help="rounds for the object simulator")
+    parser.add_argument('--vector-rounds', type=int, default=1_000_000, help="rounds for the vectorized simulator")
+    parser.add_argument('--repeats', type=int, default=9)
+    args = parser.parse_args()
+
+    policy = simulate.StandOnPolicy()
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "hands.bjl")
+
+        def logged_objects():
+            simulate.run_shard(args.rounds, policy, 0, log_path=path)
+            os.remove(path)
+
+        compare("objects", args.rounds, args.repeats,
+                lambda: simulate.run_shard(args.rounds, policy, 0), logged_objects)
+
+        def logged_vector():
+            if os.path.exists(path):
+                os.remove(path)
+            with hand_log.HandLogWriter(path) as log:
+                vector_engine.run_vectorized(args.vector_rounds, log=log)
+
+        compare("vector", args.vector_rounds, args.repeats,
+                lambda: vector_engine.run_vectorized(args.vector_rounds), logged_vector)
+
+        size = os.path.getsize(path)
+        log = hand_log.HandLog(path)
+        print(f"\nlog: {len(log):,} hands, {size / 2**20:,.1f} MiB ({size / len(log):.1f} bytes/hand)")
+        for name in ('win_rate_by_upcard', 'bust_rate_by_player_total', 'net_by_bet'):
+            seconds = best_of(args.repeats, getattr(log, name))
+            print(f"{name:<26} {seconds * 1000:9.1f} ms  {len(log) / seconds:14,.0f} hands/sec")
+        del log
+
+
+if __name__ == "__main__":
+    main()
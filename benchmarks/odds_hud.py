@@ -0,0 +1,89 @@
+"""
+Main-thread latency with the odds HUD on.
+
+Plays rounds in an offscreen BlackjackGUI with show_odds, driving it through
+the same handlers as the buttons (autoplay.Autoplay.step), and times every
+handler call: with the odds worked out on the HUD's worker thread, a click
+should cost well under one display frame however long the odds take. After
+each decision it can wait for the HUD to show the odds (--wait), which also
+measures how long they take to arrive; without it, decisions come back to back
+and most calculations are cancelled before they finish.
+
+Usage:
+    python -m benchmarks.odds_hud
+    python -m benchmarks.odds_hud --rounds 200 --decks 6 --wait
+"""
+import argparse
+import os
+import time
+
+import stats
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return "-"
+    p50, p99, top = (stats.percentile(values, fraction) * 1000 for fraction in (0.5, 0.99, 1.0))
+    return f"p50 {p50:7.2f}  p99 {p99:7.2f}  max {top:7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUI click latency with the odds HUD")
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--wait', action='store_true', help="wait for the odds after every decision")
+    parser.add_argument('--off', action='store_true', help="the same rounds without the HUD, for comparison")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import qInstallMessageHandler
+    from PySide6.QtWidgets import QApplication
+
+    import autoplay
+    import game_gui
+    import round_machine
+    import simulate
+
+    qInstallMessageHandler(lambda *message: None)
+    app = QApplication([])
+    window = game_gui.BlackjackGUI(args.decks, intro=False, seed=args.seed, show_odds=not args.off)
+    window.show()
+    while not window.startup_finished:
+        app.processEvents()
+    window.card_images.wait()
+    player = autoplay.Autoplay(window, simulate.StandOnPolicy(17, 10))
+    hud = window.odds_hud
+
+    handler_times = []
+    odds_times = []
+    start = time.perf_counter()
+    while player.rounds_played < args.rounds:
+        began = time.perf_counter()
+        if not player.step():
+            break
+        handler_times.append(time.perf_counter() - began)
+        app.processEvents()
+        if hud is not None and args.wait and window.round.state == round_machine.PLAYER_TURN:
+            began = time.perf_counter()
+            while hud.waiting:
+                # Sleeping as the idle event loop would leaves the CPU to the worker process
+                time.sleep(0.0005)
+                app.processEvents()
+            odds_times.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    if hud is not None:
+        hud.shutdown()
+
+    print(f"{player.rounds_played} rounds, {args.decks} deck(s), {elapsed:.1f}s; frame budget {window.frame_interval_ms} ms")
+    print(f"  click handlers      {percentiles(handler_times)}  ({len(handler_times)} calls)")
+    if args.wait and hud is not None:
+        print(f"  odds shown after    {percentiles(odds_times)}")
+    if hud is not None:
+        print(f"  odds requested {hud.requested}, computed {hud.computed}, from cache {hud.cache_hits}, "
+              f"cancelled {hud.cancelled}")
+
+
+if __name__ == "__main__":
+    main()
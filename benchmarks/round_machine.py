@@ -0,0 +1,63 @@
+"""
+Drives the round state machine headlessly for many rounds and reports the
+call-stack depth seen inside its signal handlers and the traced Python memory,
+both of which should stay flat however many rounds are played.
+
+Usage:
+    python -m benchmarks.round_machine --rounds 10000
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+import game_logic
+import round_machine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless round state machine soak")
+    parser.add_argument('--rounds', type=int, default=10_000)
+    parser.add_argument('--checkpoints', type=int, default=5)
+    args = parser.parse_args()
+
+    chips = game_logic.Chips()
+    machine = round_machine.RoundMachine(game_logic.Deck(random.Random(0)), chips)
+    max_depth = [0]
+
+    def record_depth(*_):
+        depth = 0
+        frame = sys._getframe()
+        while frame is not None:
+            depth += 1
+            frame = frame.f_back
+        max_depth[0] = max(max_depth[0], depth)
+
+    machine.round_settled.connect(record_depth)
+    machine.hands_changed.connect(record_depth)
+
+    tracemalloc.start()
+    step = max(args.rounds // args.checkpoints, 1)
+    start = time.perf_counter()
+    for i in range(1, args.rounds + 1):
+        # Keep the bankroll topped up so the soak never reaches game over
+        chips.total = max(chips.total, 100)
+        machine.place_bet(10)
+        while machine.state not in (round_machine.BETTING, round_machine.GAME_OVER):
+            if machine.pending_ace is not None:
+                machine.choose_ace(11 if machine.player_hand.value <= 10 else 1)
+            elif machine.player_hand.value < 17:
+                machine.hit()
+            else:
+                machine.stand()
+        if i % step == 0:
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"{i:>9} rounds  {i / (time.perf_counter() - start):9,.0f} rounds/sec  "
+                  f"max stack depth {max_depth[0]:>3}  traced memory {current / 1024:8.1f} KiB (peak {peak / 1024:8.1f} KiB)")
+            max_depth[0] = 0
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Load generator for table_server.py: opens many connections, seats them at
+tables and plays rounds (bet, then hit below 17 and stand) as fast as the
+server answers, then reports action latency percentiles and throughput.
+
+By default the server is started in a subprocess on a free port so the client
+and server do not share a CPU core's event loop; --connect targets a server
+that is already running.
+
+Usage:
+    python -m benchmarks.server_load --connections 2000 --duration 20
+    python -m benchmarks.server_load --connect 127.0.0.1:8765 --connections 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from stats import percentile
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.rounds = 0
+        self.errors = 0
+        self.connected = 0
+
+
+async def request(reader, writer, stats, message):
+    """Sends one request and waits for its response, recording the round trip."""
+    start = time.perf_counter()
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+    line = await reader.readline()
+    stats.latencies.append(time.perf_counter() - start)
+    if not line:
+        raise ConnectionError("server closed the connection")
+    response = json.loads(line)
+    if not response['ok']:
+        stats.errors += 1
+    return response
+
+
+async def player(host, port, table, stop_at, stats, connect_limit):
+    async with connect_limit:
+        reader, writer = await asyncio.open_connection(host, port)
+    stats.connected += 1
+    try:
+        await request(reader, writer, stats, {'op': 'join', 'table': table})
+        while time.perf_counter() < stop_at:
+            response = await request(reader, writer, stats, {'op': 'bet', 'amount': 1})
+            if not response['ok']:
+                # Broke, or the table was closed: take a seat again
+                await request(reader, writer, stats, {'op': 'leave'})
+                await request(reader, writer, stats, {'op': 'join', 'table': table})
+                continue
+            while response.get('state') == 'player_turn':
+                op = 'hit' if response['player_value'] < 17 else 'stand'
+                response = await request(reader, writer, stats, {'op': op})
+            stats.rounds += 1
+    finally:
+        writer.close()
+
+
+def start_server():
+    """Runs table_server.py on a free port in a subprocess; returns (process, port)."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen([sys.executable, os.path.join(root, "table_server.py"), '--port', '0'],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Listening on"):
+        process.kill()
+        raise RuntimeError(f"server did not start: {line!r}")
+    return process, int(line.rsplit(':', 1)[1])
+
+
+async def run(host, port, connections, seats, duration):
+    stats = Stats()
+    connect_limit = asyncio.Semaphore(256)  # open connections in waves so the listen backlog keeps up
+    stop_at = time.perf_counter() + duration
+    players = [player(host, port, f"load-{i // seats}", stop_at, stats, connect_limit) for i in range(connections)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*players, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failures = [result for result in results if isinstance(result, Exception)]
+    return stats, elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for table_server.py")
+    parser.add_argument('--connections', type=int, default=2000)
+    parser.add_argument('--seats', type=int, default=7, help="connections seated at each table")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds to keep playing")
+    parser.add_argument('--connect', metavar='HOST:PORT', help="use a running server instead of starting one")
+    args = parser.parse_args()
+
+    # Each connection needs a file descriptor on each side
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < args.connections + 64:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, args.connections + 64), hard))
+
+    process = None
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        port = int(port)
+    else:
+        process, port = start_server()
+        host = '127.0.0.1'
+    try:
+        stats, elapsed, failures = asyncio.run(run(host, port, args.connections, args.seats, args.duration))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    latencies = sorted(stats.latencies)
+    print(f"{stats.connected:,} of {args.connections:,} connections, {-(-args.connections // args.seats):,} tables, {elapsed:.1f}s")
+    print(f"actions: {len(latencies):,} ({len(latencies) / elapsed:,.0f}/sec), errors: {stats.errors:,}")
+    print(f"rounds:  {stats.rounds:,} ({stats.rounds / elapsed:,.0f}/sec)")
+    print(f"action latency: p50 {percentile(latencies, 0.50) * 1000:.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms  max {percentile(latencies, 1.0) * 1000:.2f} ms")
+    if failures:
+        print(f"{len(failures)} connections failed, e.g. {failures[0]!r}")
+
+
+if __name__ == "__main__":
+    main()
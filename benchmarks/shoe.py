@@ -0,0 +1,41 @@
+"""
+Long-running shoe soak: plays rounds from one persistent Shoe and reports
+throughput and peak resident memory at checkpoints, which should stay flat.
+
+Usage:
+    python -m benchmarks.shoe --rounds 10000000 --decks 6
+"""
+import argparse
+import random
+import resource
+import time
+
+import game_logic
+import simulate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shoe soak test")
+    parser.add_argument('--rounds', type=int, default=1_000_000)
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--penetration', type=float, default=0.75)
+    parser.add_argument('--checkpoints', type=int, default=10)
+    args = parser.parse_args()
+
+    shoe = game_logic.Shoe(args.decks, args.penetration, random.Random(0))
+    chips = game_logic.Chips()
+    policy = simulate.StandOnPolicy()
+    shuffles = 0
+    step = max(args.rounds // args.checkpoints, 1)
+    start = time.perf_counter()
+    for i in range(1, args.rounds + 1):
+        shuffles += shoe.new_round()
+        simulate.play_round(shoe, chips, policy)
+        if i % step == 0:
+            elapsed = time.perf_counter() - start
+            peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            print(f"{i:>12} rounds  {i / elapsed:10,.0f} rounds/sec  {shuffles:>9} shuffles  peak RSS {peak_kb / 1024:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Batched permutation generation (streams.ShuffleBuffer) against per-deck
+random.shuffle, for decks of 1-8 packs, and the effect on a simulation that
+deals a freshly shuffled single deck every round. Requires NumPy.
+
+Usage:
+    python -m benchmarks.shuffle
+    python -m benchmarks.shuffle --shuffles 100000 --batch 8192
+"""
+import argparse
+import time
+
+import game_logic
+import simulate
+import streams
+
+
+def time_shuffles(rng, cards, shuffles):
+    shuffle = rng.shuffle
+    start = time.perf_counter()
+    for _ in range(shuffles):
+        shuffle(cards)
+    return (time.perf_counter() - start) / shuffles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched vs per-deck shuffling")
+    parser.add_argument('--shuffles', type=int, default=50_000)
+    parser.add_argument('--batch', type=int, default=4096, help="permutations generated per refill")
+    parser.add_argument('--rounds', type=int, default=200_000, help="rounds for the simulation comparison")
+    args = parser.parse_args()
+
+    root = streams.Stream(0)
+    print(f"{'packs':>5}  {'random.shuffle':>14}  {'ShuffleBuffer':>13}  speedup")
+    for decks in (1, 2, 6, 8):
+        cards = list(game_logic.CARDS) * decks
+        per_deck = time_shuffles(root.split('deck', decks), cards, args.shuffles)
+        batched = time_shuffles(streams.ShuffleBuffer(len(cards), root.split('buffer', decks), args.batch), cards, args.shuffles)
+        print(f"{decks:>5}  {per_deck * 1e6:11.2f} us  {batched * 1e6:10.2f} us  x{per_deck / batched:.2f}")
+
+    rates = []
+    for batch_shuffle in (False, True):
+        results = simulate.run_simulation(args.rounds, 1, seed=0, batch_shuffle=batch_shuffle)
+        rates.append(results['rounds_per_sec'])
+    print(f"single-deck rounds: {rates[0]:,.0f}/s with random.shuffle, {rates[1]:,.0f}/s batched (x{rates[1] / rates[0]:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Benchmark suite for the engine and GUI hot paths, with stored baselines.
+
+Each case reports the best time per operation (in microseconds) over several
+repeats and is compared with benchmarks/baselines.json; a case that is slower
+than its baseline by more than the threshold (1.5x unless the baseline file
+says otherwise) is a regression and makes the run exit with status 1.
+
+Repeats are kept short (tens of milliseconds), run round-robin across the
+cases so each case is sampled throughout the run, and only the fastest
+counts: a repeat that is preempted, or lands in a stretch where a shared or
+throttled CPU runs slower, does not skew the result.
+
+Logic cases: Deck() construction, shuffle, deal, Hand.deal_cards and a full
+scripted round (simulate.play_round). GUI cases run under Qt's offscreen
+platform with every dialog auto-answered: BlackjackGUI.update_card_images,
+FlowLayout.doLayout and start_new_round.
+
+Usage:
+    python -m benchmarks.suite                  # run, compare, print a table
+    python -m benchmarks.suite --json out.json  # also write the results as JSON
+    python -m benchmarks.suite --update         # store this machine's results as the baselines
+    python -m benchmarks.suite --cases deal,round --repeats 10
+
+Baselines are machine-specific: regenerate them with --update on the machine
+that runs the comparison.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import game_logic
+import simulate
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_THRESHOLD = 1.5
+
+
+# --- Logic cases ---
+# Each case takes an iteration count, runs the operation that many times and
+# returns (seconds spent in the measured part, operations performed).
+
+def bench_deck_construct(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        game_logic.Deck()
+    return time.perf_counter() - start, n
+
+
+def bench_deck_shuffle(n):
+    deck = game_logic.Deck(random.Random(0))
+    start = time.perf_counter()
+    for _ in range(n):
+        deck.shuffle()
+    return time.perf_counter() - start, n
+
+
+def bench_deal(n):
+    deck = game_logic.Deck(random.Random(0))
+    elapsed = 0.0
+    for _ in range(n):
+        deck.deck[:] = game_logic.CARDS
+        start = time.perf_counter()
+        for _ in range(52):
+            deck.deal()
+        elapsed += time.perf_counter() - start
+    return elapsed, n * 52
+
+
+def bench_hand_deal_cards(n):
+    # A fixed five-card hand with an Ace so both Ace branches are exercised
+    cards = [game_logic.Card('Hearts', rank) for rank in ('Ace', 'Five', 'Ace', 'Two', 'King')]
+    start = time.perf_counter()
+    for _ in range(n):
+        hand = game_logic.Hand()
+        for card in cards:
+            hand.deal_cards(card)
+    return time.perf_counter() - start, n * len(cards)
+
+
+def bench_round(n):
+    deck = game_logic.Deck(random.Random(0))
+    chips = game_logic.Chips()
+    policy = simulate.StandOnPolicy()
+    start = time.perf_counter()
+    for _ in range(n):
+        deck.new_round()
+        simulate.play_round(deck, chips, policy)
+    return time.perf_counter() - start, n
+
+
+# --- GUI cases ---
+
+class GuiHarness:
+    """An offscreen BlackjackGUI with its dialogs auto-answered and card images loaded."""
+
+    def __init__(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide6.QtCore import QCoreApplication, QEvent, qInstallMessageHandler
+        from PySide6.QtWidgets import QApplication, QMessageBox
+
+        import game_gui
+
+        # Missing icon files and the offscreen platform make Qt warn on every dialog
+        qInstallMessageHandler(lambda *message: None)
+        # Answer any modal box that blocks in exec() with Ok
+        QMessageBox.exec = lambda box: QMessageBox.Ok
+        self.app = QApplication.instance() or QApplication([])
+        self.QMessageBox = QMessageBox
+        self.flush_deletes = lambda: QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        self.window = game_gui.BlackjackGUI()
+        self.window.round.deck = game_logic.Deck(random.Random(0))
+        self.window.show()
+        # The first paint schedules finish_startup, which starts the image loads and opens the intro dialog
+        while not self.window.startup_finished:
+            self.app.processEvents()
+        self.window.card_images.wait()
+        self.close_dialogs()
+
+    def close_dialogs(self):
+        """Answers the non-blocking message boxes the window has opened."""
+        for widget in self.app.topLevelWidgets():
+            if isinstance(widget, self.QMessageBox) and widget.isVisible():
+                widget.done(0)
+        self.app.processEvents()
+        self.flush_deletes()
+
+    def finish_round(self):
+        """Plays the current round to the end with the simulator's stand-on-17 rule."""
+        machine = self.window.round
+        while machine.state not in ('betting', 'game_over'):
+            if machine.pending_ace is not None:
+                machine.choose_ace(11 if machine.player_hand.value <= 10 else 1)
+            elif machine.player_hand.value < 17:
+                machine.hit()
+            else:
+                machine.stand()
+        self.window.player_chips.total = max(self.window.player_chips.total, 100)
+        self.close_dialogs()
+
+
+_gui = None
+
+
+def gui():
+    global _gui
+    if _gui is None:
+        _gui = GuiHarness()
+    return _gui
+
+
+def bench_update_card_images(n):
+    harness = gui()
+    window = harness.window
+    window.bet_input.setValue(10)
+    window.start_new_round()
+    harness.close_dialogs()
+    start = time.perf_counter()
+    for _ in range(n):
+        window.update_card_images()
+        # Replaced labels are deleted on the next event loop pass; count that too
+        harness.flush_deletes()
+    elapsed = time.perf_counter() - start
+    harness.finish_round()
+    return elapsed, n
+
+
+def bench_flow_layout(n):
+    from PySide6.QtCore import QRect
+    from PySide6.QtWidgets import QLabel, QWidget
+
+    import game_gui
+
+    gui()  # the QApplication has to exist before any widget
+    container = QWidget()
+    layout = game_gui.FlowLayout(container)
+    for _ in range(12):
+        label = QLabel()
+        label.setFixedSize(100, 145)
+        layout.addWidget(label)
+    rect = QRect(0, 0, 450, 600)  # wraps the 12 cards onto three lines
+    start = time.perf_counter()
+    for _ in range(n):
+        layout.doLayout(rect, False)
+    return time.perf_counter() - start, n
+
+
+def bench_start_new_round(n):
+    harness = gui()
+    window = harness.window
+    window.bet_input.setValue(10)
+    elapsed = 0.0
+    for _ in range(n):
+        start = time.perf_counter()
+        window.start_new_round()
+        # A card rebuild coalesced onto the next frame is still part of the deal's cost
+        if window.card_update_timer.isActive():
+            window.card_update_timer.stop()
+            window.update_card_images()
+        elapsed += time.perf_counter() - start
+        harness.finish_round()
+    return elapsed, n
+
+
+# name -> (function, iterations per repeat)
+CASES = {
+    'deck_construct': (bench_deck_construct, 20_000),
+    'deck_shuffle': (bench_deck_shuffle, 1_000),
+    'deal': (bench_deal, 1_000),
+    'hand_deal_cards': (bench_hand_deal_cards, 10_000),
+    'round': (bench_round, 1_000),
+    'gui_update_card_images': (bench_update_card_images, 50),
+    'gui_flow_layout': (bench_flow_layout, 300),
+    'gui_start_new_round': (bench_start_new_round, 20),
+}
+
+
+def run_cases(names, repeats, scale=1.0):
+    """{name: best microseconds per operation}, taking one repeat of every case per pass."""
+    best = dict.fromkeys(names, float('inf'))
+    for _ in range(repeats):
+        for name in names:
+            function, iterations = CASES[name]
+            elapsed, ops = function(max(int(iterations * scale), 1))
+            best[name] = min(best[name], elapsed / ops)
+    return {name: seconds * 1e6 for name, seconds in best.items()}
+
+
+def load_baselines(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'threshold': DEFAULT_THRESHOLD, 'cases': {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine and GUI benchmark suite")
+    parser.add_argument('--cases', help=f"comma-separated subset of: {', '.join(CASES)}")
+    parser.add_argument('--repeats', type=int, default=25)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply every case's iteration count")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, help="allowed slowdown ratio (default: from the baseline file)")
+    parser.add_argument('--json', metavar='PATH', help="write the results as JSON ('-' for stdout)")
+    parser.add_argument('--update', action='store_true', help="store these results as the new baselines")
+    args = parser.parse_args()
+
+    names = args.cases.split(',') if args.cases else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    baselines = load_baselines(args.baseline)
+    threshold = args.threshold or baselines.get('threshold', DEFAULT_THRESHOLD)
+    log = sys.stderr if args.json == '-' else sys.stdout
+    results = {}
+    regressions = []
+    for name, us in run_cases(names, args.repeats, args.scale).items():
+        baseline = baselines['cases'].get(name, {}).get('us_per_op')
+        ratio = us / baseline if baseline else None
+        status = 'new' if ratio is None else 'regression' if ratio > threshold else 'ok'
+        if status == 'regression':
+            regressions.append(name)
+        results[name] = {'us_per_op': round(us, 4), 'baseline_us_per_op': baseline,
+                         'ratio': None if ratio is None else round(ratio, 3), 'status': status}
+        compared = f"{baseline:10.3f}  x{ratio:5.2f}" if ratio is not None else f"{'-':>10}  {'':>6}"
+        print(f"{name:<24} {us:10.3f} us/op  baseline {compared}  {status}", file=log)
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'threshold': threshold,
+        'results': results,
+        'regressions': regressions,
+    }
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update:
+        baselines['threshold'] = threshold
+        for name, result in results.items():
+            baselines['cases'][name] = {'us_per_op': result['us_per_op']}
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"Baselines written to {args.baseline}", file=log)
+    elif regressions:
+        print(f"Regressions (more than {threshold}x slower than baseline): {', '.join(regressions)}", file=log)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Multi-seat table throughput: seat-rounds per second as the number of seats
+per table grows from 1 to 7, against the single-player simulator dealing from
+the same kind of shoe. Seats share the dealer's draw and the per-round shoe
+bookkeeping, so throughput per seat rises with the seat count until each
+seat's own hand dominates.
+
+Usage:
+    python -m benchmarks.table --tables 1000 --rounds 20
+"""
+import argparse
+import random
+import time
+
+import game_logic
+import simulate
+import table
+
+
+def single_player(rounds, policy, decks):
+    """Seat-rounds/sec for simulate.play_round on one shoe (the one-seat baseline)."""
+    shoe = game_logic.Shoe(decks, 0.75, random.Random(0))
+    chips = game_logic.Chips()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        shoe.new_round()
+        simulate.play_round(shoe, chips, policy)
+    return rounds / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-seat table throughput")
+    parser.add_argument('--tables', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=20, help="rounds per table")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    policy = simulate.StandOnPolicy()
+    # Every configuration is measured once per pass and the best pass is kept,
+    # so a stretch of slow CPU does not land on just one seat count
+    baseline = 0.0
+    best = dict.fromkeys(range(1, table.MAX_SEATS + 1), 0.0)
+    for repeat in range(args.repeats):
+        baseline = max(baseline, single_player(args.tables * args.rounds, policy, args.decks))
+        for seats in best:
+            tables = table.make_tables(args.tables, seats, policy, repeat, args.decks, bankroll=10**9)
+            best[seats] = max(best[seats], table.run_tables(tables, args.rounds)['rounds_per_sec'])
+
+    print(f"simulate.play_round       {baseline:12,.0f} seats/sec")
+    for seats, rate in best.items():
+        print(f"{args.tables} tables x {seats} seats  {rate:12,.0f} seats/sec  (x{rate / baseline:.2f})")
+
+
+if __name__ == "__main__":
+    main()
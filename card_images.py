@@ -0,0 +1,205 @@
+"""
+Card image loading for the GUI.
+
+Card PNGs are decoded and scaled on a worker pool instead of the GUI thread.
+Once every image is ready, the scaled copies are written to disk as a single
+raw atlas file, keyed by the source files' modification times and the target
+size, so the next start reads one file and decodes nothing.
+"""
+import os
+import struct
+
+from PySide6.QtCore import QObject, QRect, QRunnable, QThreadPool, Qt, Signal
+from PySide6.QtGui import QColor, QImage, QPainter, QPixmap
+
+import tracing
+
+
+CARD_WIDTH = 100
+CARD_HEIGHT = 145
+CARD_DIR = "PNG-cards"
+CACHE_DIR = ".card_cache"
+
+RANK_KEYS = {
+    'Two': '2', 'Three': '3', 'Four': '4', 'Five': '5', 'Six': '6',
+    'Seven': '7', 'Eight': '8', 'Nine': '9', 'Ten': '10',
+    'Jack': 'jack', 'Queen': 'queen', 'King': 'king', 'Ace': 'ace'
+}
+SUIT_KEYS = ['hearts', 'diamonds', 'spades', 'clubs']
+
+# Image name -> source file name; the card back is loaded first since every deal shows it
+SOURCE_FILES = {"back": "card back black.png"}
+SOURCE_FILES.update({f"{rank}_of_{suit}": f"{rank}_of_{suit}.png" for suit in SUIT_KEYS for rank in RANK_KEYS.values()})
+
+ATLAS_MAGIC = b'BJCA'
+ATLAS_VERSION = 1
+ATLAS_HEADER = struct.Struct('<4sH20sHHH')  # magic, version, key, width, height, count
+ATLAS_FORMAT = QImage.Format_ARGB32_Premultiplied
+
+
+def card_name(card):
+    """Image name for a game_logic.Card, e.g. 'queen_of_hearts'."""
+    return f"{RANK_KEYS[card.rank]}_of_{card.suit.lower()}"
+
+
+class _LoadImage(QRunnable):
+    """Decodes and scales one card image on a pool thread."""
+
+    def __init__(self, loader, name, path, size):
+        super().__init__()
+        # Kept alive by CardImages so it can still be re-queued with a higher priority
+        self.setAutoDelete(False)
+        self.loader = loader
+        self.name = name
+        self.path = path
+        self.size = size
+
+    def run(self):
+        with tracing.span("load_image", image=self.name):
+            image = QImage(self.path)
+            if not image.isNull():
+                image = image.scaled(*self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation).convertToFormat(ATLAS_FORMAT)
+        self.loader._loaded.emit(self.name, image)
+
+
+class _WriteFile(QRunnable):
+    """Writes bytes to a file atomically on a pool thread."""
+
+    def __init__(self, path, data):
+        super().__init__()
+        self.path = path
+        self.data = data
+
+    def run(self):
+        with tracing.span("write_atlas_file", bytes=len(self.data)):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(self.data)
+            os.replace(tmp_path, self.path)
+
+
+class CardImages(QObject):
+    """
+    Scaled card pixmaps, filled in as they become available.
+    - load(): reads the atlas if it is current, otherwise queues every image on the pool
+    - prioritize(names): moves still-queued images to the front of the queue
+    - pixmap(name): the image, or a placeholder until it has loaded
+    image_ready is emitted (on the GUI thread) for each image as it arrives, and
+    all_ready once every image is available.
+    """
+    image_ready = Signal(str)
+    all_ready = Signal()
+    _loaded = Signal(str, QImage)
+
+    def __init__(self, directory=CARD_DIR, cache_dir=CACHE_DIR, size=(CARD_WIDTH, CARD_HEIGHT), parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.size = size
+        self.atlas_path = os.path.join(cache_dir, f"cards_{size[0]}x{size[1]}.atlas")
+        self.pixmaps = {}
+        self.placeholder = QPixmap(*size)
+        self.placeholder.fill(QColor("darkgreen"))
+        self.pool = QThreadPool(self)
+        self._pending = {}
+        self._images = {}
+        self._key = b''
+        self._loaded.connect(self._on_loaded)
+
+    def load(self):
+        """Returns True if every image came from the on-disk atlas."""
+        self._key = self._cache_key()
+        with tracing.span("read_atlas"):
+            from_atlas = self._read_atlas()
+        if from_atlas:
+            self.all_ready.emit()
+            return True
+        for name, file_name in SOURCE_FILES.items():
+            runnable = _LoadImage(self, name, os.path.join(self.directory, file_name), self.size)
+            self._pending[name] = runnable
+            self.pool.start(runnable)
+        return False
+
+    def prioritize(self, names):
+        for name in names:
+            runnable = self._pending.get(name)
+            if runnable is not None and self.pool.tryTake(runnable):
+                self.pool.start(runnable, 1)
+
+    def pixmap(self, name):
+        return self.pixmaps.get(name, self.placeholder)
+
+    def is_ready(self):
+        return len(self.pixmaps) == len(SOURCE_FILES)
+
+    def wait(self):
+        """Blocks until every queued image has been decoded (the pixmaps arrive via the event loop)."""
+        self.pool.waitForDone()
+
+    def _cache_key(self):
+        # hashlib is only needed once the images load, after the window is up
+        import hashlib
+        digest = hashlib.sha1(f"{self.size[0]}x{self.size[1]}".encode())
+        for name, file_name in SOURCE_FILES.items():
+            try:
+                stat = os.stat(os.path.join(self.directory, file_name))
+                digest.update(f"{name}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+            except OSError:
+                digest.update(f"{name}:missing;".encode())
+        return digest.digest()
+
+    def _read_atlas(self):
+        try:
+            with open(self.atlas_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return False
+        if len(data) < ATLAS_HEADER.size:
+            return False
+        magic, version, key, width, height, count = ATLAS_HEADER.unpack_from(data)
+        if (magic, version, key, count) != (ATLAS_MAGIC, ATLAS_VERSION, self._key, len(SOURCE_FILES)):
+            return False
+        sizes_offset = ATLAS_HEADER.size
+        sizes = struct.unpack_from(f'<{2 * count}H', data, sizes_offset)
+        pixels_offset = sizes_offset + 4 * count
+        stride = width * count * 4
+        if len(data) != pixels_offset + stride * height:
+            return False
+        atlas = QImage(data[pixels_offset:], width * count, height, stride, ATLAS_FORMAT)
+        for i, name in enumerate(SOURCE_FILES):
+            w, h = sizes[2 * i], sizes[2 * i + 1]
+            image = atlas.copy(QRect(i * width, 0, w, h)) if w and h else QImage()
+            self.pixmaps[name] = QPixmap.fromImage(image)
+        return True
+
+    def _write_atlas(self):
+        width, height = self.size
+        count = len(SOURCE_FILES)
+        atlas = QImage(width * count, height, ATLAS_FORMAT)
+        atlas.fill(0)
+        sizes = []
+        painter = QPainter(atlas)
+        for i, name in enumerate(SOURCE_FILES):
+            image = self._images[name]
+            sizes += [image.width(), image.height()]
+            if not image.isNull():
+                painter.drawImage(i * width, 0, image)
+        painter.end()
+        header = ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, self._key, width, height, count)
+        pixels = bytes(atlas.constBits())[:atlas.bytesPerLine() * height]
+        self.pool.start(_WriteFile(self.atlas_path, header + struct.pack(f'<{2 * count}H', *sizes) + pixels))
+
+    def _on_loaded(self, name, image):
+        self._pending.pop(name, None)
+        self._images[name] = image
+        self.pixmaps[name] = QPixmap.fromImage(image)
+        # Finish the bookkeeping before emitting: receivers may process events
+        # and deliver the remaining images re-entrantly
+        finished = not self._pending
+        if finished:
+            with tracing.span("build_atlas"):
+                self._write_atlas()
+            self._images.clear()
+        self.image_ready.emit(name)
+        if finished:
+            self.all_ready.emit()
@@ -0,0 +1,222 @@
+"""
+Policy comparison with variance reduction.
+
+Comparing policies on independently shuffled decks spends most of the rounds
+on noise: the difference between two policies is far smaller than the spread
+of a single round. Each round here starts from a freshly shuffled deck of
+decks * 52 cards, and the modes control how those decks are chosen:
+- common random numbers (crn): every policy plays the same shuffled deck in
+  a round, so the difference is measured on identical cards
+- antithetic: each deck is also played mirrored (Two <-> Ace, Three <-> King, ...
+  Eight stays), which keeps the deck's composition but swaps low cards for
+  high ones; the round's result is the average of the pair
+- stratified: rounds cycle through the 13 dealer upcard ranks, so each upcard
+  is dealt exactly its share of the time instead of a random share
+
+Without crn, each policy plays its own deck sequence. Every mode gives an
+unbiased estimate of each policy's mean and of each difference from the first
+policy; the report prints the 95% interval of the difference and how many
+times fewer rounds each mode needs for the same interval as independent decks.
+Decks come from streams.Stream splits of the run's seed, so a run can be
+reproduced exactly.
+
+Usage:
+    python compare.py --stand-on 17 16 --rounds 200000
+    python compare.py --stand-on 17 16 15 --modes crn combined --workers 8
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import game_logic
+import simulate
+import streams
+
+
+# Mode name: (crn, antithetic, stratified)
+MODES = {
+    'independent': (False, False, False),
+    'crn': (True, False, False),
+    'antithetic': (True, True, False),
+    'stratified': (True, False, True),
+    'combined': (True, True, True),
+}
+
+RANKS = len(game_logic.ranks)
+# Per card code, the same suit's card of the mirrored rank
+MIRROR = tuple(game_logic.Card(card.suit, game_logic.ranks[RANKS - 1 - game_logic.ranks.index(card.rank)])
+               for card in game_logic.CARDS)
+# Index of the dealer's upcard in the dealing order (player, player, dealer, dealer)
+UPCARD_POSITION = 2
+
+
+class ReplayDeck:
+    """
+    Deals a fixed card order from the start, as many times as replay() is called;
+    with mirror, every card is swapped for MIRROR[card.code] as it is dealt.
+    """
+    def __init__(self, cards, mirror=None):
+        self.cards = cards
+        self.mirror = mirror
+        self.position = 0
+        self.counter = None
+
+    def replay(self, mirror=None):
+        self.position = 0
+        self.mirror = mirror
+
+    def deal(self):
+        card = self.cards[self.position]
+        self.position += 1
+        return card if self.mirror is None else self.mirror[card.code]
+
+
+class DeckSource:
+    """
+    Shuffled card orders from one generator: next_order(stratum) returns a
+    uniformly shuffled order or, for a stratum (a rank index), one that is
+    uniform given that the dealer's upcard has that rank.
+    """
+    def __init__(self, rng, decks):
+        self.rng = rng
+        self.cards = list(game_logic.CARDS) * decks
+        # Per rank: one card of that rank held out as the upcard, and the rest of the deck
+        self.upcards = [game_logic.CARDS[rank] for rank in range(RANKS)]
+        self.rests = []
+        for up in self.upcards:
+            rest = list(self.cards)
+            rest.remove(up)
+            self.rests.append(rest)
+
+    def next_order(self, stratum=None):
+        if stratum is None:
+            self.rng.shuffle(self.cards)
+            return self.cards
+        rest = self.rests[stratum]
+        self.rng.shuffle(rest)
+        return rest[:UPCARD_POSITION] + [self.upcards[stratum]] + rest[UPCARD_POSITION:]
+
+
+def run_compare_shard(rounds, policies, seed, decks, mode):
+    """
+    Plays rounds samples of every policy under mode, with decks from the
+    shard's stream (seed is a streams.Stream or a root key).
+    Returns {stratum: [samples, [sum, sum of squares] per policy,
+    [sum, sum of squares] of the difference from policies[0] per other policy]},
+    with results in units of each policy's bet.
+    """
+    crn, antithetic, stratified = MODES[mode]
+    rng = streams.stream(seed)
+    sources = ([DeckSource(rng.split('deck'), decks)] if crn else
+               [DeckSource(rng.split('deck', i), decks) for i in range(len(policies))])
+    chips = game_logic.Chips()
+    play_round = simulate.play_round
+    strata = {}
+    for j in range(rounds):
+        stratum = j % RANKS if stratified else 0
+        orders = [source.next_order(stratum if stratified else None) for source in sources]
+        samples = []
+        for i, policy in enumerate(policies):
+            deck = ReplayDeck(orders[0] if crn else orders[i])
+            _, net = play_round(deck, chips, policy)
+            units = net / chips.bet
+            if antithetic:
+                deck.replay(MIRROR)
+                _, net = play_round(deck, chips, policy)
+                units = (units + net / chips.bet) / 2
+            samples.append(units)
+        tally = strata.get(stratum)
+        if tally is None:
+            tally = strata[stratum] = [0, [[0.0, 0.0] for _ in policies], [[0.0, 0.0] for _ in policies[1:]]]
+        tally[0] += 1
+        for sums, x in zip(tally[1], samples):
+            sums[0] += x
+            sums[1] += x * x
+        for sums, x in zip(tally[2], samples[1:]):
+            d = x - samples[0]
+            sums[0] += d
+            sums[1] += d * d
+    return strata
+
+
+def _run_compare_shard_args(args):
+    return run_compare_shard(*args)
+
+
+def stratified_estimate(strata, weight, index, which):
+    """Mean and half-width of the 95% interval of one quantity, combined across strata with equal weights."""
+    mean = variance = 0.0
+    for n, policies, differences in strata.values():
+        total, squares = (policies if which == 'policy' else differences)[index]
+        stratum_mean = total / n
+        stratum_variance = (squares - n * stratum_mean ** 2) / (n - 1) if n > 1 else float('inf')
+        mean += weight * stratum_mean
+        variance += weight * weight * max(stratum_variance, 0.0) / n
+    return mean, 1.96 * math.sqrt(variance)
+
+
+def run_comparison(rounds, policies, mode='crn', workers=None, seed=0, decks=1):
+    """
+    Splits the rounds across a process pool as simulate.run_simulation does.
+    Returns {'means': [(mean, half-width)] per policy, 'differences': [(mean, half-width)]
+    for policies[1:] minus policies[0], 'rounds' (samples), 'rounds_played' (per policy,
+    antithetic pairs counting twice), 'seconds'}.
+    """
+    workers = workers or os.cpu_count() or 1
+    shard_sizes = [rounds // workers + (1 if i < rounds % workers else 0) for i in range(workers)]
+    root = streams.stream(seed)
+    jobs = [(size, policies, root.split(shard), decks, mode) for shard, size in enumerate(shard_sizes) if size]
+
+    start = time.perf_counter()
+    if workers == 1:
+        shards = [_run_compare_shard_args(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_run_compare_shard_args, jobs))
+    elapsed = time.perf_counter() - start
+
+    merged = {}
+    for shard in shards:
+        for stratum, (n, policy_sums, difference_sums) in shard.items():
+            tally = merged.setdefault(stratum, [0, [[0.0, 0.0] for _ in policies], [[0.0, 0.0] for _ in policies[1:]]])
+            tally[0] += n
+            for target, sums in zip(tally[1] + tally[2], policy_sums + difference_sums):
+                target[0] += sums[0]
+                target[1] += sums[1]
+    weight = 1 / len(merged)
+    return {'means': [stratified_estimate(merged, weight, i, 'policy') for i in range(len(policies))],
+            'differences': [stratified_estimate(merged, weight, i, 'difference') for i in range(len(policies) - 1)],
+            'rounds': rounds, 'rounds_played': rounds * (2 if MODES[mode][1] else 1), 'seconds': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare stand-on policies with variance reduction")
+    parser.add_argument('--stand-on', type=int, nargs='+', default=[17, 16], help="one policy per total; the first is the reference")
+    parser.add_argument('--rounds', type=int, default=200_000, help="samples per mode (an antithetic sample plays two rounds)")
+    parser.add_argument('--modes', nargs='+', choices=tuple(MODES), default=list(MODES))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--decks', type=int, default=1, help="decks shuffled together for each round")
+    args = parser.parse_args()
+
+    policies = [simulate.StandOnPolicy(total, 10) for total in args.stand_on]
+    # Variance per round played, for the first difference (or the first mean with one policy)
+    reference = None
+    for mode in args.modes:
+        results = run_comparison(args.rounds, policies, mode, args.workers, args.seed, args.decks)
+        print(f"{mode}: {results['rounds_played']:,} rounds per policy in {results['seconds']:.2f}s")
+        for total, (mean, half_width) in zip(args.stand_on, results['means']):
+            print(f"  stand on {total:>2}:        {mean:+.4f} +/- {half_width:.4f} units/round")
+        for total, (mean, half_width) in zip(args.stand_on[1:], results['differences']):
+            print(f"  {total:>2} minus {args.stand_on[0]:>2}:       {mean:+.4f} +/- {half_width:.4f}")
+        half_width = (results['differences'] or results['means'])[0][1]
+        per_round = half_width ** 2 * results['rounds_played']
+        reference = reference or per_round
+        print(f"  interval x{half_width * math.sqrt(results['rounds_played']):.3f} / sqrt(rounds); "
+              f"same interval in x{reference / per_round if per_round else float('inf'):.2f} fewer rounds than {args.modes[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Card counting: running and true counts kept up to date as cards are dealt,
+and player advantage by true count.
+
+A CardCounter is attached to a Deck or Shoe with attach(); the deck then
+calls counter.see(card) from deal() and counter.reset() from shuffle(), so
+the GUI, the terminal game and the simulators all count the same cards the
+same way. Each dealt card adds its tag to every tracked system's running count,
+which is O(1) per card; true counts divide by the decks still to be dealt.
+
+Counting systems (tags per card value 2..11):
+- hi_lo: 2-6 +1, 7-9 0, tens and Aces -1 (balanced)
+- ko: as Hi-Lo but 7 is +1; unbalanced, starting at 4 - 4 * decks
+- omega_ii: 2, 3, 7 +1; 4-6 +2; 8 and Aces 0; 9 -1; tens -2 (balanced, level 2)
+
+The command line plays rounds across a process pool, bins every round by the
+count at the time of the bet (true count for balanced systems, running count
+for unbalanced ones) and prints the player's advantage in each bin with a 95%
+confidence interval.
+
+Usage:
+    python counting.py --rounds 10000000 --decks 6 --system hi_lo
+    python counting.py --rounds 2000000 --system ko --stand-on 16 --json ko.json
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import game_logic
+import simulate
+import streams
+
+
+class CountingSystem:
+    """
+    A point-count system: tags holds the value added to the running count for
+    each card value 2..11 (index = value - 2, as in Shoe.counts).
+    An unbalanced system starts at initial_per_deck * decks + initial_offset
+    and is bet on its running count rather than a true count.
+    """
+    def __init__(self, name, tags, initial_per_deck=0, initial_offset=0):
+        self.name = name
+        self.tags = tags
+        self.initial_per_deck = initial_per_deck
+        self.initial_offset = initial_offset
+        self.balanced = sum(tags[:8]) * 4 + tags[8] * 16 + tags[9] * 4 == 0
+
+    def initial(self, decks):
+        return self.initial_per_deck * decks + self.initial_offset
+
+
+SYSTEMS = {
+    'hi_lo': CountingSystem("Hi-Lo", (1, 1, 1, 1, 1, 0, 0, 0, -1, -1)),
+    'ko': CountingSystem("KO", (1, 1, 1, 1, 1, 1, 0, 0, -1, -1), initial_per_deck=-4, initial_offset=4),
+    'omega_ii': CountingSystem("Omega II", (1, 1, 2, 2, 2, 1, 0, -1, -2, 0)),
+}
+
+
+class CardCounter:
+    """
+    Running counts for one or more systems over a deck of decks * 52 cards.
+    - running: running count per system, in the order of systems
+    - seen: cards dealt since the last shuffle
+    """
+    def __init__(self, decks=1, systems=('hi_lo',)):
+        for system in systems:
+            if system not in SYSTEMS:
+                raise ValueError(f"Unknown counting system {system!r}; choose from {', '.join(SYSTEMS)}.")
+        self.decks = decks
+        self.systems = tuple(systems)
+        self._index = {system: i for i, system in enumerate(self.systems)}
+        # Per card code, the tag for each system, so see() is one lookup and one add per system
+        self._tags = [tuple(SYSTEMS[system].tags[card.value - 2] for system in self.systems) for card in game_logic.CARDS]
+        # One system is the common case: skip the loop over systems
+        self._single = [tags[0] for tags in self._tags] if len(self.systems) == 1 else None
+        self.reset()
+
+    def reset(self):
+        self.seen = 0
+        self.running = [SYSTEMS[system].initial(self.decks) for system in self.systems]
+
+    def see(self, card):
+        self.seen += 1
+        if self._single is not None:
+            self.running[0] += self._single[card.code]
+        else:
+            running = self.running
+            for i, tag in enumerate(self._tags[card.code]):
+                running[i] += tag
+
+    def tag(self, card, system='hi_lo'):
+        """What card added to system's running count, e.g. to leave out a hole card that is still face down."""
+        return self._tags[card.code][self._index[system]]
+
+    def running_count(self, system='hi_lo'):
+        return self.running[self._index[system]]
+
+    def decks_remaining(self):
+        # At least a quarter deck, so true counts stay finite at the end of a deep shoe
+        return max(self.decks * 52 - self.seen, 13) / 52
+
+    def true_count(self, system='hi_lo'):
+        return self.running[self._index[system]] / self.decks_remaining()
+
+    def betting_count(self, system='hi_lo'):
+        """The count bets are keyed on: the true count, or the running count for an unbalanced system."""
+        if SYSTEMS[system].balanced:
+            return self.true_count(system)
+        return self.running_count(system)
+
+
+def attach(deck, systems=('hi_lo',)):
+    """Creates a CardCounter for a Deck or Shoe, hooks it into its deal path and returns it."""
+    counter = CardCounter(getattr(deck, 'decks', 1), systems)
+    # Cards already dealt since the last shuffle count too
+    # (matched by attribute and card code, so decks from game_logic run as a script work too)
+    if hasattr(deck, 'position'):
+        dealt = deck.cards[:deck.position]
+    else:
+        remaining = {card.code for card in deck.deck}
+        dealt = [card for card in game_logic.CARDS if card.code not in remaining]
+    for card in dealt:
+        counter.see(card)
+    deck.counter = counter
+    return counter
+
+
+# --- Advantage by count ---
+
+def run_ev_shard(rounds, policy, seed, decks, penetration, system):
+    """
+    Plays rounds from one Shoe with a counter attached.
+    Returns {count bin: [rounds, sum of net / bet, sum of (net / bet) ** 2]},
+    binned by the betting count (truncated toward zero) before each round is dealt.
+    """
+    shoe = game_logic.Shoe(decks, penetration, streams.stream(seed))
+    counter = attach(shoe, (system,))
+    chips = game_logic.Chips()
+    play_round = simulate.play_round
+    bins = {}
+    for _ in range(rounds):
+        shoe.new_round()
+        count = int(counter.betting_count(system))
+        _, net = play_round(shoe, chips, policy)
+        units = net / chips.bet
+        tally = bins.get(count)
+        if tally is None:
+            tally = bins[count] = [0, 0.0, 0.0]
+        tally[0] += 1
+        tally[1] += units
+        tally[2] += units * units
+    return bins
+
+
+def _run_ev_shard_args(args):
+    return run_ev_shard(*args)
+
+
+def run_ev_table(rounds, workers=None, policy=None, seed=0, decks=6, penetration=0.75, system='hi_lo'):
+    """
+    Splits the rounds across a process pool as simulate.run_simulation does and
+    merges the shards' bins.
+    Returns {'bins': {count: (rounds, advantage, half-width of the 95% interval)},
+    'rounds', 'seconds', 'rounds_per_sec'}; advantage is the mean net result per
+    unit bet.
+    """
+    workers = workers or os.cpu_count() or 1
+    policy = policy or simulate.StandOnPolicy()
+    shard_sizes = [rounds // workers + (1 if i < rounds % workers else 0) for i in range(workers)]
+    root = streams.Stream(seed)
+    jobs = [(size, policy, root.split(shard), decks, penetration, system)
+            for shard, size in enumerate(shard_sizes) if size]
+
+    start = time.perf_counter()
+    if workers == 1:
+        shards = [_run_ev_shard_args(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_run_ev_shard_args, jobs))
+    elapsed = time.perf_counter() - start
+
+    merged = {}
+    for shard in shards:
+        for count, (n, total, squares) in shard.items():
+            tally = merged.setdefault(count, [0, 0.0, 0.0])
+            tally[0] += n
+            tally[1] += total
+            tally[2] += squares
+    bins = {}
+    for count in sorted(merged):
+        n, total, squares = merged[count]
+        mean = total / n
+        variance = (squares - n * mean * mean) / (n - 1) if n > 1 else float('inf')
+        bins[count] = (n, mean, 1.96 * math.sqrt(max(variance, 0.0) / n))
+    return {'bins': bins, 'rounds': rounds, 'seconds': elapsed,
+            'rounds_per_sec': rounds / elapsed if elapsed else 0.0}
+
+
+def print_ev_table(results, system, min_rounds=1000):
+    name = SYSTEMS[system].name
+    kind = "true count" if SYSTEMS[system].balanced else "running count"
+    print(f"{name}: {results['rounds']:,} rounds in {results['seconds']:.2f}s ({results['rounds_per_sec']:,.0f} rounds/sec)")
+    print(f"  {kind:>13}  {'rounds':>12}  {'share':>7}  {'advantage':>9}  95% interval")
+    for count, (n, advantage, half_width) in results['bins'].items():
+        if n < min_rounds:
+            continue
+        print(f"  {count:>+13d}  {n:>12,}  {n / results['rounds']:7.2%}  {advantage:>+9.2%}  "
+              f"[{advantage - half_width:+.2%}, {advantage + half_width:+.2%}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Player advantage by card count")
+    parser.add_argument('--rounds', type=int, default=10_000_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--system', choices=tuple(SYSTEMS), default='hi_lo')
+    parser.add_argument('--stand-on', type=int, default=17, help="player stands at this total or higher")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--penetration', type=float, default=0.75)
+    parser.add_argument('--min-rounds', type=int, default=1000, help="hide counts seen fewer times than this")
+    parser.add_argument('--json', metavar='PATH', help="also write the table as JSON")
+    args = parser.parse_args()
+
+    policy = simulate.StandOnPolicy(args.stand_on, 10)
+    results = run_ev_table(args.rounds, args.workers, policy, args.seed, args.decks, args.penetration, args.system)
+    print_ev_table(results, args.system, args.min_rounds)
+    if args.json:
+        # A count seen once has no interval; JSON has no infinity, so it is written as null
+        bins = [{'count': count, 'rounds': n, 'advantage': advantage,
+                 'ci95': half_width if math.isfinite(half_width) else None}
+                for count, (n, advantage, half_width) in results['bins'].items()]
+        with open(args.json, 'w') as f:
+            json.dump({'system': args.system, 'decks': args.decks, 'penetration': args.penetration,
+                       'stand_on': args.stand_on, 'rounds': args.rounds, 'bins': bins}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
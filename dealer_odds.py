@@ -0,0 +1,119 @@
+"""
+Exact dealer outcome probabilities for the cards left in the deck.
+
+The dealer follows the rule in BlackjackGUI.stand and Hand.deal_cards: draw
+until the total is at least 17, counting each Ace as 11 unless that would
+bust, and never revaluing an Ace afterwards. Probabilities come from exact
+recursive enumeration over the remaining composition, memoized on
+(upcard value, count vector).
+
+The count vector has one entry per card value 2..11 (index = value - 2), so
+Ten, Jack, Queen, and King share the ten-value slot and Aces are the last slot.
+
+Usage:
+    python dealer_odds.py
+"""
+import time
+from functools import lru_cache
+
+import game_logic
+
+
+DEALER_TOTALS = (17, 18, 19, 20, 21, 'bust')
+FULL_DECK_COUNTS = (4, 4, 4, 4, 4, 4, 4, 4, 16, 4)
+
+
+def card_value(card):
+    """Nominal value of a card (Ace = 11), independent of any value chosen in a hand."""
+    return game_logic.values[card.rank]
+
+
+def rank_counts(cards):
+    """Builds the count vector for a list of Card objects."""
+    counts = [0] * 10
+    for card in cards:
+        counts[card_value(card) - 2] += 1
+    return tuple(counts)
+
+
+def _draw(total, value):
+    """Dealer's new total after drawing a card of the given value."""
+    if value == 11 and total + 11 > 21:
+        return total + 1
+    return total + value
+
+
+def _final_totals(total, counts, memo):
+    """
+    Probability of each final dealer total starting from total with counts left.
+    Returns a 6-tuple in DEALER_TOTALS order.
+    """
+    if total > 21:
+        return (0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+    if total >= 17:
+        dist = [0.0] * 6
+        dist[total - 17] = 1.0
+        return tuple(dist)
+    key = (total, counts)
+    if key in memo:
+        return memo[key]
+
+    remaining = sum(counts)
+    dist = [0.0] * 6
+    # An empty deck leaves no way to finish the hand, so no mass is assigned
+    if remaining:
+        next_counts = list(counts)
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            next_counts[index] -= 1
+            sub = _final_totals(_draw(total, index + 2), tuple(next_counts), memo)
+            next_counts[index] += 1
+            weight = count / remaining
+            for i in range(6):
+                dist[i] += weight * sub[i]
+    result = tuple(dist)
+    memo[key] = result
+    return result
+
+
+@lru_cache(maxsize=4096)
+def dealer_distribution(upcard_value, counts):
+    """
+    Exact distribution of the dealer's final total given the upcard value and
+    the count vector of unseen cards (the hole card counts as unseen).
+    Returns a 6-tuple of probabilities in DEALER_TOTALS order.
+    """
+    return _final_totals(_draw(0, upcard_value), tuple(counts), {})
+
+
+def dealer_outcome_odds(upcard, unseen_cards):
+    """
+    Convenience wrapper taking Card objects, e.g. for the GUI:
+        dealer_outcome_odds(dealer_hand.hand[0], deck.deck + [dealer_hand.hand[1]])
+    Returns a dict mapping each entry of DEALER_TOTALS to its probability.
+    """
+    dist = dealer_distribution(card_value(upcard), rank_counts(unseen_cards))
+    return dict(zip(DEALER_TOTALS, dist))
+
+
+if __name__ == "__main__":
+    print("Dealer final totals from a full deck (upcard removed):")
+    print("Up   " + "".join(f"{str(t):>8}" for t in DEALER_TOTALS))
+    for upcard_value in range(2, 12):
+        counts = list(FULL_DECK_COUNTS)
+        counts[upcard_value - 2] -= 1
+        dist = dealer_distribution(upcard_value, tuple(counts))
+        print(f"{upcard_value:>2}   " + "".join(f"{p:8.4f}" for p in dist))
+
+    counts = list(FULL_DECK_COUNTS)
+    counts[3] -= 2
+    counts[8] -= 1
+    start = time.perf_counter()
+    dealer_distribution(10, tuple(counts))
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(10_000):
+        dealer_distribution(10, tuple(counts))
+    warm = (time.perf_counter() - start) / 10_000
+    print(f"Cold query: {cold * 1000:.2f} ms, warm query: {warm * 1e6:.2f} us")
@@ -1,7 +1,13 @@
-from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QMessageBox, QPushButton, QLineEdit, QInputDialog, QLayout, QSizePolicy
-from PySide6.QtCore import Qt, QRect, QSize, QPoint
+from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QMessageBox, QPushButton, QSpinBox, QLayout, QSizePolicy
+from PySide6.QtCore import Qt, QRect, QSize, QPoint, QTimer, QEvent, QCoreApplication, Signal
 from PySide6.QtGui import QPixmap
+import os
+import time
+import card_images
 import game_logic
+import round_machine
+import toast
+import tracing
 
 
 class FlowLayout(QLayout):
@@ -93,8 +99,12 @@ class BlackjackGUI(QMainWindow):
     """
     Main GUI window for the Blackjack game.
     Handles all user interactions, card display, and round/bet/game flow.
+    frame_started is emitted as each window repaint begins.
     """
-    def __init__(self):
+    frame_started = Signal()
+
+    def __init__(self, decks=0, penetration=0.75, log_path=None, show_count=False, toast_ms=2500, intro=True, seed=None,
+                 session_path=None, show_odds=False):
         super().__init__()
         self.setWindowTitle("Blackjack")
         self.setStyleSheet("background-color: green;")
@@ -103,43 +113,73 @@ class BlackjackGUI(QMainWindow):
         # --- Game State ---
         self.player_chips = game_logic.Chips()
         self.summary_shown = False
-        self.deck = None
+        # A single deck is reset and reshuffled each round; a multi-deck shoe persists across rounds
+        # With a seed, the sequence of shuffles is the same every time the game is played
+        self.deck = game_logic.Shoe(decks, penetration, seed=seed) if decks else game_logic.Deck(seed=seed)
         self.player_hand = None
         self.dealer_hand = None
         self.hide_dealer_first_card = True  # Used to hide dealer's first card until round end
+        # Round flow (betting -> dealing -> player turn -> dealer turn -> settlement) is driven
+        # by the state machine's signals; no handler blocks or starts the next round itself
+        self.hand_log = None
+        if log_path:
+            import hand_log
+            self.hand_log = hand_log.HandLogWriter(log_path)
+        self.round = round_machine.RoundMachine(self.deck, self.player_chips, self, self.hand_log)
+        # A saved session continues with its chips, deck order and shuffle generator;
+        # it is saved again after every round, in the background (see save_session)
+        self.session = None
+        if session_path:
+            import checkpoint
+            self.checkpoint = checkpoint
+            if os.path.exists(session_path):
+                checkpoint.restore_session(session_path, self.deck, self.player_chips)
+                if self.player_chips.total <= 0:
+                    # That session ended out of chips: start a new one with the same deck
+                    self.player_chips.total = game_logic.Chips().total
+            self.session = checkpoint.Writer(session_path)
+        # Optional Hi-Lo count display, fed by the deck's own deal path
+        self.counter = None
+        if show_count:
+            import counting
+            self.counter = counting.attach(self.deck)
 
         # --- GUI Widgets ---
         self.player_bet_label = QLabel("Your Bet :  ")
         self.player_chips_label = QLabel(f"Your Chips:  {self.player_chips.total}")
-
-        # --- Card Image Preloading ---
-        # Preload and pre-scale all card images for efficient display.
-        # Card images are stored in self.card_pixmaps for quick lookup.
-        self.card_pixmaps = {}
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'jack', 'queen', 'king', 'ace']
-        suits = ['hearts', 'diamonds', 'spades', 'clubs']
-        for suit in suits:
-            for rank in ranks:
-                card_name = f"{rank}_of_{suit}"
-                path = f"PNG-cards/{card_name}.png"
-                pixmap = QPixmap(path).scaled(100, 145, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.card_pixmaps[card_name] = pixmap
-        # Load card back image
-        back_card_path = "PNG-cards/card back black.png"
-        self.card_pixmaps["back"] = QPixmap(back_card_path).scaled(100, 145, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-
-        # --- Show Rules/Intro ---
-        rules_intro = QMessageBox()
-        rules_intro.setWindowTitle("How to Play")
-        rules_intro.setText("Welcome to Blackjack! The goal is to get as close to 21 as possible without going over. Good luck!")
-        rules_intro.setStandardButtons(QMessageBox.Ok)
-        # Set custom info icon (now using game.png)
-        rules_intro.setIconPixmap(QPixmap("game.png").scaled(64, 64, Qt.KeepAspectRatio))
-        rules_intro.setStyleSheet("background-color: lightblue; color: black;")
-        rules_intro.exec()
-
-        # Prompt for initial bet before first round
-        self.take_bet()
+        self.count_label = QLabel()
+        self.count_label.setVisible(self.counter is not None)
+        # Optional win/push/lose odds for Hit and Stand, worked out off the GUI thread
+        self.odds_hud = None
+        if show_odds:
+            import odds_hud
+            import win_odds
+            self.odds_hud = odds_hud.OddsHud()
+            self.win_odds = win_odds
+
+        # --- Card Image Loading ---
+        # Card images are decoded and pre-scaled on a worker pool (or read from the
+        # on-disk atlas when it is current) once the window is up; see finish_startup.
+        # A placeholder is shown for any card whose image has not arrived yet.
+        self.card_images = card_images.CardImages(parent=self)
+        self.card_images.image_ready.connect(self.on_card_image_ready)
+
+        # --- Render Throttling ---
+        # Card images are rebuilt at most once per display frame, however many
+        # times the hands change in between (see schedule_card_update)
+        self.frame_interval_ms = max(1, round(1000 / (self.screen().refreshRate() or 60)))
+        self.card_update_timer = QTimer(self)
+        self.card_update_timer.setSingleShot(True)
+        self.card_update_timer.setTimerType(Qt.PreciseTimer)
+        self.card_update_timer.timeout.connect(self.update_card_images)
+        self._last_card_update = 0.0
+        # Window repaints are held to the same rate (see event)
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setTimerType(Qt.PreciseTimer)
+        self.frame_timer.timeout.connect(lambda: QCoreApplication.postEvent(self, QEvent(QEvent.UpdateRequest)))
+        self._last_frame = 0.0
+        self.show_intro = intro
 
         # --- Build GUI Layout ---
         # Main labels for hands
@@ -148,22 +188,49 @@ class BlackjackGUI(QMainWindow):
 
         # Action buttons (Hit, Stand)
         options_label = QLabel("What would you like to do?")
-        button_hit = QPushButton("Hit")
-        button_hit.setFixedHeight(100)
-        button_hit.clicked.connect(self.hit)
-        button_stand = QPushButton("Stand")
-        button_stand.setFixedHeight(100)
-        button_stand.clicked.connect(self.stand)
+        self.button_hit = QPushButton("Hit")
+        self.button_hit.setFixedHeight(100)
+        self.button_hit.clicked.connect(self.hit)
+        self.button_stand = QPushButton("Stand")
+        self.button_stand.setFixedHeight(100)
+        self.button_stand.clicked.connect(self.stand)
         # Removed buttons for double down, split, insurance, surrender (not implemented)
 
-        # Placeholder for deck image or future features (currently unused)
+        # Ace value buttons, shown only while a drawn Ace is waiting for its value
+        self.ace_label = QLabel("You drew an Ace! Choose its value:")
+        self.button_ace_1 = QPushButton("Ace = 1")
+        self.button_ace_1.clicked.connect(lambda: self.choose_ace(1))
+        self.button_ace_11 = QPushButton("Ace = 11")
+        self.button_ace_11.clicked.connect(lambda: self.choose_ace(11))
+        ace_buttons_layout = QHBoxLayout()
+        ace_buttons_layout.addWidget(self.button_ace_1)
+        ace_buttons_layout.addWidget(self.button_ace_11)
+        self.set_ace_prompt_visible(False)
+
+        # --- Bet Layout ---
+        # Bet controls take the place of the bet dialog and the play-again prompt:
+        # dealing starts the next round, cashing out ends the game
+        bet_label = QLabel("Place your bet:")
+        self.bet_input = QSpinBox()
+        self.bet_input.setRange(1, self.player_chips.total)
+        self.button_deal = QPushButton("Bet && Deal")
+        self.button_deal.clicked.connect(self.start_new_round)
+        self.button_cash_out = QPushButton("Cash Out")
+        self.button_cash_out.clicked.connect(self.show_game_summary)
         deck_layout = QVBoxLayout()
+        deck_layout.addWidget(bet_label)
+        deck_layout.addWidget(self.bet_input)
+        deck_layout.addWidget(self.button_deal)
+        deck_layout.addWidget(self.button_cash_out)
+        deck_layout.addWidget(self.ace_label)
+        deck_layout.addLayout(ace_buttons_layout)
+        deck_layout.addStretch()
 
         # --- Options Layout ---
         options_layout = QVBoxLayout()
         options_layout.addWidget(options_label)
-        options_layout.addWidget(button_hit)
-        options_layout.addWidget(button_stand)
+        options_layout.addWidget(self.button_hit)
+        options_layout.addWidget(self.button_stand)
 
         # --- Dealer Hand Layout ---
         dealer_layout = QVBoxLayout()
@@ -188,6 +255,9 @@ class BlackjackGUI(QMainWindow):
         player_layout.addStretch()
         player_layout.addWidget(self.player_bet_label)
         player_layout.addWidget(self.player_chips_label)
+        player_layout.addWidget(self.count_label)
+        if self.odds_hud is not None:
+            player_layout.addWidget(self.odds_hud)
 
         # --- Compose Main Layouts ---
         deck_and_options_layout = QHBoxLayout()
@@ -207,47 +277,163 @@ class BlackjackGUI(QMainWindow):
         central_widget.setLayout(layout)
         self.setCentralWidget(central_widget)
 
-        # Delay start of first round until GUI is ready
-        from PySide6.QtCore import QTimer
-        QTimer.singleShot(200, self.start_new_round)
-
-    def gui_deal_hands(self):
-        """
-        Deals initial two cards to both player and dealer.
-        - For player: prompts for Ace value (1 or 11) using input dialog.
-        - For dealer: chooses Ace value (11 if it doesn't bust, else 1).
-        Returns: (player_hand, dealer_hand) as Hand objects.
-        """
-        player_hand = game_logic.Hand()
-        dealer_hand = game_logic.Hand()
-
-        # Deal two cards to player (prompt for Aces)
-        for _ in range(2):
-            card = self.deck.deal()
-            if card.rank == 'Ace':
-                # Prompt player to choose Ace value (1 or 11)
-                ace_value, ok = QInputDialog.getInt(self, "Ace Value", "Choose value for Ace (1 or 11):", 11, 1, 11)
-                if not ok or ace_value not in (1, 11):
-                    ace_value = 11
-                card.value = ace_value
-            player_hand.hand.append(card)
-            player_hand.value += card.value
-        player_hand.cards = ', '.join(str(c) for c in player_hand.hand)
-
-        # Deal two cards to dealer (automatic Ace logic)
-        for _ in range(2):
-            card = self.deck.deal()
-            if card.rank == 'Ace':
-                # Dealer chooses 11 if it doesn't bust, else 1
-                if dealer_hand.value + 11 <= 21:
-                    card.value = 11
-                else:
-                    card.value = 1
-            dealer_hand.hand.append(card)
-            dealer_hand.value += card.value
-        dealer_hand.cards = ', '.join(str(c) for c in dealer_hand.hand)
+        # Outcome and bet messages appear in this overlay rather than in message boxes;
+        # toast_ms auto-dismisses them (0 keeps each one up until it is clicked)
+        self.toast = toast.Toast(self, toast_ms)
+
+        # --- Round State Machine Signals ---
+        self.round.state_changed.connect(self.on_state_changed)
+        self.round.hands_changed.connect(self.refresh_hands)
+        self.round.ace_choice_needed.connect(self.on_ace_choice_needed)
+        self.round.round_settled.connect(self.resolve_round)
+        if self.session is not None:
+            self.round.round_settled.connect(self.save_session)
+        self.on_state_changed(self.round.state)
+
+        # --- Deferred Startup Work ---
+        # Nothing above blocks, so the window is shown and painted first; card images
+        # and the intro dialog follow from the first paint (see paintEvent)
+        self._startup_scheduled = False
+        self.startup_finished = False
+
+    def event(self, event):
+        """
+        Holds repaints to at most one per display frame: an update request that
+        comes too soon after the last frame is dropped and re-posted when the
+        frame interval is up. The pending dirty regions are kept in the meantime,
+        so that one repaint covers every change made before it.
+        """
+        if event.type() == QEvent.UpdateRequest:
+            now = time.perf_counter()
+            wait_ms = self.frame_interval_ms - (now - self._last_frame) * 1000
+            if wait_ms > 0:
+                if not self.frame_timer.isActive():
+                    self.frame_timer.start(int(wait_ms) + 1)
+                return True
+            self._last_frame = now
+            self.frame_started.emit()
+        return super().event(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._startup_scheduled:
+            # A zero timer (rather than a call here) lets this frame reach the screen first
+            self._startup_scheduled = True
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """
+        Startup work that does not need to hold up the first frame:
+        - Starts loading the card images (none are on screen until the first deal)
+        - Opens the How to Play dialog, window-modal and non-blocking (unless intro=False)
+        """
+        with tracing.span("load_card_images"):
+            self.card_images.load()
+        if not self.show_intro:
+            self.startup_finished = True
+            return
+
+        rules_intro = QMessageBox(self)
+        rules_intro.setWindowTitle("How to Play")
+        rules_intro.setText("Welcome to Blackjack! The goal is to get as close to 21 as possible without going over. Good luck!")
+        rules_intro.setStandardButtons(QMessageBox.Ok)
+        # Set custom info icon (now using game.png)
+        rules_intro.setIconPixmap(QPixmap("game.png").scaled(64, 64, Qt.KeepAspectRatio))
+        rules_intro.setStyleSheet("background-color: lightblue; color: black;")
+        rules_intro.setAttribute(Qt.WA_DeleteOnClose)
+        rules_intro.open()
+        tracing.dialog(rules_intro, "dialog How to Play")
+        self.startup_finished = True
+
+    def show_message(self, title, text, icon_path, on_dismissed=None, queued=False):
+        """
+        Shows a message with a custom icon in the window's toast overlay.
+        Nothing is constructed or read from disk per message and the caller
+        returns immediately; on_dismissed is called once the message is clicked
+        away or times out. A queued message follows the current one instead of
+        replacing it.
+        """
+        if queued:
+            self.toast.queue_message(title, text, icon_path, on_dismissed)
+        else:
+            self.toast.show_message(title, text, icon_path, on_dismissed)
+
+    def on_state_changed(self, state):
+        """
+        Enables the controls that make sense in the new round state:
+        - betting: bet controls
+        - player turn: Hit and Stand
+        Also hides the dealer's hole card until the dealer plays.
+        """
+        self.hide_dealer_first_card = state in (round_machine.DEALING, round_machine.PLAYER_TURN)
+        player_turn = state == round_machine.PLAYER_TURN and self.round.pending_ace is None
+        self.button_hit.setEnabled(player_turn)
+        self.button_stand.setEnabled(player_turn)
+        betting = state == round_machine.BETTING
+        self.bet_input.setEnabled(betting)
+        self.button_deal.setEnabled(betting)
+        if betting:
+            self.bet_input.setMaximum(self.player_chips.total)
+        if state == round_machine.GAME_OVER:
+            self.check_out_of_chips()
+        self.update_count_display()
+        self.update_odds_display()
+
+    def set_ace_prompt_visible(self, visible):
+        self.ace_label.setVisible(visible)
+        self.button_ace_1.setVisible(visible)
+        self.button_ace_11.setVisible(visible)
+
+    def on_ace_choice_needed(self):
+        """Ask for the value of the Ace the player just drew (1 or 11) using the inline buttons."""
+        self.button_hit.setEnabled(False)
+        self.button_stand.setEnabled(False)
+        self.set_ace_prompt_visible(True)
+        self.update_odds_display()
+
+    def choose_ace(self, value):
+        """Pass the chosen Ace value on to the round; the round continues from there."""
+        self.set_ace_prompt_visible(False)
+        self.round.choose_ace(value)
+        # Any state change was already reported by the machine; only a choice that leaves
+        # the player's turn going has no signal to re-enable Hit and Stand
+        if self.round.state == round_machine.PLAYER_TURN:
+            self.on_state_changed(self.round.state)
+
+    def refresh_hands(self):
+        """
+        Shows the current hands from the round state machine:
+        - Updates the hand labels (dealer's hole card stays hidden during the player's turn)
+        - Moves any dealt card images that are still loading to the front of the queue
+        - Schedules a redraw of the card images for the next frame
+        """
+        self.player_hand = self.round.player_hand
+        self.dealer_hand = self.round.dealer_hand
+        if self.round.state in (round_machine.DEALING, round_machine.PLAYER_TURN):
+            self.dealer_hand_label.setText(f"Dealer's Hand: {self.dealer_hand.hand[0]} and [Hidden]")
+        else:
+            self.dealer_hand_label.setText(f"Dealer's Hand: {self.dealer_hand.cards} (Value: {self.dealer_hand.value})")
+        self.player_hand_label.setText(f"Your Hand: {self.player_hand.cards} (Value: {self.player_hand.value})")
+        self.card_images.prioritize(card_images.card_name(card) for card in self.player_hand.hand + self.dealer_hand.hand)
+        self.schedule_card_update()
+        self.update_count_display()
+        self.update_odds_display()
 
-        return player_hand, dealer_hand
+    def schedule_card_update(self):
+        """
+        Runs update_card_images at most once per display frame. A request made
+        a frame or more after the last redraw is served at once, in the same
+        repaint as the labels; later requests wait for the next frame and are
+        coalesced, so several cards (or autoplayed rounds) within one frame
+        rebuild the card labels once.
+        """
+        if self.card_update_timer.isActive():
+            return
+        elapsed_ms = (time.perf_counter() - self._last_card_update) * 1000
+        if elapsed_ms >= self.frame_interval_ms:
+            self.update_card_images()
+        else:
+            self.card_update_timer.start(int(self.frame_interval_ms - elapsed_ms))
 
     def update_card_images(self):
         """
@@ -255,59 +441,51 @@ class BlackjackGUI(QMainWindow):
         Uses FlowLayout containers to arrange cards in a row.
         Handles hiding the dealer's first card until the round is over.
         """
-        # Helper to clear all widgets from a layout
-        def clear_layout(layout):
-            while layout.count():
-                item = layout.takeAt(0)
-                if item:
-                    widget = item.widget()
-                    if widget:
-                        widget.setParent(None)
-                        widget.deleteLater()
-
-        # Clear previous card images before updating
-        clear_layout(self.dealer_cards_layout)
-        clear_layout(self.player_cards_layout)
-
-        # Normalize card rank names for image lookup
-        rank_map = {
-            'Two': '2', 'Three': '3', 'Four': '4', 'Five': '5', 'Six': '6',
-            'Seven': '7', 'Eight': '8', 'Nine': '9', 'Ten': '10',
-            'Jack': 'jack', 'Queen': 'queen', 'King': 'king', 'Ace': 'ace'
-        }
-
-        # --- Dealer cards ---
-        for i, card in enumerate(self.dealer_hand.hand):
-            label = QLabel()
-            label.setFixedSize(100, 145)
-            # Hide dealer's first card if still in round
-            if i == 1 and self.hide_dealer_first_card:
-                pixmap = self.card_pixmaps.get("back")
-            else:
-                rank_key = rank_map.get(card.rank, card.rank.lower())
-                suit_key = card.suit.lower()
-                card_key = f"{rank_key}_of_{suit_key}"
-                pixmap = self.card_pixmaps.get(card_key, self.card_pixmaps.get("back"))
-            pixmap = pixmap.scaled(100, 145, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            label.setPixmap(pixmap)
-            label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-            self.dealer_cards_layout.addWidget(label)
-
-        # --- Player cards ---
-        for card in self.player_hand.hand:
-            label = QLabel()
-            label.setFixedSize(100, 145)
-            rank_key = rank_map.get(card.rank, card.rank.lower())
-            suit_key = card.suit.lower()
-            card_key = f"{rank_key}_of_{suit_key}"
-            pixmap = self.card_pixmaps.get(card_key, self.card_pixmaps.get("back"))
-            pixmap = pixmap.scaled(100, 145, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            label.setPixmap(pixmap)
-            label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-            self.player_cards_layout.addWidget(label)
-
-        # Force layout update to fix overlay/glitch issues
-        QApplication.processEvents()
+        self._last_card_update = time.perf_counter()
+        with tracing.span("update_card_images"):
+            # Helper to clear all widgets from a layout
+            def clear_layout(layout):
+                while layout.count():
+                    item = layout.takeAt(0)
+                    if item:
+                        widget = item.widget()
+                        if widget:
+                            widget.setParent(None)
+                            widget.deleteLater()
+
+            # Clear previous card images before updating
+            clear_layout(self.dealer_cards_layout)
+            clear_layout(self.player_cards_layout)
+
+            # --- Dealer cards ---
+            # Pixmaps are already scaled to the label size by CardImages
+            for i, card in enumerate(self.dealer_hand.hand):
+                label = QLabel()
+                label.setFixedSize(100, 145)
+                # Hide dealer's first card if still in round
+                if i == 1 and self.hide_dealer_first_card:
+                    pixmap = self.card_images.pixmap("back")
+                else:
+                    pixmap = self.card_images.pixmap(card_images.card_name(card))
+                label.setPixmap(pixmap)
+                label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+                self.dealer_cards_layout.addWidget(label)
+
+            # --- Player cards ---
+            for card in self.player_hand.hand:
+                label = QLabel()
+                label.setFixedSize(100, 145)
+                label.setPixmap(self.card_images.pixmap(card_images.card_name(card)))
+                label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+                self.player_cards_layout.addWidget(label)
+
+    def on_card_image_ready(self, name):
+        """Redraw the hands when an image for a card currently on the table finishes loading."""
+        if self.player_hand is None:
+            return
+        shown = {card_images.card_name(card) for card in self.player_hand.hand + self.dealer_hand.hand}
+        if name in shown or name == "back":
+            self.schedule_card_update()
 
     def update_bet_display(self):
         """Update the bet label to reflect the player's current bet."""
@@ -317,233 +495,135 @@ class BlackjackGUI(QMainWindow):
         """Update the chips label to reflect the player's current chip count."""
         self.player_chips_label.setText(f"Your Chips:  {self.player_chips.total}")
 
+    def update_count_display(self):
+        """
+        Update the Hi-Lo count label (only shown with --count).
+        The counter has seen the dealer's hole card, so it is left out while face down.
+        """
+        if self.counter is None:
+            return
+        running = self.counter.running_count()
+        if self.hide_dealer_first_card and self.dealer_hand is not None and len(self.dealer_hand.hand) > 1:
+            running -= self.counter.tag(self.dealer_hand.hand[1])
+        self.count_label.setText(f"Running Count: {running:+d}   True Count: {running / self.counter.decks_remaining():+.1f}")
+
+    def update_odds_display(self):
+        """
+        Update the odds HUD (only shown with --odds) while the player is choosing
+        between Hit and Stand, and clear it otherwise. The odds are for the cards
+        the player cannot see: the rest of the deck and the dealer's hole card.
+        """
+        if self.odds_hud is None:
+            return
+        machine = self.round
+        if machine.state == round_machine.PLAYER_TURN and machine.pending_ace is None:
+            dealer_cards = machine.dealer_hand.hand
+            self.odds_hud.show_odds(machine.player_hand, dealer_cards[0], self.win_odds.unseen_counts(self.deck, dealer_cards[1]))
+        else:
+            self.odds_hud.clear()
+
     def check_out_of_chips(self):
         """
         Check if the player is out of chips.
-        If so, show a message and end the game.
+        If so, show a message and end the game once it is closed.
         Returns True if out of chips, else False.
         """
         if self.player_chips.total <= 0:
-            # Custom icon for out of chips/game over
-            mb = QMessageBox(self)
-            mb.setWindowTitle("Out of Chips")
-            mb.setText("You have no chips left to bet. Game over!")
-            mb.setIconPixmap(QPixmap("empty-wallet.png").scaled(64, 64, Qt.KeepAspectRatio))
-            mb.exec()
-            self.show_game_summary()
-            QApplication.quit()
+            # Custom icon for out of chips/game over; shown after the last round's outcome, not over it
+            self.show_message("Out of Chips", "You have no chips left to bet. Game over!", "empty-wallet.png",
+                              on_dismissed=self.show_game_summary, queued=True)
             return True
         return False
 
     def take_bet(self):
         """
-        Prompt the player to place a bet for the round.
+        Read the player's bet for the round from the bet box.
         Ensures bet is between 1 and player's available chips.
+        Returns the bet, or None if it is not valid.
         """
-        if self.check_out_of_chips():
-            return
-        while True:
-            bet, ok = QInputDialog.getInt(self, "Place your bet", f"Enter your bet (You have {self.player_chips.total} chips to bet):", 1, 1, self.player_chips.total)
-            if not ok:
-                mb = QMessageBox(self)
-                mb.setWindowTitle("Bet Required")
-                mb.setText("You must place a bet to play.")
-                mb.setIconPixmap(QPixmap("red-x.png").scaled(64, 64, Qt.KeepAspectRatio))
-                mb.exec()
-                continue
-            if bet < 1 or bet > self.player_chips.total:
-                mb = QMessageBox(self)
-                mb.setWindowTitle("Invalid Bet")
-                mb.setText(f"Bet must be between 1 and {self.player_chips.total}.")
-                mb.setIconPixmap(QPixmap("red-x.png").scaled(64, 64, Qt.KeepAspectRatio))
-                mb.exec()
-                continue
-            self.player_chips.bet = bet
-            self.update_bet_display()
-            mb = QMessageBox(self)
-            mb.setWindowTitle("Bet Placed")
-            mb.setText(f"You bet {bet} chips.")
-            mb.setIconPixmap(QPixmap("chips.png").scaled(64, 64, Qt.KeepAspectRatio))
-            mb.exec()
-            break
+        bet = self.bet_input.value()
+        if bet < 1 or bet > self.player_chips.total:
+            self.show_message("Invalid Bet", f"Bet must be between 1 and {self.player_chips.total}.", "red-x.png")
+            return None
+        self.show_message("Bet Placed", f"You bet {bet} chips.", "chips.png")
+        return bet
 
     def start_new_round(self):
         """
-        Starts a new round:
+        Starts a new round (the Bet & Deal button):
         - Checks for chips
-        - Shuffles a new deck
-        - Deals hands
-        - Updates GUI
-        - Handles immediate blackjack win
+        - Takes the bet
+        - Hands the round to the state machine, which reshuffles the deck or shoe
+          as needed, deals, and settles an immediate blackjack
         """
-        if self.check_out_of_chips():
-            return
-
-        # Create and shuffle a new deck for each round
-        self.deck = game_logic.Deck()
-        self.deck.shuffle()
-
-        # Deal hands (see gui_deal_hands for Ace handling logic)
-        self.player_hand, self.dealer_hand = self.gui_deal_hands()
-
-        self.hide_dealer_first_card = True
-
-        # Update GUI labels to show initial cards
-        self.dealer_hand_label.setText(f"Dealer's Hand: {self.dealer_hand.hand[0]} and [Hidden]")
-        self.player_hand_label.setText(f"Your Hand: {self.player_hand.cards} (Value: {self.player_hand.value})")
-
-        self.update_card_images()
-
-        # Immediate win if player has blackjack (21 on deal)
-        if self.player_hand.value == 21:
-            mb = QMessageBox(self)
-            mb.setWindowTitle("Blackjack!")
-            mb.setText("Blackjack! You win 1.5x your bet!")
-            mb.setIconPixmap(QPixmap("trophy.png").scaled(64, 64, Qt.KeepAspectRatio))
-            mb.exec()
-            self.player_chips.total += int(self.player_chips.bet * 1.5)
-            self.update_chips_display()
-            if self.ask_play_again():
-                self.take_bet()
-                self.start_new_round()
-            else:
-                self.show_game_summary()
+        with tracing.span("start_new_round"):
+            if self.check_out_of_chips():
+                return
+            bet = self.take_bet()
+            if bet is None:
+                return
+            self.round.place_bet(bet)
+            self.update_bet_display()
 
     def hit(self):
         """
-        Handles the 'Hit' action:
-        - Deals a card to the player (prompts for Ace value)
-        - Updates hand value and images
-        - Checks for bust and handles round end if necessary
-        """
-        card = self.deck.deal()
-        if card.rank == 'Ace':
-            # Prompt player for Ace value on hit
-            ace_icon = QPixmap("choice.png").scaled(64, 64, Qt.KeepAspectRatio)
-            ace_value, ok = QInputDialog.getInt(self, "Ace Value", "Choose value for Ace (1 or 11):", 11, 1, 11)
-            # Note: QInputDialog does not support icon, but we load the icon for possible future use.
-            if not ok or ace_value not in (1, 11):
-                ace_value = 11
-            card.value = ace_value
-        self.player_hand.hand.append(card)
-        self.player_hand.value += card.value
-        self.player_hand.cards = ', '.join(str(c) for c in self.player_hand.hand)
-        self.player_hand_label.setText(f"Your Hand: {self.player_hand.cards} (Value: {self.player_hand.value})")
-        self.update_card_images()
-
-        # Bust check: if player goes over 21, round ends
-        if self.player_hand.value > 21:
-            mb = QMessageBox(self)
-            mb.setWindowTitle("Bust")
-            mb.setText(f"You busted with {self.player_hand.value}! You lose your bet of {self.player_chips.bet} chips.")
-            mb.setIconPixmap(QPixmap("red-x.png").scaled(64, 64, Qt.KeepAspectRatio))
-            mb.exec()
-            self.player_chips.lose_bet()
-            self.update_chips_display()
-            if not self.check_out_of_chips() and self.ask_play_again():
-                self.take_bet()
-                self.start_new_round()
-            elif self.check_out_of_chips():
-                return
-            else:
-                self.show_game_summary()
+        Handles the 'Hit' action. The state machine deals the card (asking for an
+        Ace value if needed) and settles the round on a bust.
+        """
+        with tracing.span("hit"):
+            self.round.hit()
 
     def stand(self):
         """
-        Handles the 'Stand' action:
-        - Dealer draws cards until value >= 17 (Aces handled automatically)
-        - Reveals all dealer cards and updates GUI
-        - Calls round resolution logic
-        """
-        # Dealer draws until hand value is at least 17
-        while self.dealer_hand.value < 17:
-            card = self.deck.deal()
-            if card.rank == 'Ace':
-                # Dealer logic: choose 11 if it doesn't bust, else 1
-                if self.dealer_hand.value + 11 <= 21:
-                    card.value = 11
-                else:
-                    card.value = 1
-            self.dealer_hand.hand.append(card)
-            self.dealer_hand.value += card.value
-            self.dealer_hand.cards = ', '.join(str(c) for c in self.dealer_hand.hand)
-        # Reveal all dealer cards and update GUI
-        self.hide_dealer_first_card = False
-        self.dealer_hand_label.setText(f"Dealer's Hand: {self.dealer_hand.cards} (Value: {self.dealer_hand.value})")
-        self.update_card_images()
-        self.resolve_round()
-
-    def resolve_round(self):
-        """
-        Determines the outcome of the round (win, lose, push) and updates chips.
-        Handles payout, shows outcome messages, and prompts for next round or summary.
-        """
-        player_val = self.player_hand.value
-        dealer_val = self.dealer_hand.value
-        bet = self.player_chips.bet
-
-        # Dealer busts
-        if dealer_val > 21:
-            mb = QMessageBox(self)
-            mb.setWindowTitle("Dealer Busts")
-            mb.setText(f"Dealer busts with {dealer_val}! You win {bet} chips.")
-            mb.setIconPixmap(QPixmap("trophy.png").scaled(64, 64, Qt.KeepAspectRatio))
-            mb.exec()
-            self.player_chips.win_bet()
-        # Player wins
-        elif player_val > dealer_val:
-            mb = QMessageBox(self)
-            mb.setWindowTitle("You Win")
-            mb.setText(f"You win with {player_val} against dealer's {dealer_val}! You win {bet} chips.")
-            mb.setIconPixmap(QPixmap("trophy.png").scaled(64, 64, Qt.KeepAspectRatio))
-            mb.exec()
-            self.player_chips.win_bet()
-        # Player loses
-        elif player_val < dealer_val:
-            mb = QMessageBox(self)
-            mb.setWindowTitle("You Lose")
-            mb.setText(f"You lose with {player_val} against dealer's {dealer_val}. You lose {bet} chips.")
-            mb.setIconPixmap(QPixmap("red-x.png").scaled(64, 64, Qt.KeepAspectRatio))
-            mb.exec()
-            self.player_chips.lose_bet()
-        # Push (tie)
-        else:
-            mb = QMessageBox(self)
-            mb.setWindowTitle("Push")
-            mb.setText(f"It's a tie at {player_val}. Your bet is returned.")
-            mb.setIconPixmap(QPixmap("neutral-icon.png").scaled(64, 64, Qt.KeepAspectRatio))
-            mb.exec()
-
-        self.update_chips_display()
+        Handles the 'Stand' action. The state machine plays the dealer's hand
+        (draw to 17) and settles the round.
+        """
+        with tracing.span("stand"):
+            self.round.stand()
 
-        # Check for chips after round
-        if self.check_out_of_chips():
-            return
+    def resolve_round(self, outcome, net):
+        """
+        Shows the outcome of a settled round (blackjack, bust, dealer bust, win, lose, push)
+        and updates the chip display. Betting for the next round re-opens afterwards.
+        """
+        with tracing.span("resolve_round"):
+            player_val = self.player_hand.value
+            dealer_val = self.dealer_hand.value
+            bet = self.player_chips.bet
+
+            # The dealer's hand is revealed once the round is settled
+            self.refresh_hands()
+
+            if outcome == 'blackjack':
+                self.show_message("Blackjack!", "Blackjack! You win 1.5x your bet!", "trophy.png")
+            elif outcome == 'bust':
+                self.show_message("Bust", f"You busted with {player_val}! You lose your bet of {bet} chips.", "red-x.png")
+            elif outcome == 'dealer_bust':
+                self.show_message("Dealer Busts", f"Dealer busts with {dealer_val}! You win {bet} chips.", "trophy.png")
+            elif outcome == 'win':
+                self.show_message("You Win", f"You win with {player_val} against dealer's {dealer_val}! You win {bet} chips.", "trophy.png")
+            elif outcome == 'lose':
+                self.show_message("You Lose", f"You lose with {player_val} against dealer's {dealer_val}. You lose {bet} chips.", "red-x.png")
+            else:
+                self.show_message("Push", f"It's a tie at {player_val}. Your bet is returned.", "neutral-icon.png")
 
-        # Ask if player wants to play another round (if chips remain)
-        if self.ask_play_again():
-            self.take_bet()
-            self.start_new_round()
-        else:
-            self.show_game_summary()
+            self.update_chips_display()
 
-    def ask_play_again(self):
+    def save_session(self, *_):
         """
-        Prompt the player to play another round.
-        Returns True if Yes, False if No.
+        Hands a snapshot of the chips and deck to the session writer; the file is
+        written off the GUI thread. A failed earlier write is reported in a message.
         """
-        mb = QMessageBox(self)
-        mb.setWindowTitle("Play Again?")
-        mb.setText(f"You currently have {self.player_chips.total} chips. Do you want to play another round?")
-        mb.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
-        mb.setIconPixmap(QPixmap("Information_icon.png").scaled(64, 64, Qt.KeepAspectRatio))
-        reply = mb.exec()
-        return reply == QMessageBox.Yes
+        try:
+            self.session.save(self.checkpoint.session_bytes(self.deck, self.player_chips))
+        except OSError as error:
+            self.show_message("Session Not Saved", f"Could not save the session to {self.session.path}: {error}",
+                              "red-x.png", queued=True)
 
     def show_game_summary(self):
         """
         Shows a summary of the player's results at the end of the game.
-        Displays total chips and net winnings, then exits.
+        Displays total chips and net winnings, then exits when closed.
         """
         if self.summary_shown:
             return
@@ -554,13 +634,50 @@ class BlackjackGUI(QMainWindow):
         summary_box.setText(f"Thank you for playing!\n\nTotal Chips: {self.player_chips.total}\nNet Winnings: {net_winnings}")
         summary_box.setStandardButtons(QMessageBox.Close)
         summary_box.setIconPixmap(QPixmap("game.png").scaled(64, 64, Qt.KeepAspectRatio))
-        summary_box.exec()
-        QApplication.quit()
+        summary_box.finished.connect(QApplication.quit)
+        summary_box.open()
+        tracing.dialog(summary_box, "dialog Game Summary")
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play Blackjack")
+    parser.add_argument('--decks', type=int, default=0, help="play from a persistent shoe of 1-8 decks (default: new single deck each round)")
+    parser.add_argument('--penetration', type=float, default=0.75, help="fraction of the shoe dealt before the cut card")
+    parser.add_argument('--log', metavar='PATH', help="append every round to a binary hand log (read it with hand_log.py)")
+    parser.add_argument('--count', action='store_true', help="show the Hi-Lo running and true count")
+    parser.add_argument('--odds', action='store_true', help="show the chances of winning, pushing and losing if you hit or stand")
+    parser.add_argument('--seed', type=int, help="replay the same sequence of shuffles")
+    parser.add_argument('--session', metavar='PATH', help="resume the session saved here, and keep saving it after every round")
+    parser.add_argument('--toast-ms', type=int, default=2500, help="milliseconds before a message disappears (0: until clicked)")
+    parser.add_argument('--autoplay', action='store_true', help="let a built-in stand-on-17 policy play rounds back to back")
+    parser.add_argument('--autoplay-delay', type=int, default=0, metavar='MS', help="milliseconds between autoplay decisions (0: as fast as possible)")
+    parser.add_argument('--autoplay-rounds', type=int, default=0, help="quit after this many autoplayed rounds (0: run until closed)")
+    parser.add_argument('--autoplay-bet', type=int, default=10)
+    parser.add_argument('--report-every', type=float, default=10.0, metavar='SECONDS', help="autoplay stats interval")
+    args = parser.parse_args()
+
     # Launch the Blackjack GUI application
     app = QApplication([])
-    window = BlackjackGUI()
+    window = BlackjackGUI(args.decks, args.penetration, args.log, args.count, args.toast_ms,
+                          intro=not args.autoplay, seed=args.seed, session_path=args.session,
+                          show_odds=args.odds)
+    if window.hand_log is not None:
+        app.aboutToQuit.connect(window.hand_log.close)
+    if window.session is not None:
+        app.aboutToQuit.connect(window.session.close)
+    if window.odds_hud is not None:
+        # A calculation still running would otherwise hold up the exit
+        app.aboutToQuit.connect(window.odds_hud.shutdown)
     window.show()
+    if args.autoplay:
+        import autoplay
+        import simulate
+        player = autoplay.Autoplay(window, simulate.StandOnPolicy(17, args.autoplay_bet), args.autoplay_delay,
+                                   args.autoplay_rounds, args.report_every)
+        if args.autoplay_rounds:
+            player.finished.connect(app.quit)
+        app.aboutToQuit.connect(player.stop)
+        player.start()
     app.exec()
@@ -1,71 +1,226 @@
 import random
 
+import streams
+
 suits = ('Hearts', 'Diamonds', 'Spades', 'Clubs')
 ranks = ('Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine', 'Ten', 'Jack', 'Queen', 'King', 'Ace')
 values = {'Two':2, 'Three':3, 'Four':4, 'Five':5, 'Six':6, 'Seven':7, 'Eight':8, 'Nine':9, 'Ten':10, 'Jack':10, 'Queen':10, 'King':10, 'Ace':11}
 
+# Ways a round can end, as distinguished by the GUI's round resolution
+OUTCOMES = ('blackjack', 'win', 'dealer_bust', 'push', 'lose', 'bust')
 
 
-class Card:
 
-    def __init__(self, suit, rank):
-        self.suit = suit
-        self.rank = rank
-        self.value = values[rank]
+class Card:
+    """
+    Immutable playing card. There is exactly one Card object per suit and rank:
+    Card(suit, rank) returns the shared instance, so decks never allocate cards.
+    A card's value is its nominal value (Ace = 11); the value an Ace is played
+    at lives in the Hand that holds it. code is the card's index in CARDS.
+    """
+    __slots__ = ('suit', 'rank', 'value', 'code')
+    _interned = {}
+
+    def __new__(cls, suit, rank):
+        card = cls._interned.get((suit, rank))
+        if card is None:
+            card = object.__new__(cls)
+            object.__setattr__(card, 'suit', suit)
+            object.__setattr__(card, 'rank', rank)
+            object.__setattr__(card, 'value', values[rank])
+            object.__setattr__(card, 'code', suits.index(suit) * len(ranks) + ranks.index(rank))
+            cls._interned[(suit, rank)] = card
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card objects are immutable")
+
+    def __reduce__(self):
+        return (Card, (self.suit, self.rank))
 
     def __str__(self):
         return f"{self.rank} of {self.suit}"
 
 
+# The 52 card singletons, in the order a new Deck holds them
+CARDS = tuple(Card(suit, rank) for suit in suits for rank in ranks)
+
+# Decks created without an rng or seed shuffle from this generator rather than
+# the global random module, so a whole session's deck sequence can be replayed
+# with seed() and is not disturbed by other users of random
+_rng = random.Random()
+
+
+def seed(value=None):
+    """Reseeds the generator shared by decks created without an rng or seed."""
+    _rng.seed(value)
+
+
+def deck_rng(rng=None, seed=None):
+    # An explicit generator wins, then a stream of its own for seed, then the shared one
+    if rng is not None:
+        return rng
+    return streams.Stream(seed) if seed is not None else _rng
+
+
 class Deck:
 
-    def __init__(self):
-        self.deck = [Card(suit, rank) for suit in suits for rank in ranks]
+    def __init__(self, rng=None, seed=None):
+        self.deck = list(CARDS)
+        # Any object with a shuffle() method, e.g. a streams.Stream or ShuffleBuffer; see deck_rng()
+        self.rng = deck_rng(rng, seed)
+        # Optional card counter (see counting.attach): told about every shuffle and every dealt card
+        self.counter = None
     
     def shuffle(self):
-        random.shuffle(self.deck)
+        self.rng.shuffle(self.deck)
+        if self.counter is not None:
+            self.counter.reset()
+
+    def reset(self):
+        # Refill the same list with the 52 shared cards and reshuffle it in place
+        self.deck[:] = CARDS
+        self.shuffle()
+
+    def new_round(self):
+        # A single deck is rebuilt for every round; returns True because it was reshuffled
+        self.reset()
+        return True
     
     def deal(self):
-        return self.deck.pop()
+        card = self.deck.pop()
+        if self.counter is not None:
+            self.counter.see(card)
+        return card
+
+
+class Shoe:
+    """
+    A shoe of 1-8 decks that keeps its order across rounds.
+    Cards are dealt by advancing a position through a fixed buffer, so dealing
+    is O(1) and the shoe never grows or shrinks. The cut card sits at
+    penetration * the number of cards; once it has been dealt, the next call to
+    new_round() reshuffles. counts is a live vector of the cards not yet dealt,
+    one entry per card value 2..11 (index = value - 2, as in dealer_odds).
+    counter, if set (see counting.attach), sees every shuffle and dealt card as Deck's does.
+    """
+
+    def __init__(self, decks=6, penetration=0.75, rng=None, seed=None):
+        if not 1 <= decks <= 8:
+            raise ValueError("A shoe holds between 1 and 8 decks.")
+        if not 0 < penetration <= 1:
+            raise ValueError("Penetration must be greater than 0 and at most 1.")
+        self.decks = decks
+        self.rng = deck_rng(rng, seed)
+        self.cards = list(CARDS) * decks
+        self.cut_card = int(len(self.cards) * penetration)
+        self.position = 0
+        self.counts = [0] * 10
+        self.counter = None
+        self.shuffle()
+
+    def shuffle(self):
+        self.rng.shuffle(self.cards)
+        self.position = 0
+        self.counts[:] = [4 * self.decks] * 8 + [16 * self.decks, 4 * self.decks]
+        if self.counter is not None:
+            self.counter.reset()
+
+    @property
+    def needs_shuffle(self):
+        return self.position >= self.cut_card
+
+    @property
+    def deck(self):
+        # Remaining cards in dealing order (a copy, for read-only use such as odds)
+        return self.cards[self.position:]
+
+    def new_round(self):
+        # Reshuffle only once the cut card has come out; returns True if it did
+        if self.needs_shuffle:
+            self.shuffle()
+            return True
+        return False
+
+    def deal(self):
+        if self.position == len(self.cards):
+            # Only reachable with penetration near 1: reshuffle mid-round rather than fail
+            self.shuffle()
+        card = self.cards[self.position]
+        self.position += 1
+        self.counts[card.value - 2] -= 1
+        if self.counter is not None:
+            self.counter.see(card)
+        return card
 
 
 class Hand:
+    """
+    A player's or dealer's hand, evaluated incrementally as cards are added:
+    - hard: total with every Ace counted as 1
+    - soft_aces: number of Aces being played as 11
+    - value: hard + 10 * soft_aces
+    - pair / blackjack: two cards of the same value / a two-card 21
+    Adding a card is O(1); the display string (cards / str(hand)) is only
+    built when something renders it.
+    """
     
     def __init__(self):
         self.hand = []
-        self.cards = []
+        self.values = []  # value each card is played at (Aces: 1 or 11)
+        self.hard = 0
+        self.soft_aces = 0
         self.value = 0
+        self.pair = False
+        self.blackjack = False
+        self._cards = ''
+
+    def add_card(self, card, value):
+        self.hand.append(card)
+        self.values.append(value)
+        if value == 11 and card.rank == 'Ace':
+            self.soft_aces += 1
+            self.hard += 1
+        else:
+            self.hard += value
+        self.value = self.hard + 10 * self.soft_aces
+        two_cards = len(self.hand) == 2
+        self.pair = two_cards and self.hand[0].value == card.value
+        self.blackjack = two_cards and self.value == 21
+        self._cards = None
+
+    @property
+    def cards(self):
+        if self._cards is None:
+            self._cards = ', '.join(str(card) for card in self.hand)
+        return self._cards
         
     def add_cards(self,card):
+        value = card.value
         if card.rank == 'Ace':
             print("You drew an Ace!")
             print(f"Here is your hand so far: {self.cards}")
             print()
             try:
-                card.value = int(input("Choose what value you want your Ace-ranked card to have (1 or 11): "))
+                value = int(input("Choose what value you want your Ace-ranked card to have (1 or 11): "))
             except:
                 print("That is not a valid value.")
-            while card.value not in [1, 11]:
+            while value not in [1, 11]:
                 try:
-                    card.value = int(input("Choose what value you want your Ace-ranked card to have (1 or 11): "))
+                    value = int(input("Choose what value you want your Ace-ranked card to have (1 or 11): "))
                 except:
                     print("That is not a valid value.")
             print()
-        self.value += card.value
-        self.hand.append(card)
-        self.cards = [card.__str__() for card in self.hand]
-        self.cards = ', '.join(self.cards)
+        self.add_card(card, value)
 
     def deal_cards(self, card):
+        value = card.value
         if card.rank == 'Ace':
             if self.value + 11 > 21:
-                card.value = 1
+                value = 1
             else:
-                card.value = 11
-        self.value += card.value
-        self.hand.append(card)
-        self.cards = [card.__str__() for card in self.hand]
-        self.cards = ', '.join(self.cards)
+                value = 11
+        self.add_card(card, value)
 
     def __str__(self):
         return self.cards
@@ -99,13 +254,9 @@ def double_down(chips):
 def split(hand):
 
     hand1 = Hand()
-    hand1.hand.append(hand.hand[0])
-    hand1.cards.append(hand.cards[0])
-    hand1.value = hand.hand[0].value
+    hand1.add_card(hand.hand[0], hand.values[0])
     hand2 = Hand()
-    hand2.hand.append(hand.hand[1])
-    hand2.cards.append(hand.cards[1])
-    hand2.value = hand.hand[1].value
+    hand2.add_card(hand.hand[1], hand.values[1])
     
     print("You chose to split your hand.")
     print(f"Your first hand: {hand1.cards}; value: {hand1.value}")
@@ -152,9 +303,10 @@ def break_even(player_hand, dealer_hand):
         return True
     else: return False
 
-def blackjack_check(hand):
-    if hand.value == 21 and len(hand.hand) == 2:
-        print("Blackjack!")
+def blackjack_check(hand, announce=True):
+    if hand.blackjack:
+        if announce:
+            print("Blackjack!")
         return True
     return False
 
@@ -181,6 +333,29 @@ def bust_check(player_hand):
         return True
     return False
 
+def round_outcome(player_hand, dealer_hand):
+    # Outcome of a finished round in which the player did not have blackjack
+    if bust_check(player_hand):
+        return 'bust'
+    if bust_check(dealer_hand):
+        return 'dealer_bust'
+    if player_hand.value > dealer_hand.value:
+        return 'win'
+    if player_hand.value < dealer_hand.value:
+        return 'lose'
+    return 'push'
+
+def pay_out(chips, outcome):
+    # Settles chips.bet for the outcome (blackjack pays 1.5x) and returns the net change
+    start_total = chips.total
+    if outcome == 'blackjack':
+        chips.total += int(chips.bet * 1.5)
+    elif outcome in ('win', 'dealer_bust'):
+        chips.win_bet()
+    elif outcome in ('lose', 'bust'):
+        chips.lose_bet()
+    return chips.total - start_total
+
 def surrender(chips):
     chips.total -= chips.bet / 2
     print(f"You surrendered. You lost half your bet. You now have {chips.total} chips.")
@@ -190,6 +365,20 @@ def surrender(chips):
 
 # Only run this if the script is executed directly (not imported by the GUI)
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play Blackjack in the terminal")
+    parser.add_argument('--decks', type=int, default=0, help="play from a persistent shoe of 1-8 decks (default: new single deck each round)")
+    parser.add_argument('--penetration', type=float, default=0.75, help="fraction of the shoe dealt before the cut card")
+    parser.add_argument('--count', action='store_true', help="show the Hi-Lo running and true count before each bet")
+    parser.add_argument('--seed', type=int, help="replay the same sequence of shuffles")
+    args = parser.parse_args()
+
+    the_deck = Shoe(args.decks, args.penetration, seed=args.seed) if args.decks else Deck(seed=args.seed)
+    counter = None
+    if args.count:
+        import counting
+        counter = counting.attach(the_deck)
     playing = True
     player_chips = Chips()
     while playing:
@@ -199,11 +388,12 @@ if __name__ == "__main__":
         print("You are the player and the computer is the dealer.")
         print()
 
-        the_deck = Deck()
-        the_deck.shuffle()
-        print("Shuffling the deck...")
-        print()
+        if the_deck.new_round():
+            print("Shuffling the deck...")
+            print()
 
+        if counter is not None:
+            print(f"Running count: {counter.running_count():+d}, true count: {counter.true_count():+.1f}")
         print(f"You have {player_chips.total} chips.")
         take_bet(player_chips)
         print()
@@ -225,7 +415,7 @@ if __name__ == "__main__":
                 print()
                 if choice == 'hit':
                     player_hit(player_hand)
-                    print(f"You received a {player_hand.cards.split(', ')[-1]}.")
+                    print(f"You received a {player_hand.hand[-1]}.")
                     print()
                     if bust_check(player_hand):
                         player_chips.lose_bet()
@@ -242,7 +432,7 @@ if __name__ == "__main__":
                     else:
                         double_down(player_chips)
                         player_hit(player_hand)
-                        print(f"You received a {player_hand.cards.split(', ')[-1]}.")
+                        print(f"You received a {player_hand.hand[-1]}.")
                         print()
                         if bust_check(player_hand):
                             player_chips.lose_bet()
@@ -257,7 +447,7 @@ if __name__ == "__main__":
                             print(f"You doubled down and now have {player_chips.total} chips.")
                             player_turn = False
                 elif choice == 'split':
-                    if len(player_hand.hand) != 2 or player_hand.hand[0].value != player_hand.hand[1].value:
+                    if not player_hand.pair:
                         print("You can only split if you have two cards of the same value.")
                     else:
                         player_hand1, player_hand2 = split(player_hand)
@@ -275,7 +465,7 @@ if __name__ == "__main__":
                                 choice1 = input("What do you want to do with your first hand, hit or stand? ")
                             if choice1 == 'hit':
                                 player_hit(player_hand1)
-                                print(f"You received a {player_hand1.cards.split(', ')[-1]}.")
+                                print(f"You received a {player_hand1.hand[-1]}.")
                                 if bust_check(player_hand1):
                                     player_chips.lose_bet()
                                     show_hands(player_hand1, dealer_hand)
@@ -293,7 +483,7 @@ if __name__ == "__main__":
                                 choice2 = input("What do you want to do with your second hand, hit or stand? ")
                             if choice2 == 'hit':
                                 player_hit(player_hand2)
-                                print(f"You received a {player_hand2.cards.split(', ')[-1]}.")
+                                print(f"You received a {player_hand2.hand[-1]}.")
                                 if bust_check(player_hand2):
                                     player_chips.lose_bet()
                                     show_hands(player_hand2, dealer_hand)
@@ -331,7 +521,7 @@ if __name__ == "__main__":
 
             while dealer_hand.value < 17:
                 dealer_hit(dealer_hand)
-                print(f"The dealer received a {dealer_hand.cards.split(', ')[-1]}.")
+                print(f"The dealer received a {dealer_hand.hand[-1]}.")
                 print()
                 reveal_hands(player_hand, dealer_hand)
                 print()
@@ -0,0 +1,314 @@
+"""
+Compact binary hand-history log, stored by column.
+
+A log file is a short header followed by segments, one per batch of rounds.
+A segment is stored column by column: its header, then each of COLUMNS for
+every round of the batch back to back, then the player's and the dealer's
+card codes, all little-endian. Cards are laid out one of two ways, and the
+segment header says which:
+- slots: one column per card position (every round's first card, then every
+  round's second card, ...), as many as the segment's largest hand, with 0
+  past the end of shorter hands. The vectorized engine hands its NumPy
+  arrays over in this layout.
+- packed: each round's cards back to back, player_count / dealer_count codes
+  per round. The per-round writer uses this, as padding hands to a common
+  width in Python would cost more than the rest of a round's record.
+The writer needs only the standard library, so the GUI and CLI can log
+without NumPy; it keeps a batch's rounds as given and builds each column
+once per batch. The reader memory-maps the file and views every segment's
+columns as NumPy arrays in place, so nothing is copied, and the aggregate
+queries walk the log a segment at a time, so memory use does not grow with
+the log.
+
+Columns (per round):
+    player_count, dealer_count   number of cards in each hand
+    start_total                  player's two-card total
+    player_total, dealer_total   final totals
+    outcome                      index into game_logic.OUTCOMES
+    actions                      player actions in order: H(it), S(tand), D(ouble), P (split), I(nsurance), R (surrender)
+    bet, net                     chips bet and chips won (+) or lost (-)
+    player_cards, dealer_cards   card codes (index into game_logic.CARDS), see HandLog.cards()
+The dealer's upcard is the first of dealer_cards (HandLog.upcards()).
+
+Usage:
+    python vector_engine.py --rounds 10000000 --log hands.bjl
+    python hand_log.py hands.bjl
+"""
+import os
+import struct
+import sys
+import time
+from array import array
+
+import game_logic
+
+
+MAGIC = b'BJHL'
+VERSION = 2
+HEADER = struct.Struct('<4sH58x')  # magic, version, padded to 64 bytes
+SEGMENT = struct.Struct('<IHH')    # rounds, player and dealer card slots (0: packed)
+MAX_ACTIONS = 12                   # longer action strings are cut short
+
+# (name, NumPy dtype, bytes per round), in the order they are stored
+COLUMNS = (
+    ('player_count', 'u1', 1),
+    ('dealer_count', 'u1', 1),
+    ('start_total', 'u1', 1),
+    ('player_total', 'u1', 1),
+    ('dealer_total', 'u1', 1),
+    ('outcome', 'u1', 1),
+    ('actions', f'S{MAX_ACTIONS}', MAX_ACTIONS),
+    ('bet', '<i4', 4),
+    ('net', '<i4', 4),
+)
+HANDS = ('player', 'dealer')
+
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(game_logic.OUTCOMES)}
+ROUND_FIELDS = 9  # values record() keeps per round
+
+
+class HandLogWriter:
+    """
+    Appends rounds to a log file, writing a segment every batch_size rounds.
+    - record(...): one round from its final Hands
+    - record_batch(columns): a whole segment of NumPy columns, e.g. from vector_engine
+    Use as a context manager, or call close() to flush the last batch.
+    """
+
+    def __init__(self, path, batch_size=8192):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'ab')
+        if new_file:
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.batch_size = batch_size
+        # The batch so far: ROUND_FIELDS values per round (see record()) and everyone's cards
+        self.rounds = []
+        self.player_cards = []
+        self.dealer_cards = []
+
+    def record(self, player_hand, dealer_hand, actions, bet, outcome, net):
+        """Logs one round from its final game_logic.Hand objects."""
+        player_cards = player_hand.hand
+        dealer_cards = dealer_hand.hand
+        values = player_hand.values
+        self.player_cards += player_cards
+        self.dealer_cards += dealer_cards
+        rounds = self.rounds
+        rounds += (len(player_cards), len(dealer_cards), values[0] + values[1], player_hand.value, dealer_hand.value,
+                   OUTCOME_CODES[outcome], actions, bet, net)
+        if len(rounds) >= ROUND_FIELDS * self.batch_size:
+            self.flush()
+
+    def record_batch(self, columns):
+        """
+        Logs a batch as one segment from {name: C-contiguous NumPy array}: every
+        entry of COLUMNS with shape (rounds,), and player_cards / dealer_cards in
+        the slots layout, shape (slots, rounds). Any integer dtype that fits will do.
+        """
+        self.flush()
+        parts = [SEGMENT.pack(len(columns['outcome']), len(columns['player_cards']), len(columns['dealer_cards']))]
+        for name, dtype, _ in COLUMNS:
+            parts.append(columns[name].astype(dtype, copy=False).data)
+        for hand in HANDS:
+            parts.append(columns[hand + '_cards'].astype('u1', copy=False).data)
+        self.file.writelines(parts)
+
+    def flush(self):
+        """Writes the rounds recorded so far as one segment, cards packed."""
+        rounds = self.rounds
+        if not rounds:
+            return
+        count = len(rounds) // ROUND_FIELDS
+        bets = array('i', rounds[7::ROUND_FIELDS])
+        nets = array('i', rounds[8::ROUND_FIELDS])
+        if sys.byteorder == 'big':
+            bets.byteswap()
+            nets.byteswap()
+        parts = [SEGMENT.pack(count, 0, 0)]
+        parts += [bytes(rounds[field::ROUND_FIELDS]) for field in range(6)]  # the one-byte columns, in COLUMNS order
+        parts += [
+            struct.pack(f'{MAX_ACTIONS}s' * count, *map(str.encode, rounds[6::ROUND_FIELDS])),
+            bets,
+            nets,
+            bytes([card.code for card in self.player_cards]),
+            bytes([card.code for card in self.dealer_cards]),
+        ]
+        self.file.writelines(parts)
+        self.rounds = []
+        self.player_cards = []
+        self.dealer_cards = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def append_log(path, part_path):
+    """Appends the segments of another log file (e.g. one simulator worker's) to path, then deletes it."""
+    with open(part_path, 'rb') as part:
+        part.seek(HEADER.size)
+        with HandLogWriter(path) as writer:
+            writer.flush()
+            while True:
+                chunk = part.read(1 << 24)
+                if not chunk:
+                    break
+                writer.file.write(chunk)
+    os.remove(part_path)
+
+
+class HandLog:
+    """
+    Read-only, memory-mapped view of a hand log.
+    - segments: one dict per segment of its columns (NumPy arrays viewing the mapped
+      file in place) and its card layout (player_slots, dealer_slots)
+    - column(name): one of COLUMNS across every round (a view for a single-segment log, else a copy)
+    - cards(segment, hand): a segment's player or dealer cards as a (rounds, slots) array
+    - upcards(segment): the value of each round's dealer upcard (2..11)
+    A segment cut short by a crash mid-write is left out.
+    """
+
+    def __init__(self, path):
+        import numpy as np
+
+        with open(path, 'rb') as f:
+            magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} hand log")
+        size = os.path.getsize(path)
+        data = np.memmap(path, dtype=np.uint8, mode='r') if size > HEADER.size else np.empty(0, dtype=np.uint8)
+        self.segments = []
+        self.count = 0
+        offset = HEADER.size
+        while offset + SEGMENT.size <= size:
+            count, player_slots, dealer_slots = SEGMENT.unpack(data[offset:offset + SEGMENT.size])
+            end = offset + SEGMENT.size + count * sum(width for _, _, width in COLUMNS)
+            if end > size:
+                break
+            segment = {'player_slots': player_slots, 'dealer_slots': dealer_slots}
+            offset += SEGMENT.size
+            for name, dtype, width in COLUMNS:
+                segment[name] = data[offset:offset + count * width].view(dtype)
+                offset += count * width
+            for hand in HANDS:
+                slots = segment[hand + '_slots']
+                end = offset + (count * slots if slots else int(segment[hand + '_count'].sum()))
+                segment[hand + '_cards'] = data[offset:end]
+                offset = end
+            if offset > size:
+                break
+            self.segments.append(segment)
+            self.count += count
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        """One of COLUMNS across every round."""
+        import numpy as np
+
+        columns = [segment[name] for segment in self.segments]
+        if len(columns) == 1:
+            return columns[0]
+        return np.concatenate(columns) if columns else np.empty(0)
+
+    @staticmethod
+    def cards(segment, hand):
+        """
+        Card codes of one segment's 'player' or 'dealer' hands, one row per round
+        and 0 past the end of each hand: a view of the slots layout, or the packed
+        layout spread out into a new array.
+        """
+        import numpy as np
+
+        codes = segment[hand + '_cards']
+        counts = segment[hand + '_count']
+        slots = segment[hand + '_slots']
+        if slots:
+            return codes.reshape(slots, len(counts)).T
+        cards = np.zeros((len(counts), counts.max(initial=0)), dtype=np.uint8)
+        cards[np.arange(cards.shape[1]) < counts[:, None]] = codes
+        return cards
+
+    @staticmethod
+    def upcards(segment):
+        """Value of each round's dealer upcard (2..11), from the first of its dealer_cards."""
+        import numpy as np
+
+        codes = segment['dealer_cards']
+        if segment['dealer_slots']:
+            first = codes[:len(segment['dealer_count'])]
+        else:
+            counts = segment['dealer_count']
+            first = codes[np.cumsum(counts, dtype=np.int64) - counts]
+        return np.array([card.value for card in game_logic.CARDS], dtype=np.uint8)[first]
+
+    def _rate_by(self, key, hit, minlength):
+        """
+        (count, rate) per key value, where key(segment) gives each round's key and
+        rate is the fraction of rounds for which hit(segment) is true.
+        """
+        import numpy as np
+
+        totals = np.zeros(minlength, dtype=np.int64)
+        hits = np.zeros(minlength, dtype=np.int64)
+        for chunk in self.segments:
+            keys = key(chunk)
+            totals += np.bincount(keys, minlength=minlength)
+            hits += np.bincount(keys[hit(chunk)], minlength=minlength)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return totals, hits / totals
+
+    def win_rate_by_upcard(self):
+        """{upcard value: (rounds, fraction won)}; a round is won when net > 0."""
+        totals, rates = self._rate_by(self.upcards, lambda chunk: chunk['net'] > 0, 12)
+        return {up: (int(totals[up]), float(rates[up])) for up in range(2, 12) if totals[up]}
+
+    def bust_rate_by_player_total(self):
+        """{two-card starting total: (rounds, fraction the player busted)}."""
+        bust = OUTCOME_CODES['bust']
+        totals, rates = self._rate_by(lambda chunk: chunk['start_total'], lambda chunk: chunk['outcome'] == bust, 23)
+        return {total: (int(totals[total]), float(rates[total])) for total in range(23) if totals[total]}
+
+    def net_by_bet(self):
+        """{bet: (rounds, total net, mean net per round)}."""
+        import numpy as np
+
+        rounds = {}
+        nets = {}
+        for chunk in self.segments:
+            bets, inverse = np.unique(chunk['bet'], return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(bets))
+            sums = np.bincount(inverse, weights=chunk['net'], minlength=len(bets))
+            for bet, count, total in zip(bets.tolist(), counts.tolist(), sums.tolist()):
+                rounds[bet] = rounds.get(bet, 0) + count
+                nets[bet] = nets.get(bet, 0) + total
+        return {bet: (rounds[bet], int(nets[bet]), nets[bet] / rounds[bet]) for bet in sorted(rounds)}
+
+
+def main(path):
+    log = HandLog(path)
+    print(f"{path}: {len(log):,} hands")
+    queries = (
+        ("Win rate by dealer upcard", log.win_rate_by_upcard, "upcard"),
+        ("Bust rate by player's starting total", log.bust_rate_by_player_total, "total"),
+        ("Net chips by bet size", log.net_by_bet, "bet"),
+    )
+    for title, query, key in queries:
+        start = time.perf_counter()
+        result = query()
+        print(f"\n{title} ({time.perf_counter() - start:.2f}s)")
+        for value, stats in result.items():
+            print(f"  {key} {value:>4}: " + "  ".join(f"{s:,.4f}" if isinstance(s, float) else f"{s:,}" for s in stats))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python hand_log.py LOG_FILE")
+    main(sys.argv[1])
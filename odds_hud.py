@@ -0,0 +1,188 @@
+"""
+Live win/push/lose odds for Hit and Stand in the GUI.
+
+The calculation (win_odds.action_odds, with draws taken out of the counts to
+DEPTH cards deep) takes up to about half a second on low totals, so it never
+runs on the GUI thread: show_odds() only builds the game-state key
+(player total, upcard value, unseen card counts - a few microseconds) and
+either shows a cached result at once or starts a job on the HUD's own
+one-thread QThreadPool. When the hand changes, the job for the old state is
+cancelled: one not yet started is taken off the queue, and a running one sees
+its cancel flag at the next dealer lookup and stops. A finished result is
+cached by its key and shown only if it is still for the current hand.
+
+The pool thread only waits: the calculation itself runs in a single worker
+process (win_odds.worker_odds), so it never holds this interpreter's lock
+and the GUI thread does not wait behind it. The process is started with the
+first job, at a lower scheduling priority (WORKER_NICENESS) so that it also
+gives way to the GUI for the CPU, and keeps its dealer lookups cached between
+jobs; a cancel is passed on to it through a shared Event. If the job fails
+instead (the worker process died, or the calculation raised), the HUD says
+the odds are unavailable for that hand and the next job starts a new worker.
+"""
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from PySide6.QtCore import QRunnable, QThreadPool, Signal
+from PySide6.QtWidgets import QLabel
+
+import tracing
+import win_odds
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = 4096
+# Within 0.1 percentage point of the exact odds, and an order of magnitude faster on low totals
+DEPTH = 2
+WORKER_NICENESS = 10
+
+
+class _Compute(QRunnable):
+    """Works out action_odds for one game state on a pool thread."""
+
+    def __init__(self, hud, key):
+        super().__init__()
+        # Owned by Python, so the HUD can still cancel it after the pool has run it
+        self.setAutoDelete(False)
+        self.hud = hud
+        self.key = key
+        self.cancel = threading.Event()
+
+    def run(self):
+        if self.cancel.is_set():
+            return
+        # Jobs run one at a time, so the worker's Event is this job's until it finishes;
+        # checked again after clearing it, in case the job was cancelled in between
+        self.hud._worker_cancel.clear()
+        if self.cancel.is_set():
+            return
+        total, upcard_value, counts = self.key
+        with tracing.span("win_odds", total=total, upcard=upcard_value):
+            processes = self.hud._worker()
+            try:
+                odds = processes.submit(win_odds.worker_odds, total, upcard_value, counts, DEPTH).result()
+            except win_odds.Cancelled:
+                return
+            except Exception:
+                # e.g. BrokenProcessPool: the worker is replaced for the next job
+                logger.exception("Odds calculation failed for %s", self.key)
+                self.hud._discard_worker(processes)
+                self.hud._failed.emit(self.key)
+                return
+        if not self.cancel.is_set():
+            self.hud._computed.emit(self.key, odds)
+
+
+class OddsHud(QLabel):
+    """
+    Label with the odds of each action for the player's current hand.
+    - show_odds(player_hand, upcard, unseen_counts): shows the odds for this state, as soon as they are known
+    - clear(): hides the odds and cancels any calculation
+    - shutdown(): clear(), then waits for a cancelled calculation to stop and ends the worker process
+      (before the HUD is destroyed)
+    - waiting: True while the odds for the current hand are still being worked out
+    - requested, computed, cache_hits, cancelled, failed: states asked for, calculations finished,
+      states answered from the cache, calculations dropped because the hand changed
+      and calculations that raised
+    """
+    _computed = Signal(object, object)
+    _failed = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        # Spawned rather than forked: this process runs Qt and other threads
+        self._context = multiprocessing.get_context('spawn')
+        self._worker_cancel = self._context.Event()
+        self._processes = None
+        self._processes_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._job = None
+        self._key = None
+        self.requested = 0
+        self.computed = 0
+        self.cache_hits = 0
+        self.cancelled = 0
+        self.failed = 0
+        self._computed.connect(self._on_computed)
+        self._failed.connect(self._on_failed)
+
+    def show_odds(self, player_hand, upcard, unseen_counts):
+        key = (player_hand.value, upcard.value, tuple(unseen_counts))
+        if key == self._key:
+            return
+        self._cancel()
+        self._key = key
+        self.requested += 1
+        odds = self._cache.get(key)
+        if odds is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            self._display(odds)
+            return
+        self.setText("Odds: working them out...")
+        self._job = _Compute(self, key)
+        self.pool.start(self._job)
+
+    @property
+    def waiting(self):
+        return self._job is not None
+
+    def clear(self):
+        self._cancel()
+        self._key = None
+        self.setText("")
+
+    def shutdown(self):
+        self.clear()
+        self.pool.waitForDone()
+        if self._processes is not None:
+            self._processes.shutdown()
+            self._processes = None
+
+    def _worker(self):
+        with self._processes_lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=1, mp_context=self._context,
+                                                      initializer=win_odds.init_worker,
+                                                      initargs=(self._worker_cancel, WORKER_NICENESS))
+            return self._processes
+
+    def _discard_worker(self, processes):
+        """Drops a worker pool that failed, unless it was already replaced."""
+        with self._processes_lock:
+            if self._processes is processes:
+                self._processes = None
+        processes.shutdown(wait=False, cancel_futures=True)
+
+    def _cancel(self):
+        if self._job is not None:
+            self._job.cancel.set()
+            self._worker_cancel.set()
+            self.pool.tryTake(self._job)
+            self._job = None
+            self.cancelled += 1
+
+    def _on_computed(self, key, odds):
+        self.computed += 1
+        self._cache[key] = odds
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        if key == self._key:
+            self._job = None
+            self._display(odds)
+
+    def _on_failed(self, key):
+        self.failed += 1
+        if key == self._key:
+            self._job = None
+            self.setText("Odds: unavailable for this hand")
+
+    def _display(self, odds):
+        self.setText("   ".join(f"{action.title()}: win {odds[action][0]:.0%}  push {odds[action][1]:.0%}  "
+                                f"lose {odds[action][2]:.0%}" for action in win_odds.ACTIONS))
@@ -0,0 +1,276 @@
+"""
+Strategy-parameter search: finds the best stand thresholds and bet ramp by
+simulation, racing the candidates against each other.
+
+A candidate is a ParamPolicy's parameters:
+- stand_on: the total the player stands on against each dealer upcard 2..11
+- ramp: bet in units for each true count (Hi-Lo); ramp[0] is bet at a true count
+  of 1 or less, ramp[i] at i + 1, and the last entry at anything higher
+
+Candidates are scored by their mean net result per round, in units, over
+rounds played from a shoe with the game_logic rules (simulate.play_round).
+Rather than giving every candidate the same large number of rounds, the search
+plays them in batches and, after each batch, drops every candidate whose upper
+confidence bound is below the best lower bound among the others. The bounds
+use a z value corrected for the number of candidates and of looks at the data
+(Bonferroni), so the chance of ever dropping the true best is at most alpha.
+The search stops when one candidate is left, every candidate has had
+max_rounds, or the survivors are all within tolerance of each other.
+
+Each batch is cut into fixed-size chunks, and every (candidate, chunk) pair is
+one job for the process pool, so the work per batch is spread over the cores
+while candidates remain. Each chunk's stream is split from the search seed by
+batch and chunk (see streams), not by candidate or worker: every candidate
+is dealt the same shoes, and results are reproducible for any --workers.
+
+Usage:
+    python optimizer.py --candidates 32 --workers 8
+    python optimizer.py --search stand --max-rounds 2000000 --json best.json
+    python optimizer.py --candidates 16 --scaling
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import counting
+import game_logic
+import simulate
+import streams
+
+
+UPCARDS = tuple(range(2, 12))
+STAND_RANGE = (12, 18)
+RAMP_UNITS = (1, 2, 3, 4, 6, 8, 10, 12)
+CHUNK_ROUNDS = 5_000
+BASELINE = ((17,) * len(UPCARDS), (1,))
+
+
+class ParamPolicy:
+    """
+    Policy with a stand total per dealer upcard and a bet ramp keyed on the
+    Hi-Lo true count. counter is a counting.CardCounter on the shoe being
+    played (see counting.attach); without one, the first ramp entry is bet.
+    """
+    def __init__(self, stand_on=BASELINE[0], ramp=BASELINE[1], unit=10, counter=None):
+        self.stand_on = tuple(stand_on)
+        self.ramp = tuple(ramp)
+        self.unit = unit
+        self.counter = counter
+
+    def bet(self, chips):
+        if self.counter is None or len(self.ramp) == 1:
+            return self.ramp[0] * self.unit
+        count = int(self.counter.true_count())
+        return self.ramp[min(max(count, 1), len(self.ramp)) - 1] * self.unit
+
+    def hit(self, player_hand, upcard):
+        return player_hand.value < self.stand_on[upcard.value - 2]
+
+
+def format_params(params):
+    stand_on, ramp = params
+    names = ('A' if up == 11 else str(up) for up in UPCARDS)
+    return ("stand " + " ".join(f"{name}:{total}" for name, total in zip(names, stand_on))
+            + "  ramp " + "-".join(map(str, ramp)))
+
+
+def random_candidates(count, rng, search=('stand', 'ramp')):
+    """
+    The baseline (stand on 17, flat bet) followed by count - 1 distinct random
+    candidates; search says which parameters vary.
+    """
+    candidates = [BASELINE]
+    seen = set(candidates)
+    # Bounded, in case the space is smaller than count
+    for _ in range(count * 100):
+        if len(candidates) >= count:
+            break
+        stand_on = (tuple(rng.randint(*STAND_RANGE) for _ in UPCARDS) if 'stand' in search else BASELINE[0])
+        ramp = ((1,) + tuple(sorted(rng.sample(RAMP_UNITS[1:], rng.randint(1, 4)))) if 'ramp' in search
+                else BASELINE[1])
+        if (stand_on, ramp) not in seen:
+            seen.add((stand_on, ramp))
+            candidates.append((stand_on, ramp))
+    return candidates
+
+
+# --- Evaluation ---
+
+def evaluate(params, rounds, seed, decks, penetration):
+    """
+    Plays rounds from one Shoe with a ParamPolicy for params, shuffled by the
+    chunk's stream (seed is a streams.Stream or a root key).
+    Returns (rounds, sum of net in units, sum of squares).
+    """
+    shoe = game_logic.Shoe(decks, penetration, streams.stream(seed))
+    policy = ParamPolicy(*params, unit=1, counter=counting.attach(shoe))
+    chips = game_logic.Chips()
+    play_round = simulate.play_round
+    total = squares = 0.0
+    for _ in range(rounds):
+        shoe.new_round()
+        _, net = play_round(shoe, chips, policy)
+        total += net
+        squares += net * net
+    return rounds, total, squares
+
+
+def _evaluate_args(args):
+    return evaluate(*args)
+
+
+class Candidate:
+    """Running totals for one candidate; bounds() gives mean -/+ z standard errors."""
+    def __init__(self, params):
+        self.params = params
+        self.rounds = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.dropped_after = None
+
+    def add(self, rounds, total, squares):
+        self.rounds += rounds
+        self.total += total
+        self.squares += squares
+
+    @property
+    def mean(self):
+        return self.total / self.rounds
+
+    def half_width(self, z):
+        if self.rounds < 2:
+            return float('inf')
+        variance = (self.squares - self.rounds * self.mean ** 2) / (self.rounds - 1)
+        return z * math.sqrt(max(variance, 0.0) / self.rounds)
+
+    def bounds(self, z):
+        half_width = self.half_width(z)
+        return self.mean - half_width, self.mean + half_width
+
+
+def optimize(candidates, workers=None, seed=0, batch_rounds=20_000, max_rounds=1_000_000, alpha=0.05,
+             tolerance=0.0, decks=6, penetration=0.75, progress=None):
+    """
+    Races candidates (a list of (stand_on, ramp) params) as described above.
+    progress, if given, is called after each batch with (batch, live candidates).
+    Returns {'best': Candidate, 'ci95': (low, high), 'survivors': [Candidate] best first,
+    'dropped': [Candidate], 'batches', 'rounds' (all candidates), 'fixed_rounds'
+    (what max_rounds for every candidate would have cost), 'seconds',
+    'rounds_per_sec', 'candidates_per_min'}.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = max(1, batch_rounds // CHUNK_ROUNDS)
+    chunk_sizes = [batch_rounds // chunks + (1 if i < batch_rounds % chunks else 0) for i in range(chunks)]
+    looks = max(1, math.ceil(max_rounds / batch_rounds))
+    z = NormalDist().inv_cdf(1 - alpha / (2 * max(len(candidates) - 1, 1) * looks))
+    live = [Candidate(params) for params in candidates]
+    dropped = []
+
+    start = time.perf_counter()
+    root = streams.stream(seed)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        batch = 0
+        while True:
+            jobs = [(candidate.params, size, root.split(batch, chunk), decks, penetration)
+                    for candidate in live for chunk, size in enumerate(chunk_sizes)]
+            results = pool.map(_evaluate_args, jobs) if pool else map(_evaluate_args, jobs)
+            for i, result in enumerate(results):
+                live[i // chunks].add(*result)
+            batch += 1
+
+            # Sequential test: drop anything whose best case is worse than another's worst case
+            bounds = [candidate.bounds(z) for candidate in live]
+            best_low = max(low for low, _ in bounds)
+            keep = []
+            for candidate, (low, high) in zip(live, bounds):
+                if high < best_low:
+                    candidate.dropped_after = batch
+                    dropped.append(candidate)
+                else:
+                    keep.append(candidate)
+            live = keep
+            if progress is not None:
+                progress(batch, live)
+            if (len(live) == 1 or live[0].rounds >= max_rounds
+                    or max(high for _, high in bounds) - best_low <= tolerance):
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+
+    live.sort(key=lambda candidate: candidate.mean, reverse=True)
+    best = live[0]
+    rounds = sum(candidate.rounds for candidate in live + dropped)
+    return {'best': best, 'ci95': best.bounds(1.96), 'survivors': live, 'dropped': dropped,
+            'batches': batch, 'rounds': rounds, 'fixed_rounds': len(candidates) * max_rounds,
+            'seconds': elapsed, 'rounds_per_sec': rounds / elapsed if elapsed else 0.0,
+            'candidates_per_min': len(candidates) * 60 / elapsed if elapsed else 0.0}
+
+
+def print_report(results):
+    best = results['best']
+    low, high = results['ci95']
+    print(f"{results['batches']} batches, {results['rounds']:,} rounds in {results['seconds']:.1f}s "
+          f"({results['rounds_per_sec']:,.0f} rounds/sec, {results['candidates_per_min']:.1f} candidates/min); "
+          f"a fixed {results['fixed_rounds']:,} rounds would be x{results['fixed_rounds'] / results['rounds']:.1f}")
+    print(f"Best: {format_params(best.params)}")
+    print(f"  {best.mean:+.4f} units/round, 95% interval [{low:+.4f}, {high:+.4f}] over {best.rounds:,} rounds")
+    if len(results['survivors']) > 1:
+        print("Not separated from the best:")
+        for candidate in results['survivors'][1:]:
+            print(f"  {candidate.mean:+.4f}  {format_params(candidate.params)}")
+    print(f"Dropped early: {len(results['dropped'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race stand-threshold and bet-ramp candidates to find the best")
+    parser.add_argument('--candidates', type=int, default=32, help="random candidates, including the stand-on-17 flat-bet baseline")
+    parser.add_argument('--search', choices=('both', 'stand', 'ramp'), default='both', help="which parameters vary")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch-rounds', type=int, default=20_000, help="rounds per candidate between tests")
+    parser.add_argument('--max-rounds', type=int, default=1_000_000, help="rounds per candidate at most")
+    parser.add_argument('--alpha', type=float, default=0.05, help="chance of dropping the true best at any point")
+    parser.add_argument('--tolerance', type=float, default=0.0, help="stop once the survivors are this close (units/round)")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--penetration', type=float, default=0.75)
+    parser.add_argument('--json', metavar='PATH', help="also write the best parameters and interval as JSON")
+    parser.add_argument('--scaling', action='store_true', help="report candidates/min for 1..workers processes")
+    args = parser.parse_args()
+
+    search = ('stand', 'ramp') if args.search == 'both' else (args.search,)
+    candidates = random_candidates(args.candidates, random.Random(args.seed), search)
+    options = dict(seed=args.seed, batch_rounds=args.batch_rounds, max_rounds=args.max_rounds, alpha=args.alpha,
+                   tolerance=args.tolerance, decks=args.decks, penetration=args.penetration)
+    if args.scaling:
+        baseline = None
+        for workers in range(1, args.workers + 1):
+            results = optimize(candidates, workers, **options)
+            baseline = baseline or results['candidates_per_min']
+            print(f"{workers:>3} workers: {results['candidates_per_min']:>8.1f} candidates/min  "
+                  f"(x{results['candidates_per_min'] / baseline:.2f})")
+        return
+
+    def progress(batch, live):
+        print(f"  batch {batch}: {len(live)} of {len(candidates)} left, {live[0].rounds:,} rounds each", flush=True)
+
+    results = optimize(candidates, args.workers, progress=progress, **options)
+    print_report(results)
+    if args.json:
+        best = results['best']
+        stand_on, ramp = best.params
+        with open(args.json, 'w') as f:
+            json.dump({'stand_on': dict(zip(map(str, UPCARDS), stand_on)), 'ramp': ramp, 'mean': best.mean,
+                       'ci95': results['ci95'], 'rounds': best.rounds, 'decks': args.decks,
+                       'penetration': args.penetration}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
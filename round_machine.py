@@ -0,0 +1,148 @@
+"""
+Event-driven round state machine for Blackjack.
+
+A round moves through explicit states:
+    betting -> dealing -> player_turn -> dealer_turn -> settlement -> betting
+(or game_over once the player has no chips left). Each action is a method call
+that advances the state and returns; the machine reports what happened through
+Qt signals instead of opening dialogs, so nothing nests and the call stack is
+the same depth in the thousandth round as in the first.
+
+The GUI calls the action methods from button handlers. Headless drivers (tests,
+benchmarks, simulators) call them from a plain loop, checking state and
+pending_ace between calls. No event loop is needed since every signal is
+delivered directly.
+"""
+from PySide6.QtCore import QObject, Signal
+
+import game_logic
+import tracing
+
+
+BETTING = 'betting'
+DEALING = 'dealing'
+PLAYER_TURN = 'player_turn'
+DEALER_TURN = 'dealer_turn'
+SETTLEMENT = 'settlement'
+GAME_OVER = 'game_over'
+
+
+class RoundMachine(QObject):
+    """
+    Plays rounds for one player against the dealer from a Deck or Shoe.
+    - place_bet(bet): starts a round from the betting state
+    - choose_ace(value): answers ace_choice_needed (1 or 11)
+    - hit() / stand(): player actions during player_turn
+    Signals:
+    - state_changed(state) on every transition
+    - hands_changed() whenever cards are added to either hand
+    - ace_choice_needed() when the player draws an Ace; the round waits for choose_ace
+    - round_settled(outcome, net) once per round, with an entry of game_logic.OUTCOMES
+    actions holds the player's moves this round ('H' hit, 'S' stand). With a
+    hand_log.HandLogWriter as log, every settled round is also written to it.
+    """
+    state_changed = Signal(str)
+    hands_changed = Signal()
+    ace_choice_needed = Signal()
+    round_settled = Signal(str, int)
+
+    def __init__(self, deck, chips, parent=None, log=None):
+        super().__init__(parent)
+        self.deck = deck
+        self.chips = chips
+        self.state = BETTING if chips.total > 0 else GAME_OVER
+        self.player_hand = game_logic.Hand()
+        self.dealer_hand = game_logic.Hand()
+        self.pending_ace = None
+        self.outcome = None
+        self.actions = ''
+        self.log = log
+
+    def _set_state(self, state):
+        self.state = state
+        self.state_changed.emit(state)
+
+    def _require(self, state, action):
+        if self.state != state or self.pending_ace is not None:
+            waiting = " (waiting for an Ace value)" if self.pending_ace is not None else ""
+            raise RuntimeError(f"Cannot {action} during {self.state}{waiting}.")
+
+    def place_bet(self, bet):
+        self._require(BETTING, "bet")
+        if not 1 <= bet <= self.chips.total:
+            raise ValueError(f"Bet must be between 1 and {self.chips.total}.")
+        self.chips.bet = bet
+        self.deck.new_round()
+        self.player_hand = game_logic.Hand()
+        self.dealer_hand = game_logic.Hand()
+        self.outcome = None
+        self.actions = ''
+        self._set_state(DEALING)
+        self._deal()
+
+    def _deal(self):
+        # Player's two cards first (each Ace waits for choose_ace), then the dealer's two
+        with tracing.span("deal_hands"):
+            while len(self.player_hand.hand) < 2:
+                card = self.deck.deal()
+                if card.rank == 'Ace':
+                    self.pending_ace = card
+                    self.ace_choice_needed.emit()
+                    return
+                self.player_hand.add_card(card, card.value)
+            for _ in range(2):
+                self.dealer_hand.deal_cards(self.deck.deal())
+            self.hands_changed.emit()
+        if self.player_hand.blackjack:
+            self._settle('blackjack')
+        else:
+            self._set_state(PLAYER_TURN)
+
+    def choose_ace(self, value):
+        if self.pending_ace is None:
+            raise RuntimeError("There is no Ace waiting for a value.")
+        if value not in (1, 11):
+            raise ValueError("An Ace is worth 1 or 11.")
+        self.player_hand.add_card(self.pending_ace, value)
+        self.pending_ace = None
+        if self.state == DEALING:
+            self._deal()
+        else:
+            self.hands_changed.emit()
+            self._after_player_card()
+
+    def hit(self):
+        self._require(PLAYER_TURN, "hit")
+        self.actions += 'H'
+        card = self.deck.deal()
+        if card.rank == 'Ace':
+            self.pending_ace = card
+            self.ace_choice_needed.emit()
+            return
+        self.player_hand.add_card(card, card.value)
+        self.hands_changed.emit()
+        self._after_player_card()
+
+    def _after_player_card(self):
+        if game_logic.bust_check(self.player_hand):
+            self._settle('bust')
+
+    def stand(self):
+        self._require(PLAYER_TURN, "stand")
+        self.actions += 'S'
+        self._set_state(DEALER_TURN)
+        # Dealer draws to 17 (Hand.deal_cards applies the dealer's Ace rule)
+        with tracing.span("dealer_draw"):
+            while self.dealer_hand.value < 17:
+                self.dealer_hand.deal_cards(self.deck.deal())
+            self.hands_changed.emit()
+        self._settle(game_logic.round_outcome(self.player_hand, self.dealer_hand))
+
+    def _settle(self, outcome):
+        self.outcome = outcome
+        self._set_state(SETTLEMENT)
+        net = game_logic.pay_out(self.chips, outcome)
+        if self.log is not None:
+            self.log.record(self.player_hand, self.dealer_hand, self.actions, self.chips.bet, outcome, net)
+        self.round_settled.emit(outcome, net)
+        self._set_state(BETTING if self.chips.total > 0 else GAME_OVER)
@@ -0,0 +1,380 @@
+"""
+Headless Monte Carlo simulator for the Blackjack game.
+
+Plays rounds with the rules in game_logic (no Qt, no input() prompts) using a
+pluggable player policy, sharding the work across a process pool.
+
+With --target-ci or --progress-every, rounds are played in chunks whose
+streaming statistics (stats.RoundStats) are merged in chunk order as they
+arrive: progress lines show the current 95% interval, and the run stops as
+soon as the interval is as narrow as the target. With --checkpoint, such a
+run also saves its progress (checkpoint.py) and --resume continues it from
+there after an interruption, with the same result as an uninterrupted run.
+
+Usage:
+    python simulate.py --rounds 1000000 --workers 8
+    python simulate.py --rounds 200000 --scaling
+    python simulate.py --rounds 1000000000 --target-ci 0.01 --progress-every 5
+    python simulate.py --rounds 1000000000 --checkpoint run.bjck --resume
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import checkpoint
+import game_logic
+import hand_log
+import stats
+import streams
+
+
+OUTCOMES = game_logic.OUTCOMES
+
+
+class StandOnPolicy:
+    """
+    Player policy that hits until the hand reaches a fixed total (the dealer's
+    rule by default) and always bets the same amount.
+    A policy only needs bet(chips) and hit(player_hand, upcard) methods.
+    """
+    def __init__(self, threshold=17, bet=10):
+        self.threshold = threshold
+        self.flat_bet = bet
+
+    def bet(self, chips):
+        return self.flat_bet
+
+    def hit(self, player_hand, upcard):
+        return player_hand.value < self.threshold
+
+
+def play_round(deck, chips, policy, log=None):
+    """
+    Plays one round from a shuffled deck following the GUI's round flow:
+    - Player and dealer get two cards each (Aces valued as in Hand.deal_cards)
+    - A player blackjack pays 1.5x the bet immediately
+    - Player hits while the policy asks to, losing on a bust
+    - Dealer draws to 17, then the hands are compared
+    If log is a hand_log.HandLogWriter, the round is also written to it.
+    Returns: (outcome, net chips won or lost this round).
+    """
+    chips.bet = policy.bet(chips)
+
+    player_hand = game_logic.Hand()
+    dealer_hand = game_logic.Hand()
+    player_hand.deal_cards(deck.deal())
+    player_hand.deal_cards(deck.deal())
+    dealer_hand.deal_cards(deck.deal())
+    dealer_hand.deal_cards(deck.deal())
+
+    hits = 0
+    if game_logic.blackjack_check(player_hand, announce=False):
+        outcome = 'blackjack'
+    else:
+        upcard = dealer_hand.hand[0]
+        while policy.hit(player_hand, upcard):
+            player_hand.deal_cards(deck.deal())
+            hits += 1
+            if game_logic.bust_check(player_hand):
+                break
+        if not game_logic.bust_check(player_hand):
+            while dealer_hand.value < 17:
+                dealer_hand.deal_cards(deck.deal())
+        outcome = game_logic.round_outcome(player_hand, dealer_hand)
+
+    net = game_logic.pay_out(chips, outcome)
+    if log is not None:
+        actions = 'H' * hits + ('S' if outcome not in ('blackjack', 'bust') else '')
+        log.record(player_hand, dealer_hand, actions, chips.bet, outcome, net)
+    return outcome, net
+
+
+def empty_results():
+    return {'rounds': 0, 'net': 0, 'outcomes': dict.fromkeys(OUTCOMES, 0)}
+
+
+def merge_results(results):
+    """Sums a list of per-shard result dicts into one."""
+    merged = empty_results()
+    for result in results:
+        merged['rounds'] += result['rounds']
+        merged['net'] += result['net']
+        for outcome, count in result['outcomes'].items():
+            merged['outcomes'][outcome] += count
+    return merged
+
+
+def shard_rng(seed, decks=0, batch_shuffle=False):
+    """
+    The shard's streams.Stream (seed is a Stream or a root key) or, with
+    batch_shuffle, a streams.ShuffleBuffer for its deck size drawing from it.
+    """
+    rng = streams.stream(seed)
+    return streams.ShuffleBuffer(52 * (decks or 1), stream=rng) if batch_shuffle else rng
+
+
+def run_shard(rounds, policy, seed, decks=0, penetration=0.75, log_path=None, batch_shuffle=False):
+    """
+    Plays a number of rounds on its own RNG stream, from a fresh single deck
+    each round or, if decks is set, from one persistent Shoe.
+    The stream is split from the run's root seed (see streams), so nearby
+    shard seeds still give unrelated sequences. If log_path is set, every
+    round is appended to that hand-history log.
+    """
+    rng = shard_rng(seed, decks, batch_shuffle)
+    chips = game_logic.Chips()
+    results = empty_results()
+    outcomes = results['outcomes']
+    deck = game_logic.Shoe(decks, penetration, rng) if decks else game_logic.Deck(rng)
+    log = hand_log.HandLogWriter(log_path) if log_path else None
+    for _ in range(rounds):
+        deck.new_round()
+        outcome, net = play_round(deck, chips, policy, log)
+        outcomes[outcome] += 1
+        results['net'] += net
+    if log is not None:
+        log.close()
+    results['rounds'] = rounds
+    return results
+
+
+def _run_shard_args(args):
+    return run_shard(*args)
+
+
+def run_simulation(rounds, workers=None, policy=None, seed=0, decks=0, penetration=0.75, log_path=None,
+                   batch_shuffle=False):
+    """
+    Splits the rounds across a process pool, one independent RNG stream per
+    shard, and merges the shard results.
+    With log_path, each shard logs to its own part file, and the parts are
+    appended to log_path in shard order at the end.
+    Returns the merged results with 'seconds' and 'rounds_per_sec' added.
+    """
+    workers = workers or os.cpu_count() or 1
+    policy = policy or StandOnPolicy()
+    shard_sizes = [rounds // workers + (1 if i < rounds % workers else 0) for i in range(workers)]
+    root = streams.Stream(seed)
+    jobs = [(size, policy, root.split(shard), decks, penetration, log_path and f"{log_path}.part{shard}", batch_shuffle)
+            for shard, size in enumerate(shard_sizes) if size]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_run_shard_args(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_shard_args, jobs))
+    if log_path:
+        for job in jobs:
+            hand_log.append_log(log_path, job[5])
+    elapsed = time.perf_counter() - start
+
+    merged = merge_results(results)
+    merged['seconds'] = elapsed
+    merged['rounds_per_sec'] = merged['rounds'] / elapsed if elapsed else 0.0
+    return merged
+
+
+# --- Streaming runs ---
+
+def run_stats_shard(rounds, policy, seed, decks=0, penetration=0.75, batch_shuffle=False):
+    """As run_shard, but returns a stats.RoundStats of the rounds."""
+    rng = shard_rng(seed, decks, batch_shuffle)
+    chips = game_logic.Chips()
+    round_stats = stats.RoundStats()
+    deck = game_logic.Shoe(decks, penetration, rng) if decks else game_logic.Deck(rng)
+    for _ in range(rounds):
+        deck.new_round()
+        outcome, net = play_round(deck, chips, policy)
+        round_stats.add(outcome, net)
+    return round_stats
+
+
+def _run_stats_shard_args(args):
+    return run_stats_shard(*args)
+
+
+def _in_order(jobs, workers):
+    """Yields run_stats_shard results in job order, keeping at most 2 * workers jobs in flight."""
+    if workers == 1:
+        for job in jobs:
+            yield _run_stats_shard_args(job)
+        return
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = {}
+        done = {}
+        submitted = 0
+        for index in range(len(jobs)):
+            while index not in done:
+                while submitted < len(jobs) and len(pending) < 2 * workers:
+                    pending[pool.submit(_run_stats_shard_args, jobs[submitted])] = submitted
+                    submitted += 1
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done[pending.pop(future)] = future.result()
+            yield done.pop(index)
+    finally:
+        # Stopping early drops the chunks that have not started and does not wait for the running ones
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_streaming(rounds, workers=None, policy=None, seed=0, decks=0, penetration=0.75,
+                  chunk_rounds=50_000, target=None, progress=None, batch_shuffle=False,
+                  checkpoint_path=None, checkpoint_every=60.0, resume=False):
+    """
+    Plays up to rounds rounds in chunks of chunk_rounds, each on its own RNG
+    stream, and merges their stats.RoundStats in chunk order, so the result and
+    the stopping point do not depend on the number of workers.
+    progress, if given, is called with (RoundStats so far, seconds) after each chunk.
+    With target, stops once the 95% interval of net chips per round is at most
+    +/- target.
+    With checkpoint_path, the settings, the merged stats and the next chunk are
+    saved there in the background every checkpoint_every seconds and at the
+    end. With resume as well, an existing checkpoint is continued: the chunks
+    already merged are skipped (at most one chunk per worker of work is
+    replayed), and the settings that decide the rounds dealt must match.
+    Returns the results dict of run_simulation plus 'stats' (the merged
+    RoundStats), 'resumed_rounds' and 'restore_ms'.
+    """
+    workers = workers or os.cpu_count() or 1
+    policy = policy or StandOnPolicy()
+    root = streams.Stream(seed)
+    jobs = [(min(chunk_rounds, rounds - start), policy, root.split(chunk), decks, penetration, batch_shuffle)
+            for chunk, start in enumerate(range(0, rounds, chunk_rounds))]
+
+    start = time.perf_counter()
+    merged = stats.RoundStats()
+    first = 0
+    settings = checkpoint.config_bytes({'seed': seed, 'decks': decks, 'penetration': penetration,
+                                        'chunk_rounds': chunk_rounds, 'batch_shuffle': batch_shuffle,
+                                        'policy': [type(policy).__name__, vars(policy)]})
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        sections = checkpoint.read(checkpoint_path)
+        if checkpoint.load_config(sections[b'CONF']) != checkpoint.load_config(settings):
+            raise ValueError(f"{checkpoint_path} was saved by a run with different settings: "
+                             f"{bytes(sections[b'CONF']).decode()}")
+        merged = checkpoint.load_stats(sections[b'STAT'])
+        first, = checkpoint.PROGRESS.unpack(sections[b'PROG'])
+    restore_ms = (time.perf_counter() - start) * 1000
+    resumed_rounds = merged.rounds
+
+    writer = checkpoint.Writer(checkpoint_path) if checkpoint_path else None
+    next_chunk = first
+    last_save = time.perf_counter()
+    try:
+        for next_chunk, chunk_stats in enumerate(_in_order(jobs[first:], workers), first + 1):
+            merged.merge(chunk_stats)
+            now = time.perf_counter()
+            if progress is not None:
+                progress(merged, now - start)
+            if writer is not None and now - last_save >= checkpoint_every:
+                # Encoding takes microseconds; the write happens on the writer's thread
+                writer.save(checkpoint.pack({b'CONF': settings, b'PROG': checkpoint.PROGRESS.pack(next_chunk),
+                                             b'STAT': checkpoint.stats_bytes(merged)}))
+                last_save = now
+            if target is not None and merged.net.half_width() <= target:
+                break
+    finally:
+        if writer is not None:
+            try:
+                writer.save(checkpoint.pack({b'CONF': settings, b'PROG': checkpoint.PROGRESS.pack(next_chunk),
+                                             b'STAT': checkpoint.stats_bytes(merged)}))
+            finally:
+                writer.close()
+    elapsed = time.perf_counter() - start
+    played = merged.rounds - resumed_rounds
+
+    return {'rounds': merged.rounds, 'net': merged.total, 'outcomes': dict(merged.outcomes), 'stats': merged,
+            'seconds': elapsed, 'rounds_per_sec': played / elapsed if elapsed else 0.0,
+            'resumed_rounds': resumed_rounds, 'restore_ms': restore_ms}
+
+
+def progress_line(round_stats, seconds):
+    half_width = round_stats.net.half_width()
+    return (f"[{seconds:8.1f}s] {round_stats.rounds:,} rounds  net/round {round_stats.net.mean:+.4f} "
+            f"+/- {half_width:.4f} (95%)  median {round_stats.sketch.quantile(0.5):+.1f}")
+
+
+def print_report(results):
+    rounds = results['rounds']
+    print(f"Rounds played: {rounds}  ({results['seconds']:.2f}s, {results['rounds_per_sec']:,.0f} rounds/sec)")
+    for outcome in OUTCOMES:
+        count = results['outcomes'][outcome]
+        print(f"  {outcome:<12} {count:>12}  {count / rounds:7.2%}")
+    print(f"Net chips: {results['net']}  ({results['net'] / rounds:+.4f} per round)")
+    if 'stats' in results:
+        net = results['stats'].net
+        sketch = results['stats'].sketch
+        print(f"  95% interval {net.mean - net.half_width():+.4f} to {net.mean + net.half_width():+.4f}, "
+              f"standard deviation {net.variance ** 0.5:.2f}")
+        print("  quantiles " + "  ".join(f"{q:.0%}: {sketch.quantile(q):+.1f}" for q in stats.RoundStats.QUANTILES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Blackjack Monte Carlo simulator")
+    parser.add_argument('--rounds', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stand-on', type=int, default=17, help="player stands at this total or higher")
+    parser.add_argument('--bet', type=int, default=10)
+    parser.add_argument('--decks', type=int, default=0, help="deal from a persistent shoe of 1-8 decks")
+    parser.add_argument('--penetration', type=float, default=0.75)
+    parser.add_argument('--log', metavar='PATH', help="append every round to a hand-history log")
+    parser.add_argument('--scaling', action='store_true', help="report rounds/sec for 1..workers processes")
+    parser.add_argument('--batch-shuffle', action='store_true', help="shuffle from batches of permutations generated with NumPy")
+    parser.add_argument('--target-ci', type=float, metavar='CHIPS', help="stop once the 95%% interval of net chips per round is this narrow")
+    parser.add_argument('--progress-every', type=float, metavar='SECONDS', help="print the current estimate this often")
+    parser.add_argument('--status', metavar='PATH', help="with --progress-every, also keep the current estimate in this JSON file")
+    parser.add_argument('--checkpoint', metavar='PATH', help="save the run's progress to this file")
+    parser.add_argument('--checkpoint-every', type=float, default=60.0, metavar='SECONDS')
+    parser.add_argument('--resume', action='store_true', help="continue the run saved in --checkpoint, if there is one")
+    args = parser.parse_args()
+    if args.rounds <= 0:
+        parser.error("--rounds must be a positive number")
+    if args.status and args.progress_every is None:
+        # The status file is written with each progress line
+        parser.error("--status requires --progress-every")
+    streaming = args.target_ci is not None or args.progress_every is not None or args.checkpoint
+    if streaming and args.log:
+        # A run that stops early or resumes could not keep the log's rounds in order without repeats
+        parser.error("--log cannot be combined with --target-ci, --progress-every or --checkpoint")
+
+    policy = StandOnPolicy(args.stand_on, args.bet)
+    if args.scaling:
+        baseline = None
+        for workers in range(1, args.workers + 1):
+            results = run_simulation(args.rounds, workers, policy, args.seed, args.decks, args.penetration,
+                                     batch_shuffle=args.batch_shuffle)
+            baseline = baseline or results['rounds_per_sec']
+            print(f"{workers:>3} workers: {results['rounds_per_sec']:>12,.0f} rounds/sec  (x{results['rounds_per_sec'] / baseline:.2f})")
+    elif streaming:
+        last = [0.0]
+
+        def progress(round_stats, seconds):
+            if args.progress_every is None or seconds - last[0] < args.progress_every:
+                return
+            last[0] = seconds
+            print(progress_line(round_stats, seconds), flush=True)
+            if args.status:
+                # Written whole and then renamed, so a reader never sees a partial file
+                with open(args.status + ".tmp", 'w') as f:
+                    json.dump(dict(round_stats.summary(), seconds=seconds), f)
+                os.replace(args.status + ".tmp", args.status)
+
+        results = run_streaming(args.rounds, args.workers, policy, args.seed, args.decks, args.penetration,
+                                target=args.target_ci, progress=progress, batch_shuffle=args.batch_shuffle,
+                                checkpoint_path=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                                resume=args.resume)
+        if results['resumed_rounds']:
+            print(f"Resumed after {results['resumed_rounds']:,} rounds (checkpoint restored in {results['restore_ms']:.2f} ms)")
+        print_report(results)
+    else:
+        print_report(run_simulation(args.rounds, args.workers, policy, args.seed, args.decks, args.penetration, args.log,
+                                    args.batch_shuffle))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Streaming statistics for long simulation runs.
+
+Nothing here stores per-round results: every accumulator keeps a fixed-size
+summary that is updated in O(1) per round and merged with another
+accumulator of the same kind, so each worker or shard keeps its own and the
+parent combines them.
+- RunningStats: count, mean and variance (Welford's update; Chan et al.'s
+  formula to merge, which is exact up to floating-point rounding)
+- QuantileSketch: log-spaced buckets whose quantiles are within a relative
+  accuracy of the true ones; merging adds bucket counts, so it is exact
+- RoundStats: the above for net chips per round, plus an exact integer
+  total and a count per outcome (game_logic.OUTCOMES: blackjack, win,
+  dealer bust, push, lose, bust)
+- percentile(): nearest-rank percentile of a list that is already sorted, for
+  the latency series the benchmarks and autoplay collect
+
+The accumulators all pickle as plain attributes, so they can be returned from a
+process pool.
+"""
+import math
+
+import game_logic
+
+
+Z95 = 1.96
+
+
+class RunningStats:
+    """Count, mean and variance of a stream of numbers."""
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other):
+        n = self.n + other.n
+        if n:
+            delta = other.mean - self.mean
+            self.mean += delta * other.n / n
+            self.m2 += other.m2 + delta * delta * self.n * other.n / n
+            self.n = n
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float('inf')
+
+    def half_width(self, z=Z95):
+        """Half-width of the confidence interval for the mean (95% by default)."""
+        return z * math.sqrt(self.variance / self.n) if self.n > 1 else float('inf')
+
+
+class QuantileSketch:
+    """
+    Quantiles of a stream to within relative_accuracy, in memory that grows
+    with the log of the range of values seen rather than with their number.
+    Positive and negative values go to separate buckets keyed by
+    ceil(log(|x|) / log(gamma)); values smaller than min_value count as zero.
+    """
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _key(self, magnitude):
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def add(self, x, count=1):
+        self.count += count
+        if x > self.min_value:
+            key = self._key(x)
+            self.positive[key] = self.positive.get(key, 0) + count
+        elif x < -self.min_value:
+            key = self._key(-x)
+            self.negative[key] = self.negative.get(key, 0) + count
+        else:
+            self.zeros += count
+
+    def merge(self, other):
+        if other.gamma != self.gamma or other.min_value != self.min_value:
+            raise ValueError("Only sketches with the same accuracy can be merged.")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        return self
+
+    def _value(self, key):
+        # The point of bucket key whose relative error to anything in it is at most relative_accuracy
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        if not self.count:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = 0
+        # Ascending order: most negative first, then zeros, then positives
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+
+class RoundStats:
+    """
+    Running summary of played rounds.
+    - net: RunningStats of net chips per round
+    - total: exact sum of net chips
+    - outcomes: rounds per outcome
+    - sketch: QuantileSketch of net chips per round
+    """
+    QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+    def __init__(self, relative_accuracy=0.01):
+        self.net = RunningStats()
+        self.total = 0
+        self.outcomes = dict.fromkeys(game_logic.OUTCOMES, 0)
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    @property
+    def rounds(self):
+        return self.net.n
+
+    def add(self, outcome, net):
+        self.net.add(net)
+        self.total += net
+        self.outcomes[outcome] += 1
+        self.sketch.add(net)
+
+    def merge(self, other):
+        self.net.merge(other.net)
+        self.total += other.total
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] += count
+        self.sketch.merge(other.sketch)
+        return self
+
+    def summary(self, z=Z95):
+        """Plain dict of the current estimates, e.g. for a progress line or JSON."""
+        return {'rounds': self.rounds, 'net': self.total, 'mean': self.net.mean,
+                'half_width': self.net.half_width(z) if self.rounds > 1 else None,
+                'stdev': math.sqrt(self.net.variance) if self.rounds > 1 else None,
+                'outcomes': dict(self.outcomes),
+                'quantiles': {str(q): self.sketch.quantile(q) for q in self.QUANTILES} if self.rounds else {}}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile (fraction 0..1; 1.0 is the largest) of an ascending list, or nan if it is empty."""
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
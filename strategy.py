@@ -0,0 +1,218 @@
+"""
+Basic-strategy table generator and O(1) lookup.
+
+The generator computes the expected value (in bets) of hit, stand, double,
+and split for every player total and pair against every dealer upcard, using
+the game's rules:
+- Dealer draws to 17 with the Hand.deal_cards Ace rule (see dealer_odds.py)
+- A two-card 21 on the deal pays 1.5x (start_new_round); hands split from a
+  pair can only hit or stand, each for the original bet (split in game_logic)
+- Doubling doubles the bet and takes exactly one card (double_down)
+- The player picks 1 or 11 for each Ace as it is drawn (Hand.add_cards), and
+  that value is fixed afterwards
+
+Because an Ace keeps the value chosen when it is drawn, a total holding an Ace
+counted as 11 plays exactly like the hard total of the same value, so the
+table has one row per total (2..21) plus one row per pair value (2..11).
+
+Player draws use infinite-deck probabilities; the dealer's final totals come
+from a full single deck minus the upcard, matching the one-deck game.
+
+The table is written as a small binary file: a header, one action byte per
+cell for two-card hands, one action byte per cell for hands of three or more
+cards (hit or stand only), then the EVs as float32 (NaN where an action is not
+allowed).
+
+Usage:
+    python strategy.py
+"""
+import math
+import os
+import struct
+from array import array
+
+import dealer_odds
+
+
+ACTIONS = ('hit', 'stand', 'double', 'split')
+HIT, STAND, DOUBLE, SPLIT = range(4)
+
+UPCARDS = range(2, 12)
+TOTALS = range(2, 22)
+PAIRS = range(2, 12)
+ROWS = len(TOTALS) + len(PAIRS)
+CELLS = ROWS * len(UPCARDS)
+
+MAGIC = b'BJS1'
+HEADER = struct.Struct('<4sHH')
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'basic_strategy.bin')
+
+# Infinite-deck draw probabilities by card value (index = value - 2)
+CARD_PROBS = tuple(count / 52 for count in dealer_odds.FULL_DECK_COUNTS)
+
+
+def _row(total=None, pair=None):
+    if pair is not None:
+        return len(TOTALS) + pair - 2
+    return total - 2
+
+
+def _dealer_distribution(upcard_value):
+    counts = list(dealer_odds.FULL_DECK_COUNTS)
+    counts[upcard_value - 2] -= 1
+    return dealer_odds.dealer_distribution(upcard_value, tuple(counts))
+
+
+def _stand_ev(total, dist):
+    """EV of standing on total against a dealer final-total distribution."""
+    ev = dist[5]
+    for dealer_total, p in zip(range(17, 22), dist):
+        if total > dealer_total:
+            ev += p
+        elif total < dealer_total:
+            ev -= p
+    return ev
+
+
+def _draw_outcomes(total):
+    """
+    (probability, [possible new totals]) for each card value drawn on total.
+    An Ace offers both 1 and 11; the player takes whichever is better.
+    """
+    outcomes = []
+    for value, p in zip(range(2, 12), CARD_PROBS):
+        if value == 11:
+            outcomes.append((p, [total + 1, total + 11]))
+        else:
+            outcomes.append((p, [total + value]))
+    return outcomes
+
+
+def _upcard_evs(dist):
+    """
+    EVs of every action for every row against one dealer distribution.
+    Returns: a list of [hit, stand, double, split] per row.
+    """
+    stand = {t: _stand_ev(t, dist) for t in range(2, 22)}
+
+    def settle(totals, values):
+        return max(values[t] if t <= 21 else -1.0 for t in totals)
+
+    # Best of hit/stand for each total, from 21 down since drawing only increases the total
+    best = {}
+    hit = {}
+    for total in reversed(TOTALS):
+        hit[total] = sum(p * settle(totals, best) for p, totals in _draw_outcomes(total))
+        best[total] = max(hit[total], stand[total])
+
+    double = {t: 2 * sum(p * settle(totals, stand) for p, totals in _draw_outcomes(t)) for t in TOTALS}
+
+    rows = []
+    for total in TOTALS:
+        rows.append([hit[total], stand[total], double[total], math.nan])
+    for pair in PAIRS:
+        total = 2 * pair if pair != 11 else 12
+        # Each split hand starts from one card and can only hit or stand
+        rows.append([hit[total], stand[total], double[total], 2 * best[pair]])
+    return rows
+
+
+def generate():
+    """
+    Computes the full table.
+    Returns: (two-card action codes, hit/stand action codes, EVs), each flat in cell order.
+    """
+    two_card = bytearray(CELLS)
+    drawn = bytearray(CELLS)
+    evs = array('f', [math.nan]) * (CELLS * 4)
+    for u, upcard_value in enumerate(UPCARDS):
+        rows = _upcard_evs(_dealer_distribution(upcard_value))
+        for r, row_evs in enumerate(rows):
+            cell = r * len(UPCARDS) + u
+            evs[cell * 4:cell * 4 + 4] = array('f', row_evs)
+            allowed = [a for a in range(4) if not math.isnan(row_evs[a])]
+            two_card[cell] = max(allowed, key=lambda a: row_evs[a])
+            drawn[cell] = HIT if row_evs[HIT] > row_evs[STAND] else STAND
+    return two_card, drawn, evs
+
+
+def write_table(path=TABLE_PATH):
+    two_card, drawn, evs = generate()
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, ROWS, len(UPCARDS)))
+        f.write(two_card)
+        f.write(drawn)
+        f.write(evs.tobytes())
+
+
+class StrategyTable:
+    """Loaded strategy table with constant-time lookups."""
+
+    def __init__(self, path=TABLE_PATH):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, rows, upcards = HEADER.unpack_from(data)
+        if magic != MAGIC or rows != ROWS or upcards != len(UPCARDS):
+            raise ValueError(f"{path} is not a compatible strategy table")
+        offset = HEADER.size
+        self.two_card = data[offset:offset + CELLS]
+        self.drawn = data[offset + CELLS:offset + 2 * CELLS]
+        self.evs = array('f')
+        self.evs.frombytes(data[offset + 2 * CELLS:])
+
+    def cell(self, hand, upcard):
+        """Table cell index for a game_logic.Hand against the dealer's upcard Card."""
+        up = upcard.value - 2
+        # Same pairing rule as the CLI's split: two cards of the same value
+        if hand.pair:
+            return _row(pair=hand.hand[0].value) * len(UPCARDS) + up
+        return _row(total=min(max(hand.value, 2), 21)) * len(UPCARDS) + up
+
+    def best_action(self, hand, upcard):
+        """Best action name for hand against upcard ('hit', 'stand', 'double', or 'split')."""
+        if hand.value >= 21:
+            return 'stand'
+        cell = self.cell(hand, upcard)
+        if len(hand.hand) == 2:
+            return ACTIONS[self.two_card[cell]]
+        return ACTIONS[self.drawn[cell]]
+
+    def action_evs(self, hand, upcard):
+        """Dict of EV per action for the hand's cell (NaN where not allowed)."""
+        cell = self.cell(hand, upcard)
+        return dict(zip(ACTIONS, self.evs[cell * 4:cell * 4 + 4]))
+
+
+_table = None
+
+
+def load_table(path=TABLE_PATH):
+    """Loads the default table, generating it on first use."""
+    global _table
+    if _table is None:
+        if not os.path.exists(path):
+            write_table(path)
+        _table = StrategyTable(path)
+    return _table
+
+
+def best_action(hand, upcard):
+    """Best action for a game_logic.Hand against the dealer's upcard Card."""
+    return load_table().best_action(hand, upcard)
+
+
+if __name__ == "__main__":
+    import time
+
+    write_table()
+    start = time.perf_counter()
+    table = StrategyTable()
+    print(f"Wrote {TABLE_PATH} ({os.path.getsize(TABLE_PATH)} bytes), loaded in {(time.perf_counter() - start) * 1e6:.0f} us")
+
+    letters = {HIT: 'H', STAND: 'S', DOUBLE: 'D', SPLIT: 'P'}
+    names = {value: 'A' if value == 11 else str(value) for value in UPCARDS}
+    print("Hand   " + " ".join(f"{names[u]:>2}" for u in UPCARDS))
+    labels = [str(total) for total in TOTALS] + [f"{names[pair]},{names[pair]}" for pair in PAIRS]
+    for r, label in enumerate(labels):
+        codes = table.two_card[r * len(UPCARDS):(r + 1) * len(UPCARDS)]
+        print(f"{label:>5}  " + " ".join(f"{letters[c]:>2}" for c in codes))
@@ -0,0 +1,97 @@
+"""
+Seeded, splittable random streams and batched shuffles.
+
+A Stream is a random.Random seeded from a key path: Stream(seed).split(a, b)
+is the stream for key "seed:a:b". Streams with different paths are
+independent (the key is hashed into the generator's state, as random.Random
+does for any string seed), and the same path always gives the same sequence,
+so one root seed hands out a stream per worker, per table or per shard
+without coordination. Keys follow the "{seed}:{shard}" strings the
+simulators already seeded with, so existing runs reproduce unchanged.
+A Stream works anywhere a Deck, Shoe or simulator takes an rng.
+
+A ShuffleBuffer (requires NumPy) also has the shuffle(cards) method a Deck
+or Shoe calls, but it generates batch permutations at a time in C, into one
+reusable array, instead of running Python's Fisher-Yates for every deck.
+Applying a uniformly random permutation to the cards gives a uniform shuffle
+whatever order they were in, so a buffer can replace an rng directly.
+
+Usage:
+    deck = game_logic.Deck(streams.Stream(42).split('gui'))
+    shoe = game_logic.Shoe(6, 0.75, streams.ShuffleBuffer(6 * 52, stream=streams.Stream(0).split(3)))
+"""
+import random
+
+
+class Stream(random.Random):
+    """random.Random for the key path seed:path[0]:path[1]:..."""
+    def __init__(self, seed=0, path=()):
+        self.root = seed
+        self.path = tuple(path)
+        super().__init__(self.key)
+
+    @property
+    def key(self):
+        return ":".join(map(str, (self.root,) + self.path))
+
+    def split(self, *names):
+        """The independent child stream for names (e.g. a worker or table index)."""
+        return Stream(self.root, self.path + names)
+
+    def spawn(self, n):
+        """Child streams 0..n-1, e.g. one per worker."""
+        return [self.split(i) for i in range(n)]
+
+    def __reduce__(self):
+        # Keeps the key path when pickled for a worker process, along with the generator state
+        return Stream, (self.root, self.path), self.getstate()
+
+    def __repr__(self):
+        return f"Stream({self.key!r})"
+
+
+def stream(seed):
+    """seed as a Stream: a Stream or other random.Random is used as is; anything else is the root key."""
+    return seed if isinstance(seed, random.Random) else Stream(seed)
+
+
+class ShuffleBuffer:
+    """
+    Permutations of size items, generated batch at a time into one reusable
+    (batch, size) array by a NumPy generator seeded from stream (a Stream,
+    e.g. split from the run's root seed; there is no default, as every buffer
+    built without one would repeat the same permutations).
+    - permutation(): the next permutation, as a list of indices
+    - shuffle(cards): reorders a list of size items in place by the next permutation
+    """
+    def __init__(self, size, stream, batch=4096):
+        # Imported here so that Stream does not need NumPy
+        import numpy as np
+
+        self.size = size
+        self.batch = batch
+        self._generator = np.random.default_rng(stream.getrandbits(128))
+        self._buffer = np.tile(np.arange(size, dtype=np.int16), (batch, 1))
+        self._rows = []
+        self._next = 0
+        self.refills = 0
+
+    def refill(self):
+        # Each row is permuted again in place; a random permutation of any row is uniform
+        self._generator.permuted(self._buffer, axis=1, out=self._buffer)
+        # One conversion for the whole batch is much cheaper than one per row
+        self._rows = self._buffer.tolist()
+        self._next = 0
+        self.refills += 1
+
+    def permutation(self):
+        if self._next == len(self._rows):
+            self.refill()
+        row = self._rows[self._next]
+        self._next += 1
+        return row
+
+    def shuffle(self, cards):
+        if len(cards) != self.size:
+            raise ValueError(f"This buffer shuffles {self.size} items, not {len(cards)}.")
+        cards[:] = map(cards.__getitem__, self.permutation())
@@ -0,0 +1,180 @@
+"""
+Multi-seat Blackjack tables for simulation.
+
+A Table has 1-7 seats, each with its own policy, bankroll and hand, all dealt
+from one shared Shoe in casino order: one card to each seat left to right,
+the dealer's upcard, a second card to each seat, then the hole card. Seats
+act in turn, the dealer plays once for the whole table (and not at all if
+every seat busted or has blackjack), then every seat is settled in a single
+pass against the dealer's final hand. Rules are the same as simulate.py.
+
+Tables are plain objects and a round allocates little beyond its hands, so
+thousands of them can be run side by side in one process.
+
+Usage:
+    python table.py --tables 1000 --seats 7 --rounds 100
+"""
+import argparse
+import time
+
+import game_logic
+import simulate
+import streams
+
+
+MAX_SEATS = 7
+
+
+class Seat:
+    """
+    One player position at a Table.
+    - policy: bet(chips) and hit(hand, upcard), as in simulate.StandOnPolicy
+    - chips: the seat's bankroll (game_logic.Chips); a seat sits out a round it cannot cover
+    - hand: this round's game_logic.Hand, or None if the seat sat out
+    - results: running totals in simulate's result format
+    """
+    def __init__(self, policy, bankroll=100):
+        self.policy = policy
+        self.chips = game_logic.Chips()
+        self.chips.total = bankroll
+        self.hand = None
+        self.results = simulate.empty_results()
+
+
+class Table:
+    """
+    Seats sharing one shoe and one dealer.
+    play_round() deals, plays and settles one round for every seat that can
+    bet, and returns how many seats played.
+    """
+    def __init__(self, seats, shoe=None, rng=None):
+        if not 1 <= len(seats) <= MAX_SEATS:
+            raise ValueError(f"A table has 1 to {MAX_SEATS} seats.")
+        self.seats = list(seats)
+        # Several seats can use more than one deck's worth of cards in a round, so tables always deal from a shoe
+        self.shoe = shoe if shoe is not None else game_logic.Shoe(6, 0.75, rng)
+        self.dealer_hand = game_logic.Hand()
+
+    def play_round(self):
+        self.shoe.new_round()
+        deal = self.shoe.deal
+
+        playing = []
+        for seat in self.seats:
+            bet = seat.policy.bet(seat.chips)
+            if 1 <= bet <= seat.chips.total:
+                seat.chips.bet = bet
+                seat.hand = game_logic.Hand()
+                playing.append(seat)
+            else:
+                seat.hand = None
+        if not playing:
+            return 0
+
+        # Casino order: a card to each seat, the upcard, a second card to each seat, the hole card
+        dealer_hand = self.dealer_hand = game_logic.Hand()
+        for seat in playing:
+            seat.hand.deal_cards(deal())
+        dealer_hand.deal_cards(deal())
+        for seat in playing:
+            seat.hand.deal_cards(deal())
+        dealer_hand.deal_cards(deal())
+
+        upcard = dealer_hand.hand[0]
+        standing = 0
+        for seat in playing:
+            hand = seat.hand
+            if hand.blackjack:
+                continue
+            while seat.policy.hit(hand, upcard):
+                hand.deal_cards(deal())
+                if game_logic.bust_check(hand):
+                    break
+            if not game_logic.bust_check(hand):
+                standing += 1
+
+        # The dealer draws once for the whole table, and only if someone is still standing
+        if standing:
+            while dealer_hand.value < 17:
+                dealer_hand.deal_cards(deal())
+        self.settle(playing)
+        return len(playing)
+
+    def settle(self, playing):
+        """
+        Pays every seat that played this round in one pass. The dealer's side of
+        game_logic.round_outcome is worked out once for the table rather than per seat.
+        """
+        dealer_value = self.dealer_hand.value
+        dealer_bust = dealer_value > 21
+        for seat in playing:
+            hand = seat.hand
+            if hand.blackjack:
+                outcome = 'blackjack'
+            elif hand.value > 21:
+                outcome = 'bust'
+            elif dealer_bust:
+                outcome = 'dealer_bust'
+            elif hand.value > dealer_value:
+                outcome = 'win'
+            elif hand.value < dealer_value:
+                outcome = 'lose'
+            else:
+                outcome = 'push'
+            results = seat.results
+            results['outcomes'][outcome] += 1
+            results['net'] += game_logic.pay_out(seat.chips, outcome)
+            results['rounds'] += 1
+
+
+def make_tables(tables, seats, policy, seed=0, decks=6, penetration=0.75, bankroll=100):
+    """tables Tables of seats seats each, every table with its own shoe and RNG stream."""
+    root = streams.Stream(seed)
+    return [
+        Table([Seat(policy, bankroll) for _ in range(seats)],
+              game_logic.Shoe(decks, penetration, root.split(i)))
+        for i in range(tables)
+    ]
+
+
+def run_tables(tables, rounds):
+    """
+    Plays rounds rounds at every table.
+    Returns simulate-style results merged over every seat (so 'rounds' counts
+    seat-rounds) with timing.
+    """
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for table in tables:
+            table.play_round()
+    elapsed = time.perf_counter() - start
+    results = simulate.merge_results([seat.results for table in tables for seat in table.seats])
+    results['seconds'] = elapsed
+    results['rounds_per_sec'] = results['rounds'] / elapsed if elapsed else 0.0
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate multi-seat Blackjack tables")
+    parser.add_argument('--tables', type=int, default=1000)
+    parser.add_argument('--seats', type=int, default=7, help=f"seats per table (1-{MAX_SEATS})")
+    parser.add_argument('--rounds', type=int, default=100, help="rounds played at each table")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--penetration', type=float, default=0.75)
+    parser.add_argument('--stand-on', type=int, default=17)
+    parser.add_argument('--bet', type=int, default=10)
+    parser.add_argument('--bankroll', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    policy = simulate.StandOnPolicy(args.stand_on, args.bet)
+    tables = make_tables(args.tables, args.seats, policy, args.seed, args.decks, args.penetration, args.bankroll)
+    results = run_tables(tables, args.rounds)
+    print(f"{args.tables} tables x {args.seats} seats x {args.rounds} rounds: "
+          f"{results['rounds']:,} seat-rounds in {results['seconds']:.2f}s "
+          f"({results['rounds_per_sec']:,.0f} seats/sec)")
+    simulate.print_report(results)
+
+
+if __name__ == "__main__":
+    main()
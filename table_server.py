@@ -0,0 +1,354 @@
+"""
+Asyncio Blackjack table server speaking line-delimited JSON over TCP.
+
+Rules come from game_logic (Aces are valued by Hand.deal_cards, as in the
+simulator); Qt is not needed. Each connection takes a seat at a named table.
+A table has up to 7 seats sharing one Shoe, and each seat plays its own rounds
+against the dealer.
+
+Protocol: one JSON object per line each way. Every request gets exactly one
+response, with "ok" and the request's "id" (if given) echoed back:
+    {"op": "join", "table": "t1"}   take a seat (the table is created on first join;
+                                    omit "table" to be seated at any table with room)
+    {"op": "bet", "amount": 10}     start a round; deals and may settle a blackjack at once
+    {"op": "hit"} / {"op": "stand"}
+    {"op": "state"}                 the seat's current state
+    {"op": "leave"}
+Responses carry the seat's state ('betting', 'player_turn' or 'broke'), chips,
+hands and, once a round settles, "outcome" (an entry of game_logic.OUTCOMES)
+and "net". Errors are {"ok": false, "error": "..."}.
+
+- Per-table serialization: every action on a table goes through that table's
+  queue and is applied by the table's own task, one at a time, in arrival order.
+- Backpressure: a connection's next request is not read until the previous
+  response has been written and drained; table queues are bounded, so a busy
+  table slows its own clients down instead of buffering without limit.
+- Idle eviction: a table that receives no action for --idle-timeout seconds is
+  closed; its seated clients get an error and can join again.
+
+Usage:
+    python table_server.py --port 8765
+    python -m benchmarks.server_load --connections 2000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+
+import game_logic
+
+
+MAX_SEATS = 7
+MAX_LINE = 4096
+QUEUE_SIZE = 256
+
+logger = logging.getLogger("table_server")
+
+
+class ProtocolError(Exception):
+    """A request that cannot be applied; reported to the client, the connection stays open."""
+
+
+class SeatSession:
+    """One connection's seat: bankroll, current round and table."""
+
+    def __init__(self, bankroll):
+        self.table = None
+        self.chips = game_logic.Chips()
+        self.chips.total = bankroll
+        self.bankroll = bankroll
+        self.state = 'betting'
+        self.player_hand = None
+        self.dealer_hand = None
+
+    def abandon_round(self):
+        """Ends the seat's round when it leaves or its table closes; an unfinished round forfeits its bet."""
+        if self.state == 'player_turn':
+            self.chips.lose_bet()
+        self.state = 'betting' if self.chips.total > 0 else 'broke'
+        self.player_hand = self.dealer_hand = None
+
+    def view(self, **extra):
+        view = {'ok': True, 'table': self.table.name if self.table else None,
+                'state': self.state, 'chips': self.chips.total}
+        if self.player_hand is not None:
+            view['player'] = [str(card) for card in self.player_hand.hand]
+            view['player_value'] = self.player_hand.value
+            if self.state == 'player_turn':
+                view['upcard'] = str(self.dealer_hand.hand[0])
+            else:
+                view['dealer'] = [str(card) for card in self.dealer_hand.hand]
+                view['dealer_value'] = self.dealer_hand.value
+        view.update(extra)
+        return view
+
+
+class Table:
+    """
+    A shoe shared by up to 7 seats, with a task applying their actions in order.
+    Requests arrive as (session, request, future) on a bounded queue.
+    """
+
+    def __init__(self, server, name, rng):
+        self.server = server
+        self.name = name
+        self.shoe = game_logic.Shoe(6, 0.75, rng)
+        self.seats = set()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.closed = False
+        self.loop = asyncio.get_running_loop()
+        self.last_active = self.loop.time()
+        self.task = self.loop.create_task(self.run())
+
+    async def run(self):
+        queue = self.queue
+        while True:
+            session, request, future = await queue.get()
+            self.last_active = self.loop.time()
+            if future.cancelled():
+                continue
+            try:
+                future.set_result(self.apply(session, request))
+            except ProtocolError as error:
+                future.set_result({'ok': False, 'error': str(error)})
+            except Exception:
+                # A bug in one request must not stop the table: later requests would wait forever
+                logger.exception("Table %s failed on %r", self.name, request)
+                future.set_result({'ok': False, 'error': "Internal error."})
+
+    def close(self):
+        """Stops the table's task and fails any requests still queued."""
+        self.closed = True
+        self.task.cancel()
+        while not self.queue.empty():
+            _, _, future = self.queue.get_nowait()
+            if not future.cancelled():
+                future.set_result({'ok': False, 'error': "Table closed for inactivity; join again."})
+
+    async def submit(self, session, request):
+        if self.closed:
+            raise ProtocolError("Table closed for inactivity; join again.")
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((session, request, future))
+        return await future
+
+    # --- Round logic (runs on the table's task only) ---
+
+    def apply(self, session, request):
+        op = request.get('op')
+        if op == 'bet':
+            return self.bet(session, request.get('amount'))
+        if op == 'hit':
+            return self.hit(session)
+        if op == 'stand':
+            return self.stand(session)
+        if op == 'state':
+            return session.view()
+        raise ProtocolError(f"Unknown op {op!r}.")
+
+    def require(self, session, state, action):
+        if session.state != state:
+            raise ProtocolError(f"Cannot {action} during {session.state}.")
+
+    def bet(self, session, amount):
+        self.require(session, 'betting', "bet")
+        # type() rather than isinstance(): a JSON true would otherwise bet 1 chip
+        if type(amount) is not int or not 1 <= amount <= session.chips.total:
+            raise ProtocolError(f"Bet must be an integer between 1 and {session.chips.total}.")
+        session.chips.bet = amount
+        self.shoe.new_round()
+        deal = self.shoe.deal
+        session.player_hand = player_hand = game_logic.Hand()
+        session.dealer_hand = dealer_hand = game_logic.Hand()
+        player_hand.deal_cards(deal())
+        player_hand.deal_cards(deal())
+        dealer_hand.deal_cards(deal())
+        dealer_hand.deal_cards(deal())
+        if player_hand.blackjack:
+            return self.settle(session, 'blackjack')
+        session.state = 'player_turn'
+        return session.view()
+
+    def hit(self, session):
+        self.require(session, 'player_turn', "hit")
+        session.player_hand.deal_cards(self.shoe.deal())
+        if game_logic.bust_check(session.player_hand):
+            return self.settle(session, 'bust')
+        return session.view()
+
+    def stand(self, session):
+        self.require(session, 'player_turn', "stand")
+        dealer_hand = session.dealer_hand
+        while dealer_hand.value < 17:
+            dealer_hand.deal_cards(self.shoe.deal())
+        return self.settle(session, game_logic.round_outcome(session.player_hand, dealer_hand))
+
+    def settle(self, session, outcome):
+        net = game_logic.pay_out(session.chips, outcome)
+        session.state = 'betting' if session.chips.total > 0 else 'broke'
+        self.server.rounds += 1
+        return session.view(outcome=outcome, net=net)
+
+
+class TableServer:
+    """
+    Accepts connections and routes their requests to tables.
+    - tables: open tables by name
+    - rounds / actions: counters since start
+    """
+
+    def __init__(self, idle_timeout=300.0, bankroll=100, seed=None):
+        self.idle_timeout = idle_timeout
+        self.bankroll = bankroll
+        self.rng = random.Random(seed)
+        self.tables = {}
+        self.rounds = 0
+        self.actions = 0
+        self._open_table = None  # most recent table with a free seat, for joins without a name
+
+    async def evict_idle_tables(self):
+        """
+        Closes tables with no action for idle_timeout seconds. One sweep task for
+        the whole server keeps timers off the per-action path.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(min(self.idle_timeout / 4, 30.0))
+            cutoff = loop.time() - self.idle_timeout
+            for table in [table for table in self.tables.values() if table.last_active < cutoff and table.queue.empty()]:
+                self.evict(table)
+
+    def evict(self, table):
+        table.close()
+        if self.tables.get(table.name) is table:
+            del self.tables[table.name]
+        if self._open_table is table:
+            self._open_table = None
+        for session in table.seats:
+            session.table = None
+            session.abandon_round()
+        table.seats.clear()
+
+    def _table_for(self, name):
+        if name is None:
+            table = self._open_table
+            if table is None or table.closed or len(table.seats) >= MAX_SEATS:
+                name = f"table-{self.rng.getrandbits(48):012x}"
+            else:
+                return table
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = Table(self, name, random.Random(self.rng.getrandbits(64)))
+        if len(table.seats) < MAX_SEATS:
+            self._open_table = table
+        return table
+
+    def join(self, session, name):
+        if session.table is not None:
+            raise ProtocolError(f"Already seated at {session.table.name}; leave first.")
+        if name is not None and not isinstance(name, str):
+            raise ProtocolError("Table names are strings.")
+        table = self._table_for(name)
+        if len(table.seats) >= MAX_SEATS:
+            raise ProtocolError(f"Table {table.name} is full.")
+        table.seats.add(session)
+        session.table = table
+        if session.chips.total <= 0:
+            # A broke seat buys back in when it joins a table
+            session.chips.total = session.bankroll
+        session.state = 'betting'
+        session.player_hand = session.dealer_hand = None
+        return session.view(seats=len(table.seats))
+
+    def leave(self, session):
+        table = session.table
+        if table is not None:
+            table.seats.discard(session)
+            session.table = None
+            if self._open_table is None and not table.closed:
+                self._open_table = table
+        session.abandon_round()
+        return session.view()
+
+    async def handle_request(self, session, request):
+        self.actions += 1
+        op = request.get('op')
+        if op == 'join':
+            return self.join(session, request.get('table'))
+        if op == 'leave':
+            return self.leave(session)
+        table = session.table
+        if table is None:
+            raise ProtocolError("Not seated; join a table first.")
+        return await table.submit(session, request)
+
+    async def handle_connection(self, reader, writer):
+        session = SeatSession(self.bankroll)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than MAX_LINE: the stream cannot be resynchronised
+                    await self._send(writer, {'ok': False, 'error': f"Request longer than {MAX_LINE} bytes."})
+                    break
+                if not line:
+                    break
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ProtocolError("Each request is a JSON object.")
+                    request_id = request.get('id')
+                    response = await self.handle_request(session, request)
+                except ProtocolError as error:
+                    response = {'ok': False, 'error': str(error)}
+                except ValueError:
+                    # JSONDecodeError, or UnicodeDecodeError for a line that is not UTF-8
+                    response = {'ok': False, 'error': "Invalid JSON."}
+                if request_id is not None:
+                    response = dict(response, id=request_id)
+                # The next request is read only once this response has drained
+                await self._send(writer, response)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.leave(session)
+            writer.close()
+
+    @staticmethod
+    async def _send(writer, response):
+        writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+        await writer.drain()
+
+    async def serve(self, host, port, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE, backlog=4096)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        sweeper = asyncio.get_running_loop().create_task(self.evict_idle_tables())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blackjack table server (line-delimited JSON over TCP)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765, help="0 picks a free port")
+    parser.add_argument('--idle-timeout', type=float, default=300.0, help="seconds before an idle table is closed")
+    parser.add_argument('--bankroll', type=int, default=100, help="chips each new seat starts with")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    server = TableServer(args.idle_timeout, args.bankroll, args.seed)
+    try:
+        asyncio.run(server.serve(args.host, args.port, lambda port: print(f"Listening on {args.host}:{port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Protocol tests for table_server, against a server on a free local port.
+
+Usage:
+    python -m unittest discover tests
+"""
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import table_server
+
+
+class TableServerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = table_server.TableServer(seed=0)
+        self.listener = await asyncio.start_server(self.server.handle_connection, '127.0.0.1', 0,
+                                                   limit=table_server.MAX_LINE)
+        port = self.listener.sockets[0].getsockname()[1]
+        self.reader, self.writer = await asyncio.open_connection('127.0.0.1', port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.listener.close()
+        await self.listener.wait_closed()
+
+    async def send(self, line):
+        self.writer.write(line)
+        await self.writer.drain()
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 5))
+
+    async def test_invalid_utf8_gets_an_error_and_keeps_the_connection(self):
+        self.assertEqual(await self.send(b'\xff\n'), {'ok': False, 'error': "Invalid JSON."})
+        self.assertTrue((await self.send(b'{"op": "join", "table": "t1"}\n'))['ok'])
+
+    async def test_boolean_bet_is_rejected(self):
+        await self.send(b'{"op": "join", "table": "t1"}\n')
+        response = await self.send(b'{"op": "bet", "amount": true}\n')
+        self.assertFalse(response['ok'])
+        self.assertEqual((await self.send(b'{"op": "state"}\n'))['state'], 'betting')
+
+    async def test_table_keeps_serving_after_an_unexpected_error(self):
+        await self.send(b'{"op": "join", "table": "t1"}\n')
+        with mock.patch.object(table_server.Table, 'bet', side_effect=RuntimeError("boom")), \
+                self.assertLogs("table_server", "ERROR"):
+            self.assertEqual(await self.send(b'{"op": "bet", "amount": 10}\n'),
+                             {'ok': False, 'error': "Internal error."})
+        self.assertTrue((await self.send(b'{"op": "bet", "amount": 10}\n'))['ok'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+In-window notifications for the GUI.
+
+A Toast is one overlay widget, created with the window and reused for every
+message: showing a message only sets its text and icon, and never opens a
+dialog or waits on an event loop. Icons are decoded and scaled once per file
+and kept in a module-level cache.
+A message stays up until it is clicked, replaced by the next one or, if
+timeout_ms is set, until that many milliseconds have passed. A queued message
+waits for the current one to be dismissed instead of replacing it.
+"""
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QPixmap
+from PySide6.QtWidgets import QFrame, QHBoxLayout, QLabel, QVBoxLayout
+
+import tracing
+
+
+ICON_SIZE = 48
+WIDTH = 460
+MARGIN = 12
+
+_icons = {}
+
+
+def icon(path):
+    """The icon at path scaled to ICON_SIZE, read from disk the first time only."""
+    pixmap = _icons.get(path)
+    if pixmap is None:
+        pixmap = _icons[path] = QPixmap(path).scaled(ICON_SIZE, ICON_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return pixmap
+
+
+class Toast(QFrame):
+    """
+    Message overlay in the bottom-left corner of its parent window, the space
+    below the dealer's hand that the layout leaves empty.
+    - show_message(title, text, icon_path, on_dismissed): shows a message in place of the current one
+    - queue_message(title, text, icon_path, on_dismissed): shows a message once the current one is dismissed
+    - dismiss(): hides the message, then shows the next queued one
+    - timeout_ms: auto-dismiss delay for new messages (0 or None keeps them up until clicked)
+    on_dismissed, if given, is called once when the message is clicked away or
+    times out; a message that is replaced never calls it.
+    """
+    def __init__(self, parent, timeout_ms=None):
+        super().__init__(parent)
+        self.timeout_ms = timeout_ms
+        self._on_dismissed = None
+        self._queue = []
+        self.setObjectName("toast")
+        self.setStyleSheet("#toast { background-color: rgb(20, 20, 20); border-radius: 8px; }"
+                           "QLabel { color: white; background: transparent; }")
+        self.setFixedWidth(WIDTH)
+
+        self.icon_label = QLabel()
+        self.icon_label.setFixedSize(ICON_SIZE, ICON_SIZE)
+        self.title_label = QLabel()
+        self.title_label.setStyleSheet("font-weight: bold;")
+        self.text_label = QLabel()
+        self.text_label.setWordWrap(True)
+        text_layout = QVBoxLayout()
+        text_layout.setSpacing(2)
+        text_layout.addWidget(self.title_label)
+        text_layout.addWidget(self.text_label)
+        layout = QHBoxLayout(self)
+        layout.addWidget(self.icon_label)
+        layout.addLayout(text_layout, 1)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.dismiss)
+        self.hide()
+
+    def show_message(self, title, text, icon_path, on_dismissed=None):
+        # Replacing a message is not dismissing it: its callback is dropped
+        self._on_dismissed = on_dismissed
+        self.icon_label.setPixmap(icon(icon_path))
+        self.title_label.setText(title)
+        self.text_label.setText(text)
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move(MARGIN, parent.height() - self.height() - MARGIN)
+        self.raise_()
+        self.show()
+        if self.timeout_ms:
+            self.timer.start(self.timeout_ms)
+        else:
+            self.timer.stop()
+        tracing.instant("toast", title=title)
+
+    def queue_message(self, title, text, icon_path, on_dismissed=None):
+        if self.isHidden():
+            self.show_message(title, text, icon_path, on_dismissed)
+        else:
+            self._queue.append((title, text, icon_path, on_dismissed))
+
+    def dismiss(self):
+        self.timer.stop()
+        self.hide()
+        callback, self._on_dismissed = self._on_dismissed, None
+        if callback is not None:
+            callback()
+        if self._queue and self.isHidden():
+            self.show_message(*self._queue.pop(0))
+
+    def mousePressEvent(self, event):
+        self.dismiss()
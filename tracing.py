@@ -0,0 +1,111 @@
+"""
+Opt-in tracing spans, written as a Chrome trace (open the file in
+https://ui.perfetto.dev or chrome://tracing).
+
+Tracing is off unless BLACKJACK_TRACE names an output file:
+
+    BLACKJACK_TRACE=trace.json python game_gui.py
+
+When it is off, span() returns one shared do-nothing context manager and
+dialog() returns at once, so instrumented code pays a function call per span.
+
+- span(name, cat, **args): context manager timing a block on the current thread
+- dialog(box, name): times a non-blocking dialog from now until its finished signal,
+  shown as an async span so the wait is visible next to the work done meanwhile
+- instant(name, **args): a zero-length marker
+Spans for blocking waits (e.g. QDialog.exec) use cat='wait'. The trace is written
+when the process exits, or earlier with write().
+"""
+import atexit
+import contextlib
+import itertools
+import os
+import threading
+import time
+
+
+TRACE_PATH = os.environ.get("BLACKJACK_TRACE")
+ENABLED = bool(TRACE_PATH)
+
+_NULL_SPAN = contextlib.nullcontext()
+_events = []
+_named_threads = set()
+_async_ids = itertools.count(1)
+_origin = time.perf_counter_ns()
+_pid = os.getpid()
+
+
+def _now():
+    """Microseconds since this module was imported."""
+    return (time.perf_counter_ns() - _origin) / 1000
+
+
+def _tid():
+    tid = threading.get_native_id()
+    if tid not in _named_threads:
+        _named_threads.add(tid)
+        name = "main" if threading.current_thread() is threading.main_thread() else f"worker {tid}"
+        _events.append({'ph': 'M', 'name': 'thread_name', 'pid': _pid, 'tid': tid, 'args': {'name': name}})
+    return tid
+
+
+class _Span:
+    __slots__ = ('name', 'cat', 'args', 'start')
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = _now()
+        event = {'ph': 'X', 'name': self.name, 'cat': self.cat, 'pid': _pid, 'tid': _tid(),
+                 'ts': self.start, 'dur': end - self.start}
+        if self.args:
+            event['args'] = self.args
+        # list.append is atomic, so pool threads can record without a lock
+        _events.append(event)
+
+
+def span(name, cat='work', **args):
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def instant(name, cat='work', **args):
+    if ENABLED:
+        _events.append({'ph': 'i', 's': 't', 'name': name, 'cat': cat, 'pid': _pid, 'tid': _tid(),
+                        'ts': _now(), 'args': args})
+
+
+def dialog(box, name):
+    """Records an async 'wait' span from now until box emits finished."""
+    if not ENABLED:
+        return
+    span_id = next(_async_ids)
+    tid = _tid()
+    _events.append({'ph': 'b', 'name': name, 'cat': 'wait', 'id': span_id, 'pid': _pid, 'tid': tid, 'ts': _now()})
+
+    def finished(*_):
+        _events.append({'ph': 'e', 'name': name, 'cat': 'wait', 'id': span_id, 'pid': _pid, 'tid': tid, 'ts': _now()})
+
+    box.finished.connect(finished)
+
+
+def write(path=None):
+    """Writes every event recorded so far to path (default: $BLACKJACK_TRACE)."""
+    import json  # only needed when a trace is written, so it stays off the startup path
+    path = path or TRACE_PATH
+    tmp_path = f"{path}.{_pid}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'traceEvents': list(_events), 'displayTimeUnit': 'ms'}, f)
+    os.replace(tmp_path, path)
+
+
+if ENABLED:
+    atexit.register(write)
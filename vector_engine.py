@@ -0,0 +1,247 @@
+"""
+Array-backed Blackjack engine: deals and resolves whole batches of rounds at once with NumPy.
+
+Cards are small integers: a card's code is its position in a freshly built
+game_logic.Deck (suit-major, so code % 13 is the rank index). A batch of
+shuffles is an (n, 52) array of codes in the order the object Deck would hold
+them, so the same array can drive both engines and the results can be compared
+round for round.
+
+Usage:
+    python vector_engine.py --rounds 5000000
+    python vector_engine.py --rounds 200000 --check 20000
+"""
+import argparse
+import time
+
+import numpy as np
+
+import game_logic
+import hand_log
+import simulate
+
+
+# Blackjack value of each rank index (Two..Ace), Aces counted as 11
+RANK_VALUES = np.array([game_logic.values[rank] for rank in game_logic.ranks], dtype=np.int8)
+CARD_VALUES = np.tile(RANK_VALUES, len(game_logic.suits))
+
+BLACKJACK, WIN, DEALER_BUST, PUSH, LOSE, BUST = range(len(simulate.OUTCOMES))
+
+# Deck columns of the player's cards in deal order: dealt cards 0, 1, then 4, 5, ...
+PLAYER_COLUMNS = np.array([51, 50] + list(range(47, -1, -1)))
+SLOTS = np.arange(52, dtype=np.uint8)[:, None]
+
+# Hand-log actions by player hits * 2 + whether the round ended with a stand
+ACTION_ROWS = np.array([('H' * hits + 'S' * stood).encode() for hits in range(hand_log.MAX_ACTIONS + 1)
+                        for stood in (0, 1)], dtype=f'S{hand_log.MAX_ACTIONS}')
+
+
+def shuffled_decks(n, rng):
+    """Returns n independent 52-card shuffles as an (n, 52) array of card codes."""
+    decks = np.tile(np.arange(52, dtype=np.int8), (n, 1))
+    return rng.permuted(decks, axis=1)
+
+
+def _add_card(totals, card_values):
+    """Adds one card per round, counting an Ace as 1 when 11 would bust (same rule as Hand.deal_cards)."""
+    soft_bust = (card_values == 11) & (totals + 11 > 21)
+    return totals + np.where(soft_bust, 1, card_values)
+
+
+def play_batch(decks, stand_on=17, bet=10, details=False):
+    """
+    Resolves one round per row of decks with the StandOnPolicy rules.
+    The deck is dealt from the end, like Deck.deal's list.pop().
+    Returns: (outcome codes, net chips) as arrays, one entry per round, plus
+    a dict of per-round arrays (start/final totals and cards drawn by each
+    side) when details is set.
+    """
+    n = len(decks)
+    rows = np.arange(n)
+    # Reverse so column i is the i-th card dealt
+    shoe = CARD_VALUES[decks[:, ::-1]].astype(np.int16)
+
+    player = _add_card(_add_card(np.zeros(n, dtype=np.int16), shoe[:, 0]), shoe[:, 1])
+    dealer = _add_card(_add_card(np.zeros(n, dtype=np.int16), shoe[:, 2]), shoe[:, 3])
+    position = np.full(n, 4)
+
+    start_total = player.copy()
+    natural = player == 21
+
+    # Player draws while under the stand threshold
+    active = ~natural & (player < stand_on)
+    while active.any():
+        idx = rows[active]
+        player[idx] = _add_card(player[idx], shoe[idx, position[idx]])
+        position[idx] += 1
+        active[idx] = player[idx] < stand_on
+    busted = player > 21
+    player_hits = position - 4
+
+    # Dealer draws to 17 for every round still in play
+    active = ~natural & ~busted & (dealer < 17)
+    while active.any():
+        idx = rows[active]
+        dealer[idx] = _add_card(dealer[idx], shoe[idx, position[idx]])
+        position[idx] += 1
+        active[idx] = dealer[idx] < 17
+
+    outcomes = np.select(
+        [natural, busted, dealer > 21, player > dealer, player < dealer],
+        [BLACKJACK, BUST, DEALER_BUST, WIN, LOSE],
+        PUSH,
+    ).astype(np.int8)
+    payouts = np.array([int(bet * 1.5), bet, bet, 0, -bet, -bet])
+    if not details:
+        return outcomes, payouts[outcomes]
+    return outcomes, payouts[outcomes], {
+        'start_total': start_total,
+        'player_total': player,
+        'dealer_total': dealer,
+        'player_hits': player_hits,
+        'dealer_draws': position - 4 - player_hits,
+    }
+
+
+def batch_columns(decks, outcomes, net, details, bet=10):
+    """
+    Builds the hand-log columns (hand_log.COLUMNS, with the cards in the slots
+    layout) for a batch played by play_batch(..., details=True), without a
+    Python loop per round.
+    """
+    n = len(decks)
+    hits = details['player_hits']
+    player_count = (2 + hits).astype(np.uint8)
+    dealer_count = (2 + details['dealer_draws']).astype(np.uint8)
+
+    # Dealt card i is decks[:, 51 - i], as Deck.deal pops from the end. The player gets
+    # dealt cards 0, 1, then one per hit from 4; the dealer 2, 3, then whatever follows
+    # the player's hits. Slots past a hand's end are zeroed.
+    slots = int(player_count.max())
+    player_cards = np.take(decks, PLAYER_COLUMNS[:slots], axis=1).T.astype(np.uint8, order='C')
+    player_cards *= SLOTS[:slots] < player_count
+    slots = int(dealer_count.max())
+    dealer_cards = np.empty((slots, n), dtype=np.uint8)
+    dealer_cards[:2] = np.take(decks, (49, 48), axis=1).T
+    draws = np.arange(47, 52 * n, 52) - hits  # flat index of each round's first dealer draw
+    flat = decks.ravel()
+    for slot in range(2, slots):
+        dealer_cards[slot] = flat.take(draws - (slot - 2))
+    dealer_cards *= SLOTS[:slots] < dealer_count
+
+    stood = (outcomes != BLACKJACK) & (outcomes != BUST)
+    return {
+        'player_count': player_count,
+        'dealer_count': dealer_count,
+        'start_total': details['start_total'],
+        'player_total': details['player_total'],
+        'dealer_total': details['dealer_total'],
+        'outcome': outcomes,
+        'actions': ACTION_ROWS.take(np.minimum(hits, hand_log.MAX_ACTIONS) * 2 + stood),
+        'bet': np.full(n, bet, dtype='<i4'),
+        'net': net,
+        'player_cards': player_cards,
+        'dealer_cards': dealer_cards,
+    }
+
+
+def summarize(outcomes, net):
+    """Converts outcome/net arrays into the result dict used by simulate.py."""
+    results = simulate.empty_results()
+    results['rounds'] = len(outcomes)
+    results['net'] = int(net.sum())
+    counts = np.bincount(outcomes, minlength=len(simulate.OUTCOMES))
+    for outcome, count in zip(simulate.OUTCOMES, counts):
+        results['outcomes'][outcome] = int(count)
+    return results
+
+
+def run_vectorized(rounds, batch_size=100_000, stand_on=17, bet=10, seed=0, log=None):
+    """
+    Plays rounds in batches and returns simulate-style results with timing.
+    If log is a hand_log.HandLogWriter, every batch is also written to it as
+    one segment, built from the batch's arrays (see batch_columns).
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    start = time.perf_counter()
+    remaining = rounds
+    while remaining:
+        n = min(batch_size, remaining)
+        decks = shuffled_decks(n, rng)
+        if log is None:
+            outcomes, net = play_batch(decks, stand_on, bet)
+        else:
+            outcomes, net, details = play_batch(decks, stand_on, bet, details=True)
+            log.record_batch(batch_columns(decks, outcomes, net, details, bet))
+        results.append(summarize(outcomes, net))
+        remaining -= n
+    elapsed = time.perf_counter() - start
+    merged = simulate.merge_results(results)
+    merged['seconds'] = elapsed
+    merged['rounds_per_sec'] = rounds / elapsed if elapsed else 0.0
+    return merged
+
+
+def play_objects(decks, stand_on=17, bet=10):
+    """
+    Plays the same shuffles through the object engine (simulate.play_round).
+    Returns: (outcome codes, net chips) as arrays for comparison with play_batch.
+    """
+    policy = simulate.StandOnPolicy(stand_on, bet)
+    chips = game_logic.Chips()
+    outcome_index = {name: i for i, name in enumerate(simulate.OUTCOMES)}
+    outcomes = np.empty(len(decks), dtype=np.int8)
+    net = np.empty(len(decks), dtype=np.int64)
+    deck = game_logic.Deck()
+    for i, order in enumerate(decks):
+        deck.deck[:] = [game_logic.CARDS[code] for code in order]
+        outcome, won = simulate.play_round(deck, chips, policy)
+        outcomes[i] = outcome_index[outcome]
+        net[i] = won
+    return outcomes, net
+
+
+def check_against_objects(n, stand_on=17, bet=10, seed=0):
+    """
+    Runs n shared shuffles through both engines.
+    Returns: (number of mismatched rounds, object seconds, vectorized seconds).
+    """
+    decks = shuffled_decks(n, np.random.default_rng(seed))
+    start = time.perf_counter()
+    object_outcomes, object_net = play_objects(decks, stand_on, bet)
+    object_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    vector_outcomes, vector_net = play_batch(decks, stand_on, bet)
+    vector_seconds = time.perf_counter() - start
+    mismatches = int(np.count_nonzero((object_outcomes != vector_outcomes) | (object_net != vector_net)))
+    return mismatches, object_seconds, vector_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized Blackjack simulator")
+    parser.add_argument('--rounds', type=int, default=5_000_000)
+    parser.add_argument('--batch', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stand-on', type=int, default=17)
+    parser.add_argument('--bet', type=int, default=10)
+    parser.add_argument('--check', type=int, default=0, metavar='N',
+                        help="also play N shared shuffles through the object engine and compare")
+    parser.add_argument('--log', metavar='PATH', help="append every round to a hand-history log")
+    args = parser.parse_args()
+
+    if args.log:
+        with hand_log.HandLogWriter(args.log) as log:
+            simulate.print_report(run_vectorized(args.rounds, args.batch, args.stand_on, args.bet, args.seed, log))
+    else:
+        simulate.print_report(run_vectorized(args.rounds, args.batch, args.stand_on, args.bet, args.seed))
+    if args.check:
+        mismatches, object_seconds, vector_seconds = check_against_objects(args.check, args.stand_on, args.bet, args.seed)
+        print(f"Object engine: {args.check / object_seconds:,.0f} rounds/sec, "
+              f"vectorized: {args.check / vector_seconds:,.0f} rounds/sec "
+              f"(x{object_seconds / vector_seconds:.1f})")
+        print(f"Mismatched rounds: {mismatches} of {args.check}")
+
+
+if __name__ == "__main__":
+    main()
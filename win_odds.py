@@ -0,0 +1,163 @@
+"""
+Win, push and lose probabilities for the player's next decision.
+
+For a player total, the dealer's upcard and the count vector of unseen cards
+(what is left in the deck plus the dealer's hole card; index = value - 2, as
+in dealer_odds), action_odds gives the chances of each result for:
+- stand: the dealer plays out from the unseen cards (dealer_odds)
+- hit: one card is drawn from the unseen cards, then the player carries on
+  with whichever of hitting and standing is better (higher win - lose chance)
+  in every position that can follow, choosing 1 or 11 for a drawn Ace
+Results are compared as in game_logic.round_outcome: the dealer has no peek
+for blackjack, and equal totals push.
+
+Standing is one memoized dealer lookup, but hitting enumerates every sequence
+of draws and needs a full dealer enumeration for each count vector they
+leave, so low totals are slow: a 4 against a 2 takes 6-7 s from a fresh
+6-deck shoe and 1.5-3 s from a single deck. With depth set, only the first
+depth draws are taken out of the counts and later ones are drawn as if
+replaced, which leaves far fewer count vectors: depth=2 brings that case
+under half a second, and its odds stay within 0.1 percentage point of the
+exact ones. The cancelled callback, if given, is polled between dealer
+lookups, and the calculation stops with Cancelled as soon as it returns True,
+so a caller can drop a result that is no longer wanted without waiting for it.
+
+Usage:
+    python win_odds.py
+"""
+import os
+import time
+
+import dealer_odds
+
+
+ACTIONS = ('hit', 'stand')
+LOSE = (0.0, 0.0, 1.0)
+
+
+class Cancelled(Exception):
+    """The calculation was abandoned because cancelled() returned True."""
+
+
+def stand_odds(total, upcard_value, counts):
+    """(win, push, lose) if the player stands on total."""
+    if total > 21:
+        return LOSE
+    dist = dealer_odds.dealer_distribution(upcard_value, counts)
+    win = dist[-1]
+    push = lose = 0.0
+    for dealer_total, p in zip(dealer_odds.DEALER_TOTALS[:-1], dist):
+        if dealer_total < total:
+            win += p
+        elif dealer_total == total:
+            push += p
+        else:
+            lose += p
+    return win, push, lose
+
+
+def _edge(odds):
+    return odds[0] - odds[2]
+
+
+def _hit(total, upcard_value, counts, memo, cancelled, depth):
+    remaining = sum(counts)
+    if not remaining:
+        return stand_odds(total, upcard_value, counts)
+    win = push = lose = 0.0
+    next_counts = list(counts)
+    for index, count in enumerate(counts):
+        if not count:
+            continue
+        value = index + 2
+        if depth == 0:
+            # Past the depth limit the card is drawn as if replaced
+            after = counts
+        else:
+            next_counts[index] -= 1
+            after = tuple(next_counts)
+            next_counts[index] += 1
+        next_depth = None if depth is None else max(depth - 1, 0)
+        # A drawn Ace is worth whichever of 11 and 1 plays out better
+        best = LOSE
+        for new_total in ((total + 11, total + 1) if value == 11 else (total + value,)):
+            if new_total <= 21:
+                odds = _best(new_total, upcard_value, after, memo, cancelled, next_depth)
+                if _edge(odds) > _edge(best):
+                    best = odds
+        weight = count / remaining
+        win += weight * best[0]
+        push += weight * best[1]
+        lose += weight * best[2]
+    return win, push, lose
+
+
+def _best(total, upcard_value, counts, memo, cancelled, depth):
+    key = (total, counts, depth)
+    odds = memo.get(key)
+    if odds is None:
+        if cancelled is not None and cancelled():
+            raise Cancelled()
+        stand = stand_odds(total, upcard_value, counts)
+        hit = _hit(total, upcard_value, counts, memo, cancelled, depth) if total < 21 else LOSE
+        odds = memo[key] = hit if _edge(hit) > _edge(stand) else stand
+    return odds
+
+
+def action_odds(total, upcard_value, counts, cancelled=None, depth=None):
+    """
+    {'hit': (win, push, lose), 'stand': (win, push, lose)} for the player's total against the upcard.
+    depth limits how many draws are taken out of the counts (None: all of them, exact).
+    """
+    counts = tuple(counts)
+    if cancelled is not None and cancelled():
+        raise Cancelled()
+    return {'hit': _hit(total, upcard_value, counts, {}, cancelled, depth),
+            'stand': stand_odds(total, upcard_value, counts)}
+
+
+def unseen_counts(deck, hole_card):
+    """Count vector of the cards the player cannot see: the deck's remaining cards and the dealer's hole card."""
+    counts = list(deck.counts) if hasattr(deck, 'counts') else list(dealer_odds.rank_counts(deck.deck))
+    counts[hole_card.value - 2] += 1
+    return tuple(counts)
+
+
+# --- Worker process ---
+
+_cancel_event = None
+
+
+def init_worker(cancel_event, niceness=0):
+    """
+    Process pool initializer: worker_odds stops with Cancelled once cancel_event
+    is set. A positive niceness lowers the process's scheduling priority (where
+    os.nice exists), so it yields the CPU to the process that started it.
+    """
+    global _cancel_event
+    _cancel_event = cancel_event
+    if niceness and hasattr(os, 'nice'):
+        os.nice(niceness)
+
+
+def worker_odds(total, upcard_value, counts, depth=None):
+    """action_odds in a pool process set up by init_worker."""
+    return action_odds(total, upcard_value, counts, _cancel_event.is_set, depth)
+
+
+if __name__ == "__main__":
+    # Player 10 + 6 against a dealer 10, then the slow case: 2 + 2 against a dealer 2
+    for total, upcard_value, dealt in ((16, 10, (10, 6, 10)), (4, 2, (2, 2, 2))):
+        for decks in (1, 6):
+            counts = [4 * decks] * 8 + [16 * decks, 4 * decks]
+            for value in dealt:
+                counts[value - 2] -= 1
+            for depth in (None, 2):
+                dealer_odds.dealer_distribution.cache_clear()
+                start = time.perf_counter()
+                odds = action_odds(total, upcard_value, counts, depth=depth)
+                elapsed = time.perf_counter() - start
+                print(f"{decks} deck(s), {total} against a {upcard_value}, depth {depth} ({elapsed * 1000:.1f} ms):")
+                for action in ACTIONS:
+                    win, push, lose = odds[action]
+                    print(f"  {action:<5}  win {win:6.2%}  push {push:6.2%}  lose {lose:6.2%}")